@@ -0,0 +1,305 @@
+import json
+import time
+from datetime import datetime
+from typing import Any
+
+from app.schema_cache import ATTRIBUTE_TYPE_TABLES, schema_cache
+from app.search import SEARCH_WEIGHTS, name_vector, refresh_search_vectors
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Columns written by COPY for each value table
+COPY_TABLES = {
+    "values_text": ("entity_id", "attribute_id", "value"),
+    "values_number": ("entity_id", "attribute_id", "value"),
+    "values_boolean": ("entity_id", "attribute_id", "value"),
+    "values_datetime": ("entity_id", "attribute_id", "value"),
+    "values_json": ("entity_id", "attribute_id", "value"),
+    "values_relation": ("entity_id", "attribute_id", "related_entity_id"),
+    "values_relation_multi": ("entity_id", "attribute_id", "related_entity_id", "sort_order"),
+}
+
+
+class BulkEntityRow(BaseModel):
+    entity_type_id: int
+    name: str
+    slug: str
+    # Client-chosen key other rows in the same batch can reference as {"ref": ...}
+    ref: str | None = None
+    values: dict[str, Any] = {}
+
+
+class BulkImportError(ValueError):
+    """Raised when a bulk import body cannot be parsed at all."""
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> list[Any]:
+    """Parse a JSON array or NDJSON request body into a list of raw rows."""
+    if "ndjson" in content_type or "jsonl" in content_type:
+        rows = []
+        for line_no, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise BulkImportError(f"Invalid JSON on line {line_no}: {exc}") from exc
+        return rows
+
+    try:
+        rows = json.loads(body)
+    except ValueError as exc:
+        raise BulkImportError(f"Invalid JSON: {exc}") from exc
+    if not isinstance(rows, list):
+        raise BulkImportError("Expected a JSON array of entities")
+    return rows
+
+
+def relation_target(value: Any) -> tuple[str, Any] | None:
+    """Classify a relation value as ("id", int) or ("ref", str)."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return ("id", value)
+    if isinstance(value, dict):
+        if isinstance(value.get("id"), int):
+            return ("id", value["id"])
+        if isinstance(value.get("ref"), str):
+            return ("ref", value["ref"])
+    return None
+
+
+def check_value(attr_type: str, value: Any) -> str | None:
+    """Return an error message if a value does not fit its attribute type."""
+    if value is None or attr_type in ("json",):
+        return None
+    if attr_type in ("text", "textarea", "hex"):
+        return None if isinstance(value, str) else "expected a string"
+    if attr_type == "number":
+        return None if isinstance(value, (int, float)) and not isinstance(value, bool) else "expected a number"
+    if attr_type == "boolean":
+        return None if isinstance(value, bool) else "expected a boolean"
+    if attr_type == "datetime":
+        try:
+            datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return "expected an ISO 8601 datetime"
+        return None
+    if attr_type == "relation":
+        return None if relation_target(value) else "expected an entity id, {\"id\": ...} or {\"ref\": ...}"
+    if attr_type == "relation_multi":
+        if not isinstance(value, list) or not all(relation_target(item) for item in value):
+            return "expected a list of entity ids, {\"id\": ...} or {\"ref\": ...}"
+        return None
+    return f"unsupported attribute type {attr_type}"
+
+
+def _fail_dependents(dependencies: dict[int, set[int]], errors: dict[int, str]) -> None:
+    """Fail rows whose relations point at failed rows, until no more rows fail."""
+    changed = True
+    while changed:
+        changed = False
+        for row_no, row_dependencies in dependencies.items():
+            if row_no in errors:
+                continue
+            failed = next((dep for dep in row_dependencies if dep in errors), None)
+            if failed is not None:
+                errors[row_no] = f"references failed row {failed}"
+                changed = True
+
+
+async def import_entities(db: AsyncSession, raw_rows: list[Any]) -> dict[str, Any]:
+    """Create entities and all their values from a batch in one transaction.
+
+    Rows are validated against the cached attribute schema, entities are
+    staged with COPY and inserted with one INSERT ... SELECT, and values are
+    streamed straight into the value tables with COPY. Search vectors are
+    built in the same transaction. Relations may point at
+    existing entities by id or at other rows of the batch by ref. Invalid rows,
+    and rows whose relations point at invalid rows, are reported instead of
+    failing the whole batch.
+    """
+    started = time.perf_counter()
+    errors: dict[int, str] = {}
+    rows: dict[int, BulkEntityRow] = {}
+    refs: dict[str, int] = {}
+
+    # Validate shape, refs and duplicate slugs within the batch
+    seen_slugs: dict[tuple[int, str], int] = {}
+    for row_no, raw in enumerate(raw_rows):
+        try:
+            row = BulkEntityRow.model_validate(raw)
+        except ValidationError as exc:
+            errors[row_no] = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+            )
+            continue
+        if (row.entity_type_id, row.slug) in seen_slugs:
+            errors[row_no] = f"duplicate slug in batch (row {seen_slugs[(row.entity_type_id, row.slug)]})"
+            continue
+        if row.ref is not None:
+            if row.ref in refs:
+                errors[row_no] = f"duplicate ref in batch (row {refs[row.ref]})"
+                continue
+            refs[row.ref] = row_no
+        seen_slugs[(row.entity_type_id, row.slug)] = row_no
+        rows[row_no] = row
+
+    # Validate values once per entity type schema
+    type_ids = sorted({row.entity_type_id for row in rows.values()})
+    known_types = {
+        r.id for r in await db.execute(text("SELECT id FROM entity_types WHERE id = ANY(:ids)"), {"ids": type_ids})
+    } if type_ids else set()
+    schemas = {type_id: await schema_cache.attributes_for_type(db, type_id) for type_id in known_types}
+
+    # Per row: existing entity ids and batch rows its relations point at
+    targets: dict[int, set[int]] = {}
+    dependencies: dict[int, set[int]] = {}
+    for row_no, row in rows.items():
+        if row.entity_type_id not in known_types:
+            errors[row_no] = "Invalid entity type"
+            continue
+        attributes = schemas[row.entity_type_id]
+        row_targets: set[int] = set()
+        row_dependencies: set[int] = set()
+        for slug, value in row.values.items():
+            attr = attributes.get(slug)
+            if attr is None:
+                errors[row_no] = f"Unknown attribute: {slug}"
+                break
+            problem = check_value(attr["type"], value)
+            if problem:
+                errors[row_no] = f"{slug}: {problem}"
+                break
+            if attr["type"] in ("relation", "relation_multi") and value is not None:
+                items = value if attr["type"] == "relation_multi" else [value]
+                for kind, target in filter(None, map(relation_target, items)):
+                    if kind == "id":
+                        row_targets.add(target)
+                    elif target not in refs:
+                        errors[row_no] = f"{slug}: unknown ref {target!r}"
+                        break
+                    else:
+                        row_dependencies.add(refs[target])
+            if row_no in errors:
+                break
+        targets[row_no] = row_targets
+        dependencies[row_no] = row_dependencies
+
+    referenced_ids = set().union(*targets.values())
+    existing = {
+        r.id for r in await db.execute(
+            text("SELECT id FROM entities WHERE id = ANY(:ids)"), {"ids": sorted(referenced_ids)}
+        )
+    } if referenced_ids else set()
+    missing_ids = referenced_ids - existing
+
+    # COPY needs the underlying psycopg connection, which shares the session's transaction
+    conn = (await (await db.connection()).get_raw_connection()).driver_connection
+    async with conn.cursor() as cur:
+        await cur.execute("""
+            CREATE TEMP TABLE bulk_entities (
+                row_no INTEGER PRIMARY KEY,
+                entity_type_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                slug TEXT NOT NULL
+            ) ON COMMIT DROP
+        """)
+        async with cur.copy("COPY bulk_entities (row_no, entity_type_id, name, slug) FROM STDIN") as copy:
+            for row_no, row in rows.items():
+                if row_no not in errors:
+                    await copy.write_row((row_no, row.entity_type_id, row.name, row.slug))
+
+        await cur.execute("""
+            SELECT b.row_no
+            FROM bulk_entities b
+            JOIN entities e ON e.entity_type_id = b.entity_type_id AND e.slug = b.slug
+        """)
+        for (row_no,) in await cur.fetchall():
+            errors[row_no] = "slug already exists"
+
+    for row_no, row_targets in targets.items():
+        missing = row_targets & missing_ids
+        if missing and row_no not in errors:
+            errors[row_no] = f"related entity {min(missing)} does not exist"
+
+    # Rows referencing failed rows cannot be created either
+    _fail_dependents(dependencies, errors)
+
+    entity_ids: dict[int, int] = {}
+    async with conn.cursor() as cur:
+        if errors:
+            await cur.execute("DELETE FROM bulk_entities WHERE row_no = ANY(%s)", (sorted(errors),))
+        await cur.execute(f"""
+            INSERT INTO entities (entity_type_id, name, slug, search_vector)
+            SELECT entity_type_id, name, slug, {name_vector("name")} FROM bulk_entities ORDER BY row_no
+            ON CONFLICT (entity_type_id, slug) DO NOTHING
+            RETURNING id, entity_type_id, slug
+        """)
+        for entity_id, entity_type_id, slug in await cur.fetchall():
+            entity_ids[seen_slugs[(entity_type_id, slug)]] = entity_id
+
+        # Rows that lost a race with a concurrent insert of the same slug fail,
+        # and so do the rows referencing them, which are removed again before
+        # any of their values are written
+        for row_no in rows:
+            if row_no not in errors and row_no not in entity_ids:
+                errors[row_no] = "slug already exists"
+        _fail_dependents(dependencies, errors)
+        orphaned = [entity_ids.pop(row_no) for row_no in list(entity_ids) if row_no in errors]
+        if orphaned:
+            await cur.execute("DELETE FROM entities WHERE id = ANY(%s)", (orphaned,))
+
+        value_rows: dict[str, list[tuple]] = {table: [] for table in COPY_TABLES}
+        for row_no, entity_id in entity_ids.items():
+            row = rows[row_no]
+            attributes = schemas[row.entity_type_id]
+            for slug, value in row.values.items():
+                attr = attributes[slug]
+                table = ATTRIBUTE_TYPE_TABLES.get(attr["type"])
+                if table is None or value is None:
+                    continue
+                if table == "values_relation":
+                    kind, target = relation_target(value)
+                    related_id = target if kind == "id" else entity_ids.get(refs[target])
+                    if related_id is not None:
+                        value_rows[table].append((entity_id, attr["id"], related_id))
+                elif table == "values_relation_multi":
+                    seen: set[int] = set()
+                    for sort_order, item in enumerate(value):
+                        kind, target = relation_target(item)
+                        related_id = target if kind == "id" else entity_ids.get(refs[target])
+                        if related_id is not None and related_id not in seen:
+                            seen.add(related_id)
+                            value_rows[table].append((entity_id, attr["id"], related_id, sort_order))
+                elif table == "values_json":
+                    value_rows[table].append((entity_id, attr["id"], json.dumps(value)))
+                else:
+                    value_rows[table].append((entity_id, attr["id"], value))
+
+        value_count = 0
+        for table, table_rows in value_rows.items():
+            if not table_rows:
+                continue
+            async with cur.copy(f"COPY {table} ({', '.join(COPY_TABLES[table])}) FROM STDIN") as copy:
+                for value_row in table_rows:
+                    await copy.write_row(value_row)
+            value_count += len(table_rows)
+
+    await refresh_search_vectors(db, {
+        entity_id for row_no, entity_id in entity_ids.items()
+        if any(schemas[rows[row_no].entity_type_id][slug]["type"] in SEARCH_WEIGHTS for slug in rows[row_no].values)
+    })
+    await db.commit()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "created": len(entity_ids),
+        "failed": len(errors),
+        "values": value_count,
+        "ids": [entity_ids.get(row_no) for row_no in range(len(raw_rows))],
+        "errors": [{"row": row_no, "error": errors[row_no]} for row_no in sorted(errors)],
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_second": round(len(raw_rows) / elapsed, 1) if elapsed else None,
+    }
@@ -0,0 +1,148 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable
+
+ENTITY_CACHE_MAX_ENTRIES = int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "10000"))
+ENTITY_CACHE_MAX_BYTES = int(os.getenv("ENTITY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "300"))
+
+
+@dataclass(slots=True)
+class CachedDocument:
+    schema_version: int | None
+    etag: str
+    document: Any
+    embedded: frozenset[int]
+    size: int
+    expires_at: float
+
+
+class DocumentCache:
+    """Process-wide LRU cache of rendered entity documents.
+
+    Entries are bounded by count, by approximate serialized size and by age.
+    Every entry records the ids of all entities embedded in its document, and
+    a reverse index from entity id to cache keys lets a write to any entity
+    evict exactly the documents that contain it.
+
+    Invalidation only reaches the cache of the process that made the write.
+    With several worker processes, the others keep serving their copies
+    until ENTITY_CACHE_TTL expires them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ENTITY_CACHE_MAX_ENTRIES,
+        max_bytes: int = ENTITY_CACHE_MAX_BYTES,
+        ttl: float = ENTITY_CACHE_TTL,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Bumped by every invalidation so documents loaded concurrently with a
+        # write are not stored afterwards
+        self.generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[Hashable, CachedDocument] = OrderedDict()
+        self._dependents: dict[int, set[Hashable]] = {}
+
+    def get(self, key: Hashable, schema_version: int | None) -> CachedDocument | None:
+        """Return a fresh cached document for key, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.schema_version != schema_version or entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(
+        self,
+        key: Hashable,
+        schema_version: int | None,
+        etag: str,
+        document: Any,
+        embedded: Iterable[int],
+        generation: int,
+    ) -> None:
+        """Store a document loaded while the cache was at generation.
+
+        The document is dropped if any entity was invalidated in the meantime,
+        since it may have been read before that write committed.
+        """
+        if self.max_entries <= 0 or generation != self.generation:
+            return
+        size = len(json.dumps(document, default=str))
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        entry = CachedDocument(schema_version, etag, document, frozenset(embedded), size, time.monotonic() + self.ttl)
+        self._entries[key] = entry
+        self.bytes += size
+        for entity_id in entry.embedded:
+            self._dependents.setdefault(entity_id, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, entity_ids: Iterable[int]) -> None:
+        """Evict every document that embeds any of the given entities."""
+        self.generation += 1
+        for entity_id in entity_ids:
+            for key in list(self._dependents.get(entity_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all cached documents."""
+        self.generation += 1
+        self._entries.clear()
+        self._dependents.clear()
+        self.bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        for entity_id in entry.embedded:
+            keys = self._dependents.get(entity_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._dependents[entity_id]
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache counters and current memory usage."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+document_cache = DocumentCache()
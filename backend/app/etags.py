@@ -0,0 +1,24 @@
+import hashlib
+from typing import Any, Mapping
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the values a representation depends on."""
+    return f'"{hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Return True if the request's If-None-Match header matches etag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str, headers: Mapping[str, str] | None = None) -> Response:
+    """Return an empty 304 response carrying the current ETag and any extra headers."""
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
@@ -0,0 +1,130 @@
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+from app.schema_cache import ATTRIBUTE_TYPE_TABLES
+
+FACET_SPEC = re.compile(r"\s*([^,:()\s]+)\s*(?::\s*buckets\(([^)]*)\))?\s*(?:,|$)")
+
+
+class InvalidFacet(ValueError):
+    """Raised when a facet specification cannot be parsed or applied."""
+
+
+def parse_facets(spec: str) -> list[tuple[str, list[Decimal] | None]]:
+    """Parse "tags,color,price:buckets(0,25,50,100)" into (slug, bucket bounds) pairs."""
+    facets = []
+    position = 0
+    while position < len(spec):
+        match = FACET_SPEC.match(spec, position)
+        if not match or match.end() == position:
+            raise InvalidFacet(f"Invalid facet specification near {spec[position:]!r}")
+        slug, bounds = match.group(1), match.group(2)
+        if bounds is None:
+            facets.append((slug, None))
+        else:
+            try:
+                values = [Decimal(bound) for bound in bounds.split(",")]
+            except InvalidOperation:
+                raise InvalidFacet(f"Invalid bucket bounds for {slug}: {bounds}") from None
+            if not values or any(not value.is_finite() for value in values) or values != sorted(set(values)):
+                raise InvalidFacet(f"Bucket bounds for {slug} must be increasing numbers")
+            facets.append((slug, values))
+        position = match.end()
+    return facets
+
+
+def compile_facets(
+    facets: list[tuple[str, list[Decimal] | None]],
+    attributes: dict[str, dict[str, Any]],
+) -> tuple[list[str], dict[str, Any]]:
+    """Compile facets into SELECTs over the matched entities, one per facet.
+
+    Each SELECT yields (facet, key, name, slug, count) rows, where facet is the
+    position of the facet in the list and key is the related entity id, the
+    width_bucket index or 1/0 for booleans. All of them read from the
+    "matched" CTE of entity ids, so they can be combined with UNION ALL into a
+    single statement.
+    """
+    selects = []
+    params: dict[str, Any] = {}
+    for i, (slug, bounds) in enumerate(facets):
+        attr = attributes.get(slug)
+        if attr is None:
+            raise InvalidFacet(f"Unknown attribute: {slug}")
+        table = ATTRIBUTE_TYPE_TABLES.get(attr["type"])
+        params[f"facet_attr_{i}"] = attr["id"]
+
+        if table in ("values_relation", "values_relation_multi"):
+            if bounds is not None:
+                raise InvalidFacet(f"Buckets are only supported for number attributes, not {slug}")
+            selects.append(f"""
+                SELECT {i} AS facet, r.id AS key, r.name, r.slug, count(*) AS count
+                FROM {table} v
+                JOIN matched m ON m.id = v.entity_id
+                JOIN entities r ON r.id = v.related_entity_id
+                WHERE v.attribute_id = :facet_attr_{i}
+                GROUP BY r.id, r.name, r.slug
+            """)
+        elif table == "values_number":
+            if bounds is None:
+                raise InvalidFacet(f"Number facet {slug} needs buckets, e.g. {slug}:buckets(0,10,100)")
+            params[f"facet_bounds_{i}"] = bounds
+            selects.append(f"""
+                SELECT {i} AS facet, width_bucket(v.value, CAST(:facet_bounds_{i} AS numeric[])) AS key,
+                       NULL AS name, NULL AS slug, count(*) AS count
+                FROM values_number v
+                JOIN matched m ON m.id = v.entity_id
+                WHERE v.attribute_id = :facet_attr_{i} AND v.value IS NOT NULL
+                GROUP BY 2
+            """)
+        elif table == "values_boolean":
+            if bounds is not None:
+                raise InvalidFacet(f"Buckets are only supported for number attributes, not {slug}")
+            selects.append(f"""
+                SELECT {i} AS facet, CASE WHEN v.value THEN 1 ELSE 0 END AS key,
+                       NULL AS name, NULL AS slug, count(*) AS count
+                FROM values_boolean v
+                JOIN matched m ON m.id = v.entity_id
+                WHERE v.attribute_id = :facet_attr_{i} AND v.value IS NOT NULL
+                GROUP BY 2
+            """)
+        else:
+            raise InvalidFacet(f"Attribute {slug} of type {attr['type']} cannot be faceted")
+    return selects, params
+
+
+def collect_facets(
+    facets: list[tuple[str, list[Decimal] | None]],
+    attributes: dict[str, dict[str, Any]],
+    rows: list[Any],
+) -> dict[str, Any]:
+    """Shape the rows of the compiled facet SELECTs into the response document."""
+    counts: dict[int, dict[Any, Any]] = {i: {} for i in range(len(facets))}
+    for row in rows:
+        counts[row.facet][row.key] = row
+
+    result: dict[str, Any] = {}
+    for i, (slug, bounds) in enumerate(facets):
+        attr_type = attributes[slug]["type"]
+        if bounds is not None:
+            edges = [None, *bounds, None]
+            result[slug] = [
+                {
+                    "from": float(edges[key]) if edges[key] is not None else None,
+                    "to": float(edges[key + 1]) if edges[key + 1] is not None else None,
+                    "count": counts[i][key].count if key in counts[i] else 0,
+                }
+                for key in range(len(bounds) + 1)
+            ]
+        elif attr_type == "boolean":
+            result[slug] = [
+                {"value": value, "count": counts[i][int(value)].count if int(value) in counts[i] else 0}
+                for value in (True, False)
+            ]
+        else:
+            result[slug] = sorted(
+                ({"id": row.key, "name": row.name, "slug": row.slug, "count": row.count} for row in counts[i].values()),
+                key=lambda item: (-item["count"], item["name"]),
+            )
+    return result
@@ -0,0 +1,121 @@
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Iterable
+
+from app.schema_cache import ATTRIBUTE_TYPE_TABLES
+
+FILTER_PARAM = re.compile(r"^filter\[([^\[\]]+)\](?:\[([a-z]+)\])?$")
+
+OPERATORS = {"eq": "=", "ne": "<>", "lt": "<", "lte": "<=", "gt": ">", "gte": ">=", "in": "IN"}
+
+# Operators that make sense for each value table
+TABLE_OPERATORS = {
+    "values_text": {"eq", "ne", "lt", "lte", "gt", "gte", "in"},
+    "values_number": {"eq", "ne", "lt", "lte", "gt", "gte", "in"},
+    "values_datetime": {"eq", "ne", "lt", "lte", "gt", "gte", "in"},
+    "values_boolean": {"eq", "ne"},
+    "values_relation": {"eq", "ne", "in"},
+    "values_relation_multi": {"eq", "in"},
+}
+
+# Longest text value covered by the partial (attribute_id, value, entity_id)
+# index on values_text; longer values do not fit in a btree entry.
+TEXT_INDEX_MAX_BYTES = 2000
+
+
+class InvalidFilter(ValueError):
+    """Raised when an attribute filter cannot be parsed or applied."""
+
+
+def parse_filters(params: Iterable[tuple[str, str]]) -> list[tuple[str, str, str]]:
+    """Collect (slug, operator, raw value) triples from filter[slug][op]=value query parameters."""
+    filters = []
+    for name, value in params:
+        match = FILTER_PARAM.match(name)
+        if not match:
+            continue
+        slug, operator = match.group(1), match.group(2) or "eq"
+        if operator not in OPERATORS:
+            raise InvalidFilter(f"Unknown filter operator: {operator}")
+        filters.append((slug, operator, value))
+    return filters
+
+
+def _parse_value(table: str, raw: str) -> Any:
+    """Convert a raw filter value to the type of the value column.
+
+    Values are bound with the column's own type (numeric, timestamp without
+    time zone) so comparisons do not cast the column and can use its index.
+    """
+    if table == "values_number":
+        try:
+            number = Decimal(raw)
+        except InvalidOperation:
+            raise ValueError(f"could not convert string to number: {raw!r}") from None
+        if not number.is_finite():
+            raise ValueError("expected a finite number")
+        return number
+    if table == "values_boolean":
+        if raw.lower() in ("true", "1"):
+            return True
+        if raw.lower() in ("false", "0"):
+            return False
+        raise ValueError("expected true or false")
+    if table == "values_datetime":
+        # Stored as timestamp without time zone, which ignores any offset on input
+        return datetime.fromisoformat(raw).replace(tzinfo=None)
+    if table in ("values_relation", "values_relation_multi"):
+        return int(raw)
+    return raw
+
+
+def compile_filters(
+    filters: list[tuple[str, str, str]],
+    attributes: dict[str, dict[str, Any]],
+    entity_column: str = "e.id",
+) -> tuple[list[str], dict[str, Any]]:
+    """Compile filters into SQL conditions on entity_column and their bind parameters.
+
+    Each filter becomes a semi-join against the value table of its attribute's
+    type, shaped so that the (attribute_id, value, entity_id) indexes answer
+    it with an index-only scan. An entity without a value for an attribute
+    matches no filter on that attribute, including ne.
+    """
+    conditions = []
+    params: dict[str, Any] = {}
+    for i, (slug, operator, raw) in enumerate(filters):
+        attr = attributes.get(slug)
+        if attr is None:
+            raise InvalidFilter(f"Unknown attribute: {slug}")
+        table = ATTRIBUTE_TYPE_TABLES.get(attr["type"])
+        if table not in TABLE_OPERATORS:
+            raise InvalidFilter(f"Attribute {slug} of type {attr['type']} cannot be filtered")
+        if operator not in TABLE_OPERATORS[table]:
+            raise InvalidFilter(f"Operator {operator} is not supported for {attr['type']} attribute {slug}")
+
+        raws = raw.split(",") if operator == "in" else [raw]
+        try:
+            values = [_parse_value(table, item.strip()) for item in raws]
+        except ValueError as exc:
+            raise InvalidFilter(f"Invalid value for filter on {slug}: {exc}") from exc
+
+        column = "related_entity_id" if table in ("values_relation", "values_relation_multi") else "value"
+        params[f"filter_attr_{i}"] = attr["id"]
+        if operator == "in":
+            params[f"filter_value_{i}"] = values
+            predicate = f"f.{column} = ANY(:filter_value_{i})"
+        else:
+            params[f"filter_value_{i}"] = values[0]
+            predicate = f"f.{column} {OPERATORS[operator]} :filter_value_{i}"
+        if table == "values_text" and operator in ("eq", "in") and all(
+            len(value.encode()) <= TEXT_INDEX_MAX_BYTES for value in values
+        ):
+            # Implied by the match itself; lets the planner use the partial index
+            predicate += f" AND octet_length(f.value) <= {TEXT_INDEX_MAX_BYTES}"
+
+        conditions.append(
+            f"{entity_column} IN (SELECT f.entity_id FROM {table} f "
+            f"WHERE f.attribute_id = :filter_attr_{i} AND {predicate})"
+        )
+    return conditions, params
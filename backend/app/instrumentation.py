@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import FrameType
+
+from app import metrics
+from greenlet import getcurrent
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DB_INSTRUMENTATION = os.getenv("DB_INSTRUMENTATION", "true").lower() in ("1", "true", "yes")
+ACCESS_LOG = os.getenv("ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+# Call sites listed individually in the Server-Timing header, slowest first
+SERVER_TIMING_SITES = int(os.getenv("SERVER_TIMING_SITES", "5"))
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+# Frames in these files are plumbing, not call sites
+SKIPPED_FILES = {os.path.abspath(__file__), os.path.join(APP_DIR, "db.py")}
+MAX_FRAMES = 64
+
+VALUE_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+values_(\w+)", re.IGNORECASE)
+
+access_logger = logging.getLogger("app.access")
+if ACCESS_LOG and not access_logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    access_logger.addHandler(handler)
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+
+
+@dataclass(slots=True)
+class SiteStats:
+    queries: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """SQL statements, rows and database time recorded while serving one request."""
+
+    queries: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    # Entities whose values were loaded, counting every entity of expanded relations
+    entities: int = 0
+    sites: dict[str, SiteStats] = field(default_factory=dict)
+
+    def record(self, site: str, rows: int, seconds: float) -> None:
+        self.queries += 1
+        self.seconds += seconds
+        stats = self.sites.get(site)
+        if stats is None:
+            stats = self.sites[site] = SiteStats()
+        stats.queries += 1
+        stats.seconds += seconds
+        if rows > 0:
+            self.rows += rows
+            stats.rows += rows
+
+    def server_timing(self, total: float) -> str:
+        """Format the stats as a Server-Timing header value."""
+        metrics = [
+            f'db;dur={self.seconds * 1000:.2f};desc="{self.queries} queries, {self.rows} rows"',
+            f"app;dur={(total - self.seconds) * 1000:.2f}",
+        ]
+        slowest = sorted(self.sites.items(), key=lambda item: item[1].seconds, reverse=True)[:SERVER_TIMING_SITES]
+        for site, stats in slowest:
+            metrics.append(f'db.{site};dur={stats.seconds * 1000:.2f};desc="{stats.queries} queries"')
+        return ", ".join(metrics)
+
+    def as_log(self) -> dict:
+        return {
+            "db_queries": self.queries,
+            "db_rows": self.rows,
+            "db_ms": round(self.seconds * 1000, 3),
+            "entities_loaded": self.entities,
+            "db_sites": {
+                site: {"queries": stats.queries, "rows": stats.rows, "ms": round(stats.seconds * 1000, 3)}
+                for site, stats in self.sites.items()
+            },
+        }
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> RequestStats | None:
+    """Stats of the request being served, or None outside a request."""
+    return _request_stats.get()
+
+
+def count_entities(count: int) -> None:
+    """Add to the number of entities loaded by the current request."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.entities += count
+
+
+@lru_cache(maxsize=1024)
+def statement_table(statement: str) -> str | None:
+    """Short name of the first value table a statement reads or writes, e.g. "relation_multi"."""
+    match = VALUE_TABLE.search(statement)
+    return match.group(1) if match else None
+
+
+def _caller(frame: FrameType | None) -> str | None:
+    """Qualified name of the first app function on the stack above frame.
+
+    Statements from an AsyncSession execute in a greenlet whose stack ends
+    where SQLAlchemy switched to it; the awaiting coroutines are found by
+    continuing from the parent greenlet's suspended frame.
+    """
+    current = getcurrent()
+    for _ in range(MAX_FRAMES):
+        if frame is None:
+            current = current.parent
+            if current is None:
+                return None
+            frame = current.gr_frame
+            continue
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and filename not in SKIPPED_FILES:
+            return frame.f_code.co_qualname
+        frame = frame.f_back
+    return None
+
+
+def call_site(statement: str) -> str:
+    """Label a statement with the app function that issued it and the value table it touches."""
+    site = _caller(sys._getframe(2)) or "other"
+    table = statement_table(statement)
+    return f"{site}.{table}" if table else site
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _request_stats.get() is not None:
+        conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _request_stats.get()
+    started = conn.info.pop("query_started", None)
+    if stats is None or started is None:
+        return
+    stats.record(call_site(statement), cursor.rowcount, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record every statement the engine executes in the stats of the current request."""
+    if DB_INSTRUMENTATION:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryTimingMiddleware:
+    """Collects SQL stats per request, sends them as Server-Timing and writes an access log line.
+
+    Every request is also recorded in the Prometheus metrics, labelled with
+    its route template rather than its path to keep label cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+        metrics.http_requests_in_flight.inc()
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            metrics.http_requests_in_flight.dec()
+            route = getattr(scope.get("route"), "path", None)
+            metrics.observe_request(
+                scope["method"], route or "unmatched", status, elapsed, stats.queries, stats.seconds, stats.entities
+            )
+            if ACCESS_LOG:
+                access_logger.info(json.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 3),
+                    **stats.as_log(),
+                }))
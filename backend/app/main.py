@@ -1,4 +1,6 @@
-from app.routers import entities, entity_types, health
+from app.db import async_engine
+from app.instrumentation import QueryTimingMiddleware, instrument_engine
+from app.routers import entities, entity_types, graphql, health, metrics
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -18,12 +20,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag", "Server-Timing"],
 )
 
+# Per-request SQL statement counts and timings
+instrument_engine(async_engine.sync_engine)
+app.add_middleware(QueryTimingMiddleware)
+
 # Include routers
 app.include_router(health.router)
 app.include_router(entity_types.router)
 app.include_router(entities.router)
+app.include_router(graphql.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
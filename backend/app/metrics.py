@@ -0,0 +1,212 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable
+
+from app.db import async_engine
+
+# Histogram buckets in seconds for request and database time
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """A metric family with a fixed set of label names, rendered in the Prometheus text format."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Yield the sample lines of the family."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        """Mirror a running total that is kept elsewhere."""
+        self._values[labels] = value
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        self._values[labels] = value
+
+    def inc(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts with +Inf last, and the sum
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._sums[labels] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(self._sums[labels])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class Registry:
+    """Metric families of this process, plus collectors run at scrape time."""
+
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            collect()
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests served, by route template and status", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per request", ("route",), COUNT_BUCKETS
+))
+db_request_duration = registry.register(Histogram(
+    "db_request_duration_seconds", "Time spent in SQL statements per request", ("route",)
+))
+entities_loaded_per_request = registry.register(Histogram(
+    "entities_loaded_per_request",
+    "Entities whose values were loaded per request, including relation expansion",
+    ("route",),
+    COUNT_BUCKETS,
+))
+
+
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Connections of the API's pool by state", ("state",)
+))
+db_pool_size = registry.register(Gauge("db_pool_size", "Configured size of the API's connection pool"))
+db_pool_max_overflow = registry.register(Gauge(
+    "db_pool_max_overflow", "Connections the API's pool may open beyond its size"
+))
+db_pool_checkouts = registry.register(Counter("db_pool_checkouts_total", "Connections checked out of the pool"))
+db_pool_waits = registry.register(Counter(
+    "db_pool_waits_total", "Checkouts that waited because the pool was exhausted"
+))
+db_pool_wait_seconds = registry.register(Counter(
+    "db_pool_wait_seconds_total", "Time checkouts spent waiting for an exhausted pool"
+))
+db_pool_timeouts = registry.register(Counter("db_pool_timeouts_total", "Checkouts that timed out"))
+
+
+def _collect_pool() -> None:
+    stats = async_engine.pool.stats()
+    db_pool_connections.set(stats["checked_out"], ("checked_out",))
+    db_pool_connections.set(stats["checked_in"], ("checked_in",))
+    db_pool_connections.set(stats["overflow"], ("overflow",))
+    db_pool_size.set(stats["size"])
+    db_pool_max_overflow.set(stats["max_overflow"])
+    db_pool_checkouts.set(stats["checkouts"])
+    db_pool_waits.set(stats["waits"])
+    db_pool_wait_seconds.set(stats["wait_time_ms"] / 1000)
+    db_pool_timeouts.set(stats["timeouts"])
+
+
+registry.collectors.append(_collect_pool)
+
+
+def observe_request(
+    method: str, route: str, status: int, seconds: float, queries: int, db_seconds: float, entities: int
+) -> None:
+    """Record one served request."""
+    http_requests.inc((method, route, str(status)))
+    http_request_duration.observe(seconds, (method, route))
+    db_queries_per_request.observe(queries, (route,))
+    db_request_duration.observe(db_seconds, (route,))
+    if entities:
+        entities_loaded_per_request.observe(entities, (route,))
+
@@ -0,0 +1,27 @@
+import base64
+import json
+from typing import Any
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(order: str, key: list[Any]) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    payload = json.dumps({"o": order, "k": key}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str) -> list[Any]:
+    """Decode a cursor produced by encode_cursor for the same ordering."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = payload["k"]
+        cursor_order = payload["o"]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if cursor_order != order or not isinstance(key, list):
+        raise InvalidCursor("Cursor does not match the requested ordering")
+    return key
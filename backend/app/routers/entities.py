@@ -1,13 +1,29 @@
-from typing import Any
-
-from app.db import get_db
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+import os
+from typing import Any, AsyncIterator, Literal
+
+from app.bulk import BulkImportError, check_value, import_entities, parse_bulk_body, relation_target
+from app.db import AsyncSessionLocal, get_db
+from app.document_cache import document_cache
+from app.etags import etag_matches, make_etag, not_modified
+from app.facets import InvalidFacet, collect_facets, compile_facets, parse_facets
+from app.filters import InvalidFilter, compile_filters, parse_filters
+from app.instrumentation import count_entities
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.schema_cache import ATTRIBUTE_TYPE_TABLES, schema_cache
+from app.search import SEARCH_WEIGHTS, name_vector, refresh_search_vectors, search_query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/entities", tags=["entities"])
 
+DEFAULT_PAGE_SIZE = int(os.getenv("ENTITY_LIST_DEFAULT_LIMIT", "100"))
+MAX_PAGE_SIZE = int(os.getenv("ENTITY_LIST_MAX_LIMIT", "1000"))
+EXPORT_BATCH_SIZE = int(os.getenv("ENTITY_EXPORT_BATCH_SIZE", "1000"))
+
 
 class EntityResponse(BaseModel):
     id: int
@@ -21,10 +37,19 @@ class EntityDetailResponse(EntityResponse):
     values: dict[str, Any]
 
 
+class EntitySearchResult(EntityResponse):
+    rank: float
+
+
 class UpdateEntityValuesRequest(BaseModel):
     values: dict[str, Any]
 
 
+class EntityValuesUpdate(BaseModel):
+    entity_id: int
+    values: dict[str, Any]
+
+
 class CreateEntityRequest(BaseModel):
     entity_type_id: int
     name: str
@@ -32,183 +57,770 @@ class CreateEntityRequest(BaseModel):
     values: dict[str, Any] = {}
 
 
-def fetch_entity_values(db: Session, entity_id: int, depth: int = 0, max_depth: int = 5) -> dict[str, Any]:
-    """Fetch all values for an entity, recursively loading relations."""
-    values: dict[str, Any] = {}
+SCALAR_VALUE_TABLES = ("values_text", "values_number", "values_boolean", "values_datetime", "values_json")
 
-    # Text values
-    text_result = db.execute(
-        text("""
-            SELECT a.slug, v.value
-            FROM values_text v
-            JOIN attributes a ON v.attribute_id = a.id
-            WHERE v.entity_id = :entity_id
-        """),
-        {"entity_id": entity_id}
-    )
-    for row in text_result:
-        values[row.slug] = row.value
 
-    # Number values
-    number_result = db.execute(
-        text("""
-            SELECT a.slug, v.value
-            FROM values_number v
-            JOIN attributes a ON v.attribute_id = a.id
-            WHERE v.entity_id = :entity_id
-        """),
-        {"entity_id": entity_id}
-    )
-    for row in number_result:
-        values[row.slug] = float(row.value) if row.value else None
+def _convert_scalar(table: str, value: Any) -> Any:
+    """Convert a raw value column into its JSON representation."""
+    if table == "values_number":
+        return float(value) if value else None
+    if table == "values_datetime":
+        return value.isoformat() if value else None
+    return value
 
-    # Boolean values
-    boolean_result = db.execute(
-        text("""
-            SELECT a.slug, v.value
-            FROM values_boolean v
-            JOIN attributes a ON v.attribute_id = a.id
-            WHERE v.entity_id = :entity_id
-        """),
-        {"entity_id": entity_id}
-    )
-    for row in boolean_result:
-        values[row.slug] = row.value
 
-    # Datetime values
-    datetime_result = db.execute(
-        text("""
-            SELECT a.slug, v.value
-            FROM values_datetime v
-            JOIN attributes a ON v.attribute_id = a.id
-            WHERE v.entity_id = :entity_id
-        """),
-        {"entity_id": entity_id}
-    )
-    for row in datetime_result:
-        values[row.slug] = row.value.isoformat() if row.value else None
+def _attribute_filter(table: str, only: list[dict[str, Any]] | None) -> tuple[bool, str, dict[str, Any]]:
+    """Build the attribute restriction for a value table query.
 
-    # JSON values
-    json_result = db.execute(
-        text("""
-            SELECT a.slug, v.value
-            FROM values_json v
-            JOIN attributes a ON v.attribute_id = a.id
-            WHERE v.entity_id = :entity_id
-        """),
-        {"entity_id": entity_id}
-    )
-    for row in json_result:
-        values[row.slug] = row.value
+    Returns whether the table needs to be queried at all, the extra WHERE
+    condition and its parameters.
+    """
+    if only is None:
+        return True, "", {}
+    attribute_ids = [attr["id"] for attr in only if ATTRIBUTE_TYPE_TABLES.get(attr["type"]) == table]
+    return bool(attribute_ids), "AND v.attribute_id = ANY(:attribute_ids)", {"attribute_ids": attribute_ids}
 
-    # Relation values (single) - recursively fetch related entities
-    if depth < max_depth:
-        relation_result = db.execute(
-            text("""
-                SELECT a.slug, v.related_entity_id, e.name, e.slug as entity_slug,
-                       e.entity_type_id, et.name as entity_type_name
-                FROM values_relation v
-                JOIN attributes a ON v.attribute_id = a.id
-                JOIN entities e ON v.related_entity_id = e.id
-                JOIN entity_types et ON e.entity_type_id = et.id
-                WHERE v.entity_id = :entity_id
+
+async def fetch_scalar_values(
+    db: AsyncSession,
+    entity_ids: list[int],
+    only: list[dict[str, Any]] | None = None,
+) -> dict[int, dict[str, Any]]:
+    """Fetch the non-relation values for a set of entities, one query per value table.
+
+    When only is given, just those attributes are loaded and value tables none
+    of them live in are not queried.
+    """
+    values: dict[int, dict[str, Any]] = {entity_id: {} for entity_id in entity_ids}
+    if not entity_ids:
+        return values
+    count_entities(len(entity_ids))
+
+    attributes = await schema_cache.attributes_by_id(db)
+    for table in SCALAR_VALUE_TABLES:
+        needed, condition, params = _attribute_filter(table, only)
+        if not needed:
+            continue
+        result = await db.execute(
+            text(f"""
+                SELECT v.entity_id, v.attribute_id, v.value
+                FROM {table} v
+                WHERE v.entity_id = ANY(:entity_ids) {condition}
             """),
-            {"entity_id": entity_id}
+            {"entity_ids": entity_ids, **params}
         )
-        for row in relation_result:
-            # Recursively fetch the related entity's values
-            related_values = fetch_entity_values(db, row.related_entity_id, depth + 1, max_depth)
-            values[row.slug] = {
-                "id": row.related_entity_id,
-                "name": row.name,
-                "slug": row.entity_slug,
-                "entity_type_id": row.entity_type_id,
-                "entity_type_name": row.entity_type_name,
-                "values": related_values
-            }
+        for row in result:
+            attr = attributes.get(row.attribute_id) or await schema_cache.attribute(db, row.attribute_id)
+            values[row.entity_id][attr["slug"]] = _convert_scalar(table, row.value)
 
-        # Multi-relation values (many-to-many) - returns array of related entities
-        relation_multi_result = db.execute(
-            text("""
-                SELECT a.slug, v.related_entity_id, e.name, e.slug as entity_slug,
+    return values
+
+
+async def fetch_relations(
+    db: AsyncSession,
+    entity_ids: list[int],
+    only: list[dict[str, Any]] | None = None,
+) -> dict[int, list[tuple[str, bool, dict[str, Any]]]]:
+    """Fetch single and multi relations for a set of entities.
+
+    Returns, per entity, a list of (attribute slug, is_multi, related entity summary)
+    in the order the values should appear in the document. only restricts the
+    relation attributes loaded, as for fetch_scalar_values.
+    """
+    relations: dict[int, list[tuple[str, bool, dict[str, Any]]]] = {entity_id: [] for entity_id in entity_ids}
+    if not entity_ids:
+        return relations
+
+    attributes = await schema_cache.attributes_by_id(db)
+    for table, is_multi, order_by in (
+        ("values_relation", False, ""),
+        ("values_relation_multi", True, "ORDER BY v.entity_id, v.attribute_id, v.sort_order"),
+    ):
+        needed, condition, params = _attribute_filter(table, only)
+        if not needed:
+            continue
+        result = await db.execute(
+            text(f"""
+                SELECT v.entity_id, v.attribute_id, v.related_entity_id, e.name, e.slug as entity_slug,
                        e.entity_type_id, et.name as entity_type_name
-                FROM values_relation_multi v
-                JOIN attributes a ON v.attribute_id = a.id
+                FROM {table} v
                 JOIN entities e ON v.related_entity_id = e.id
                 JOIN entity_types et ON e.entity_type_id = et.id
-                WHERE v.entity_id = :entity_id
-                ORDER BY a.slug, v.sort_order
+                WHERE v.entity_id = ANY(:entity_ids) {condition}
+                {order_by}
             """),
-            {"entity_id": entity_id}
+            {"entity_ids": entity_ids, **params}
         )
-        for row in relation_multi_result:
-            related_values = fetch_entity_values(db, row.related_entity_id, depth + 1, max_depth)
-            related_entity = {
+        rows = [
+            ((attributes.get(row.attribute_id) or await schema_cache.attribute(db, row.attribute_id))["slug"], row)
+            for row in result
+        ]
+        if is_multi:
+            # Multi-relation arrays are grouped by attribute slug, keeping sort_order within each
+            rows.sort(key=lambda item: (item[1].entity_id, item[0]))
+        for slug, row in rows:
+            relations[row.entity_id].append((slug, is_multi, {
                 "id": row.related_entity_id,
                 "name": row.name,
                 "slug": row.entity_slug,
                 "entity_type_id": row.entity_type_id,
                 "entity_type_name": row.entity_type_name,
-                "values": related_values
-            }
-            # Append to array (multi-relation)
-            if row.slug not in values:
-                values[row.slug] = []
-            values[row.slug].append(related_entity)
+            }))
+
+    return relations
+
+
+class EntityCache:
+    """Request-scoped identity map of loaded entities.
+
+    Each entity's header row, values and relations are read from the database
+    at most once per request and re-used for every occurrence in a document
+    tree, including across cyclic relations.
+    """
+
+    def __init__(self) -> None:
+        self.entities: dict[int, dict[str, Any]] = {}
+        self.scalars: dict[int, dict[str, Any]] = {}
+        self.relations: dict[int, list[tuple[str, bool, dict[str, Any]]]] = {}
+        # Relations of an entity restricted to some attributes, keyed by (entity id, attribute ids)
+        self.selected_relations: dict[tuple[int, tuple[int, ...]], list[tuple[str, bool, dict[str, Any]]]] = {}
+
+    def invalidate(self, entity_id: int) -> None:
+        """Forget everything loaded for an entity, e.g. after writing its values."""
+        self.entities.pop(entity_id, None)
+        self.scalars.pop(entity_id, None)
+        self.relations.pop(entity_id, None)
+        for key in [key for key in self.selected_relations if key[0] == entity_id]:
+            del self.selected_relations[key]
+
+
+def get_entity_cache() -> EntityCache:
+    """Dependency that provides a fresh identity map for each request."""
+    return EntityCache()
+
+
+async def _walk_depth(
+    db: AsyncSession,
+    entity_ids: list[int],
+    max_depth: int,
+    cache: EntityCache,
+) -> set[int]:
+    """Return the ids of all entities embedded within max_depth relations of entity_ids.
+
+    Relations are loaded into the cache breadth-first, costing at most one
+    query per relation table per depth level.
+    """
+    visited: set[int] = set()
+    frontier = sorted(set(entity_ids))
+    depth = 0
+    while frontier:
+        visited.update(frontier)
+        if depth >= max_depth:
+            break
+        cache.relations.update(await fetch_relations(db, [i for i in frontier if i not in cache.relations]))
+        # Entities reached at a shallower depth already had their relations
+        # walked, so only newly discovered ids move on to the next level.
+        frontier = sorted({
+            related["id"]
+            for entity_id in frontier
+            for _, _, related in cache.relations[entity_id]
+        } - visited)
+        depth += 1
+    return visited
+
+
+async def _load_scalars(db: AsyncSession, entity_ids: set[int], cache: EntityCache) -> None:
+    """Load scalar values of all entities not yet in the cache, one query per value table."""
+    cache.scalars.update(await fetch_scalar_values(db, sorted(i for i in entity_ids if i not in cache.scalars)))
+
+
+async def fetch_entities_values(
+    db: AsyncSession,
+    entity_ids: list[int],
+    max_depth: int = 5,
+    cache: EntityCache | None = None,
+) -> dict[int, dict[str, Any]]:
+    """Fetch all values for a set of entities, loading relations breadth-first.
+
+    Every depth level costs at most one query per relation table regardless of
+    how many entities it contains, scalar values of the whole tree are loaded
+    at once, and entities already present in the cache are not queried again.
+    """
+    if cache is None:
+        cache = EntityCache()
+
+    await _load_scalars(db, await _walk_depth(db, entity_ids, max_depth, cache), cache)
+
+    # The same entity can appear at several depths with differently truncated
+    # subtrees, so documents are memoized per (entity, depth).
+    documents: dict[tuple[int, int], dict[str, Any]] = {}
+
+    def build(entity_id: int, depth: int) -> dict[str, Any]:
+        key = (entity_id, depth)
+        if key in documents:
+            return documents[key]
+
+        values = dict(cache.scalars.get(entity_id, {}))
+        if depth < max_depth:
+            for slug, is_multi, related in cache.relations.get(entity_id, []):
+                related_entity = {**related, "values": build(related["id"], depth + 1)}
+                if is_multi:
+                    values.setdefault(slug, []).append(related_entity)
+                else:
+                    values[slug] = related_entity
+
+        documents[key] = values
+        return values
+
+    return {entity_id: build(entity_id, 0) for entity_id in entity_ids}
+
+
+async def fetch_entity_values(
+    db: AsyncSession,
+    entity_id: int,
+    max_depth: int = 5,
+    cache: EntityCache | None = None,
+) -> dict[str, Any]:
+    """Fetch all values for an entity, including relations up to max_depth."""
+    return (await fetch_entities_values(db, [entity_id], max_depth, cache))[entity_id]
 
-    return values
+
+ExpandTree = dict[str, "ExpandTree"]
+
+
+def _parse_expand(expand: str | None) -> ExpandTree | None:
+    """Turn "dimensions.width,tags" into {"dimensions": {"width": {}}, "tags": {}}."""
+    if expand is None:
+        return None
+    tree: ExpandTree = {}
+    for path in expand.split(","):
+        node = tree
+        for slug in path.strip().split("."):
+            if slug:
+                node = node.setdefault(slug, {})
+    return tree
+
+
+async def _check_expand(db: AsyncSession, entity_type_id: int, expand: ExpandTree | None, prefix: str = "") -> None:
+    """Reject expand paths through attributes that are not relations of the entity type at that level.
+
+    Paths below a relation without a related entity type cannot be checked
+    and are accepted.
+    """
+    if not expand:
+        return
+    attributes = await schema_cache.attributes_for_type(db, entity_type_id)
+    for slug, subtree in expand.items():
+        attr = attributes.get(slug)
+        if attr is None:
+            raise HTTPException(status_code=400, detail=f"Unknown attribute: {prefix}{slug}")
+        if attr["type"] not in ("relation", "relation_multi"):
+            raise HTTPException(status_code=400, detail=f"Cannot expand {attr['type']} attribute {prefix}{slug}")
+        if attr["related_entity_type_id"] is not None:
+            await _check_expand(db, attr["related_entity_type_id"], subtree, f"{prefix}{slug}.")
+
+
+def _stub(related: dict[str, Any]) -> dict[str, Any]:
+    """Reference to a related entity that is not expanded."""
+    return {"id": related["id"], "name": related["name"], "slug": related["slug"]}
+
+
+async def _walk_expand(
+    db: AsyncSession,
+    entity_ids: list[int],
+    expand: ExpandTree,
+    cache: EntityCache,
+) -> set[int]:
+    """Return the ids of all entities embedded along the expand paths from entity_ids.
+
+    Relations are loaded into the cache one level of the expand tree at a time.
+    Relations of the last level are needed too, for their stubs.
+    """
+    embedded: set[int] = set()
+    # Each frontier entry pairs an entity with the expand subtree that applies to it
+    frontier = {(entity_id, id(expand)): (entity_id, expand) for entity_id in entity_ids}
+    while frontier:
+        ids = sorted({entity_id for entity_id, _ in frontier.values()})
+        embedded.update(ids)
+        cache.relations.update(await fetch_relations(db, [i for i in ids if i not in cache.relations]))
+        frontier = {
+            (related["id"], id(tree[slug])): (related["id"], tree[slug])
+            for entity_id, tree in frontier.values()
+            for slug, _, related in cache.relations[entity_id]
+            if slug in tree
+        }
+    return embedded
+
+
+async def fetch_expanded_values(
+    db: AsyncSession,
+    entity_ids: list[int],
+    expand: ExpandTree,
+    cache: EntityCache | None = None,
+) -> dict[int, dict[str, Any]]:
+    """Fetch values for a set of entities, expanding only the listed relation paths.
+
+    Relations named in expand are embedded with their values, recursively
+    following the nested paths; every other relation becomes an
+    {id, name, slug} stub. Each level of the expand tree costs at most one
+    query per value table.
+    """
+    if cache is None:
+        cache = EntityCache()
+
+    await _load_scalars(db, await _walk_expand(db, entity_ids, expand, cache), cache)
+
+    documents: dict[tuple[int, int], dict[str, Any]] = {}
+
+    def build(entity_id: int, tree: ExpandTree) -> dict[str, Any]:
+        key = (entity_id, id(tree))
+        if key in documents:
+            return documents[key]
+
+        values = dict(cache.scalars.get(entity_id, {}))
+        for slug, is_multi, related in cache.relations.get(entity_id, []):
+            if slug in tree:
+                related_entity = {**related, "values": build(related["id"], tree[slug])}
+            else:
+                related_entity = _stub(related)
+            if is_multi:
+                values.setdefault(slug, []).append(related_entity)
+            else:
+                values[slug] = related_entity
+
+        documents[key] = values
+        return values
+
+    return {entity_id: build(entity_id, expand) for entity_id in entity_ids}
+
+
+# Sort key columns for each list ordering. Every key ends with e.id so that
+# keyset comparisons are unambiguous.
+LIST_ORDERINGS = {
+    "name": ("e.name", "e.id"),
+    "id": ("e.id",),
+}
+
+
+async def _filter_conditions(
+    db: AsyncSession,
+    request: Request,
+    entity_type_id: int | None,
+    params: dict[str, Any],
+) -> list[str]:
+    """Compile the filter[...] query parameters of a request, adding their bind parameters to params."""
+    try:
+        filters = parse_filters(request.query_params.multi_items())
+        if not filters:
+            return []
+        if entity_type_id is None:
+            raise InvalidFilter("Attribute filters require entity_type_id")
+        attributes = await schema_cache.attributes_for_type(db, entity_type_id)
+        conditions, filter_params = compile_filters(filters, attributes)
+    except InvalidFilter as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    params.update(filter_params)
+    return conditions
+
+
+# Value tables an entity list can be sorted by, with their value column type
+SORTABLE_VALUE_TABLES = {
+    "values_number": "numeric",
+    "values_text": "text",
+    "values_datetime": "timestamp",
+    "values_boolean": "boolean",
+}
+
+# Text values are sorted by this many leading characters first, the prefix
+# indexed by migration 0025, then by the full value. Both compare with
+# COLLATE "C": under a linguistic collation the prefix order can disagree
+# with the full value order, and cursors would skip or repeat entities.
+TEXT_SORT_PREFIX = 500
+
+LIST_COLUMNS = """
+    e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name, e.version,
+    (SELECT version FROM schema_version) AS schema_version
+"""
+
+
+async def _list_by_attribute(
+    db: AsyncSession,
+    attr: dict[str, Any],
+    descending: bool,
+    conditions: list[str],
+    params: dict[str, Any],
+    key: list[Any] | None,
+) -> list[dict[str, Any]]:
+    """Fetch one page of entities ordered by an attribute value, nulls last.
+
+    Entities with a value are read first, straight from the value table in
+    (attribute_id, value, entity_id) index order; once they run out the page
+    is topped up with the entities without a value, by id. A cursor key of
+    [value, id] continues the first phase and [None, id] the second.
+
+    Text values are ordered by code point (COLLATE "C"), by their first
+    TEXT_SORT_PREFIX characters and then in full, so the prefix index
+    provides the order and only values sharing a prefix are sorted in memory.
+    """
+    table = ATTRIBUTE_TYPE_TABLES[attr["type"]]
+    direction = "DESC" if descending else "ASC"
+    comparison = "<" if descending else ">"
+    params = {**params, "sort_attribute_id": attr["id"]}
+    rows: list[dict[str, Any]] = []
+
+    key_value = f"CAST(:key_0 AS {SORTABLE_VALUE_TABLES[table]})"
+    sort_columns = ["s.value", "s.entity_id"]
+    key_columns = [key_value, ":key_1"]
+    if table == "values_text":
+        sort_columns = [f'left(s.value, {TEXT_SORT_PREFIX}) COLLATE "C"', 's.value COLLATE "C"', "s.entity_id"]
+        key_columns = [f'left({key_value}, {TEXT_SORT_PREFIX}) COLLATE "C"', f'{key_value} COLLATE "C"', ":key_1"]
+
+    if key is None or key[0] is not None:
+        valued = list(conditions)
+        if key is not None:
+            params["key_0"], params["key_1"] = key
+            valued.append(f"({', '.join(sort_columns)}) {comparison} ({', '.join(key_columns)})")
+        result = await db.execute(
+            text(f"""
+                SELECT {LIST_COLUMNS}, s.value AS sort_value
+                FROM {table} s
+                JOIN entities e ON e.id = s.entity_id
+                JOIN entity_types et ON e.entity_type_id = et.id
+                WHERE s.attribute_id = :sort_attribute_id AND s.value IS NOT NULL
+                {''.join(f" AND {condition}" for condition in valued)}
+                ORDER BY {', '.join(f"{column} {direction}" for column in sort_columns)}
+                LIMIT :limit
+            """),
+            params
+        )
+        rows = [dict(row._mapping) for row in result]
+        if len(rows) == params["limit"]:
+            return rows
+        key = None
+
+    missing = [
+        *conditions,
+        f"""NOT EXISTS (
+            SELECT 1 FROM {table} s
+            WHERE s.entity_id = e.id AND s.attribute_id = :sort_attribute_id AND s.value IS NOT NULL
+        )""",
+    ]
+    if key is not None:
+        params["key_1"] = key[1]
+        missing.append(f"e.id {comparison} :key_1")
+    result = await db.execute(
+        text(f"""
+            SELECT {LIST_COLUMNS}, NULL AS sort_value
+            FROM entities e
+            JOIN entity_types et ON e.entity_type_id = et.id
+            WHERE {' AND '.join(missing)}
+            ORDER BY e.id {direction}
+            LIMIT :limit
+        """),
+        {**params, "limit": params["limit"] - len(rows)}
+    )
+    return rows + [dict(row._mapping) for row in result]
 
 
 @router.get("", response_model=list[EntityResponse])
-def list_entities(
+async def list_entities(
+    request: Request,
+    response: Response,
     entity_type_id: int | None = Query(None, description="Filter by entity type"),
-    db: Session = Depends(get_db)
+    order: Literal["name", "-name", "id", "-id"] = Query("name", description="Sort order, prefix with - for descending"),
+    sort: str | None = Query(None, description="Attribute slug to sort by instead of order, prefix with - for descending"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of entities to return"),
+    cursor: str | None = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all entities, optionally filtered by entity type."""
-    if entity_type_id:
-        result = db.execute(
-            text("""
-                SELECT e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name
+    """List entities, optionally filtered by entity type, one keyset page at a time.
+
+    When more entities are available the cursor for the next page is returned
+    in the X-Next-Cursor header and as a Link header with rel="next".
+
+    Entities of one type can be filtered on attribute values with
+    filter[slug]=value or filter[slug][op]=value, where op is one of eq, ne,
+    lt, lte, gt, gte or in (comma separated values). Relation filters match
+    related entity ids. They can also be sorted by a number, text, datetime
+    or boolean attribute with sort=slug or sort=-slug; entities without a
+    value come last. Text sorts by code point, so uppercase letters come
+    before lowercase ones.
+    """
+    conditions = []
+    params: dict[str, Any] = {"limit": limit + 1}
+    if entity_type_id is not None:
+        conditions.append("e.entity_type_id = :entity_type_id")
+        params["entity_type_id"] = entity_type_id
+    conditions += await _filter_conditions(db, request, entity_type_id, params)
+
+    cursor_order = sort if sort is not None else order
+    key = None
+    if cursor:
+        try:
+            key = decode_cursor(cursor, cursor_order)
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    if sort is not None:
+        if entity_type_id is None:
+            raise HTTPException(status_code=400, detail="Sorting by attribute requires entity_type_id")
+        attributes = await schema_cache.attributes_for_type(db, entity_type_id)
+        attr = attributes.get(sort.removeprefix("-"))
+        if attr is None:
+            raise HTTPException(status_code=400, detail=f"Unknown attribute: {sort.removeprefix('-')}")
+        if ATTRIBUTE_TYPE_TABLES.get(attr["type"]) not in SORTABLE_VALUE_TABLES:
+            raise HTTPException(status_code=400, detail=f"Cannot sort by {attr['type']} attribute {attr['slug']}")
+        if key is not None and len(key) != 2:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested ordering")
+        rows = await _list_by_attribute(db, attr, sort.startswith("-"), conditions, params, key)
+        key_columns = ("sort_value", "e.id")
+    else:
+        descending = order.startswith("-")
+        key_columns = LIST_ORDERINGS[order.lstrip("-")]
+        if entity_type_id is None and order.lstrip("-") == "name":
+            # Keep entities grouped by type when listing everything
+            key_columns = ("e.entity_type_id", *key_columns)
+        if key is not None:
+            if len(key) != len(key_columns):
+                raise HTTPException(status_code=400, detail="Cursor does not match the requested ordering")
+            placeholders = []
+            for i, value in enumerate(key):
+                params[f"key_{i}"] = value
+                placeholders.append(f":key_{i}")
+            conditions.append(
+                f"({', '.join(key_columns)}) {'<' if descending else '>'} ({', '.join(placeholders)})"
+            )
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if descending else "ASC"
+        result = await db.execute(
+            text(f"""
+                SELECT {LIST_COLUMNS}
                 FROM entities e
                 JOIN entity_types et ON e.entity_type_id = et.id
-                WHERE e.entity_type_id = :entity_type_id
-                ORDER BY e.name
+                {where}
+                ORDER BY {', '.join(f"{column} {direction}" for column in key_columns)}
+                LIMIT :limit
             """),
-            {"entity_type_id": entity_type_id}
+            params
         )
-    else:
-        result = db.execute(
-            text("""
+        rows = [dict(row._mapping) for row in result]
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(cursor_order, [last[column.removeprefix("e.")] for column in key_columns])
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    etag = make_etag(
+        "entities",
+        request.url.query,
+        rows[0]["schema_version"] if rows else None,
+        [(row["id"], row["version"]) for row in rows],
+        response.headers.get("X-Next-Cursor"),
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, {name: response.headers[name] for name in ("X-Next-Cursor", "Link") if name in response.headers})
+    response.headers["ETag"] = etag
+    return rows
+
+
+@router.get("/facets")
+async def entity_facets(
+    request: Request,
+    entity_type_id: int = Query(..., description="Entity type to aggregate over"),
+    facets: str = Query(..., description="Comma separated attribute slugs, e.g. tags,color,price:buckets(0,25,50,100)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Count entities per relation target, boolean value or number bucket.
+
+    Accepts the same filter[...] parameters as the entity list. All facets
+    and the total are computed by one statement: the matching entity ids are
+    materialized once and every facet is a GROUP BY over its value table,
+    combined with UNION ALL.
+    """
+    params: dict[str, Any] = {"entity_type_id": entity_type_id}
+    conditions = ["e.entity_type_id = :entity_type_id"]
+    conditions += await _filter_conditions(db, request, entity_type_id, params)
+    attributes = await schema_cache.attributes_for_type(db, entity_type_id)
+    try:
+        requested = parse_facets(facets)
+        selects, facet_params = compile_facets(requested, attributes)
+    except InvalidFacet as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    result = await db.execute(
+        text(f"""
+            WITH matched AS MATERIALIZED (
+                SELECT e.id FROM entities e WHERE {' AND '.join(conditions)}
+            )
+            SELECT -1 AS facet, CAST(NULL AS integer) AS key, CAST(NULL AS text) AS name,
+                   CAST(NULL AS text) AS slug, count(*) AS count
+            FROM matched
+            {''.join(f"UNION ALL {select}" for select in selects)}
+        """),
+        {**params, **facet_params}
+    )
+    rows = result.fetchall()
+
+    return {
+        "total": next(row.count for row in rows if row.facet == -1),
+        "facets": collect_facets(requested, attributes, [row for row in rows if row.facet != -1]),
+    }
+
+
+@router.get("/search", response_model=list[EntitySearchResult])
+async def search_entities(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, description="Search terms; supports quoted phrases, OR and -exclusions"),
+    entity_type_id: int | None = Query(None, description="Filter by entity type"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of entities to return"),
+    cursor: str | None = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Search entity names and text attributes, best matches first.
+
+    Matches are ranked by ts_rank_cd over the maintained search vector, in
+    which entity names weigh more than text attributes and text attributes
+    more than textareas. Pages follow the same cursor protocol as the list.
+    """
+    conditions = ["e.search_vector @@ q.query"]
+    params: dict[str, Any] = {"q": q, "limit": limit + 1}
+    if entity_type_id is not None:
+        conditions.append("e.entity_type_id = :entity_type_id")
+        params["entity_type_id"] = entity_type_id
+
+    keyset = ""
+    if cursor:
+        try:
+            key = decode_cursor(cursor, "search")
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        if len(key) != 2:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested ordering")
+        params["key_rank"], params["key_id"] = key
+        # ts_rank_cd returns real; compared as a double the cursor's rank would never equal it
+        keyset = (
+            "WHERE rank < CAST(:key_rank AS real) OR (rank = CAST(:key_rank AS real) AND id > :key_id)"
+        )
+
+    result = await db.execute(
+        text(f"""
+            SELECT * FROM (
+                SELECT e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name,
+                       ts_rank_cd(e.search_vector, q.query) AS rank
+                FROM entities e
+                JOIN entity_types et ON e.entity_type_id = et.id
+                CROSS JOIN {search_query(":q")} AS q(query)
+                WHERE {' AND '.join(conditions)}
+            ) matches
+            {keyset}
+            ORDER BY rank DESC, id
+            LIMIT :limit
+        """),
+        params
+    )
+    rows = [dict(row._mapping) for row in result]
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor("search", [rows[-1]["rank"], rows[-1]["id"]])
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    return rows
+
+
+async def _export_entities(entity_type_id: int | None, expand: bool, batch_size: int) -> AsyncIterator[bytes]:
+    """Yield NDJSON lines for entities, pivoting their values one batch at a time.
+
+    Uses its own session so the server-side cursor stays open for as long as
+    the response is being streamed.
+    """
+    where = "WHERE e.entity_type_id = :entity_type_id" if entity_type_id is not None else ""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            text(f"""
                 SELECT e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name
                 FROM entities e
                 JOIN entity_types et ON e.entity_type_id = et.id
-                ORDER BY et.name, e.name
-            """)
+                {where}
+                ORDER BY e.id
+            """).execution_options(yield_per=batch_size),
+            {"entity_type_id": entity_type_id}
         )
+        async for partition in result.partitions(batch_size):
+            entities = [dict(row._mapping) for row in partition]
+            entity_ids = [entity["id"] for entity in entities]
+
+            if expand:
+                # Related entities are embedded with their own values, one level deep
+                values = await fetch_entities_values(db, entity_ids, max_depth=1)
+            else:
+                values = await fetch_scalar_values(db, entity_ids)
+                for entity_id, relations in (await fetch_relations(db, entity_ids)).items():
+                    for slug, is_multi, related in relations:
+                        if is_multi:
+                            values[entity_id].setdefault(slug, []).append(related["id"])
+                        else:
+                            values[entity_id][slug] = related["id"]
+
+            lines = [
+                json.dumps({**entity, "values": values[entity["id"]]}, default=str)
+                for entity in entities
+            ]
+            yield ("\n".join(lines) + "\n").encode()
+
+
+@router.get("/export")
+async def export_entities(
+    entity_type_id: int | None = Query(None, description="Only export entities of this type"),
+    expand: bool = Query(False, description="Embed related entities with their values instead of ids"),
+):
+    """Stream entities with all their values as NDJSON, one entity per line.
+
+    Relations are exported as entity ids unless expand is set.
+    """
+    return StreamingResponse(
+        _export_entities(entity_type_id, expand, EXPORT_BATCH_SIZE),
+        media_type="application/x-ndjson",
+    )
+
 
-    return [dict(row._mapping) for row in result]
+def _write_response_expand(depth: int | None, expand: str | None) -> ExpandTree | None:
+    """Write responses stay shallow unless the client asks for a depth or paths."""
+    if expand is None and depth is None:
+        return {}
+    return _parse_expand(expand)
 
 
 @router.post("", response_model=EntityDetailResponse, status_code=201)
-def create_entity(
+async def create_entity(
     request: CreateEntityRequest,
-    db: Session = Depends(get_db)
+    depth: int | None = Query(None, description="Expand all relations of the response to this depth"),
+    expand: str | None = Query(None, description="Relation paths to expand in the response; relations are stubs by default"),
+    db: AsyncSession = Depends(get_db),
+    cache: EntityCache = Depends(get_entity_cache)
 ):
     """Create a new entity with optional initial values."""
     # Verify entity type exists
-    type_result = db.execute(
+    type_result = await db.execute(
         text("SELECT id, name FROM entity_types WHERE id = :id"),
         {"id": request.entity_type_id}
     )
     entity_type = type_result.fetchone()
     if not entity_type:
         raise HTTPException(status_code=400, detail="Invalid entity type")
+    response_expand = _write_response_expand(depth, expand)
+    await _check_expand(db, request.entity_type_id, response_expand)
 
     # Create the entity
-    result = db.execute(
-        text("""
-            INSERT INTO entities (entity_type_id, name, slug)
-            VALUES (:entity_type_id, :name, :slug)
+    result = await db.execute(
+        text(f"""
+            INSERT INTO entities (entity_type_id, name, slug, search_vector)
+            VALUES (:entity_type_id, :name, :slug, {name_vector("CAST(:name AS varchar)")})
             RETURNING id
         """),
         {
@@ -224,84 +836,290 @@ def create_entity(
 
     # Set initial values if provided
     if request.values:
-        # Get attributes for this entity type
-        attributes_result = db.execute(
-            text("""
-                SELECT id, slug, type::text as type
-                FROM attributes
-                WHERE entity_type_id = :entity_type_id
-            """),
-            {"entity_type_id": request.entity_type_id}
-        )
-        attributes = {row.slug: {"id": row.id, "type": row.type} for row in attributes_result}
-
-        for slug, value in request.values.items():
-            if slug not in attributes:
-                continue  # Skip unknown attributes
-
-            attr = attributes[slug]
-            attr_id = attr["id"]
-            attr_type = attr["type"]
-
-            if attr_type in ("text", "textarea", "hex"):
-                _upsert_value(db, "values_text", entity_id, attr_id, value)
-            elif attr_type == "number":
-                _upsert_value(db, "values_number", entity_id, attr_id, value)
-            elif attr_type == "boolean":
-                _upsert_value(db, "values_boolean", entity_id, attr_id, value)
-            elif attr_type == "datetime":
-                _upsert_value(db, "values_datetime", entity_id, attr_id, value)
-            elif attr_type == "json":
-                _upsert_json_value(db, entity_id, attr_id, value)
-            elif attr_type == "relation":
-                _upsert_relation(db, entity_id, attr_id, value)
-            elif attr_type == "relation_multi":
-                _upsert_relation_multi(db, entity_id, attr_id, value)
-
-    db.commit()
-    return get_entity(entity_id, depth=5, db=db)
+        attributes = await schema_cache.attributes_for_type(db, request.entity_type_id)
+
+        # Unknown attributes are skipped
+        await _write_values(db, [
+            (entity_id, attributes[slug], value)
+            for slug, value in request.values.items()
+            if slug in attributes
+        ])
+
+    await db.commit()
+    cache.invalidate(entity_id)
+    document_cache.invalidate([entity_id])
+    return await _load_entity(db, entity_id, depth or 0, cache, expand=response_expand)
+
+
+@router.post("/bulk")
+async def bulk_create_entities(request: Request, db: AsyncSession = Depends(get_db)):
+    """Create many entities with their values in a single transaction.
+
+    Accepts a JSON array, or NDJSON when sent as application/x-ndjson. Each row
+    has the same fields as POST /entities plus an optional ref; relation values
+    may point at existing entities by id or at other rows by {"ref": ...}.
+    Returns per-row errors, the created ids in input order and throughput.
+    """
+    try:
+        rows = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except BulkImportError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return await import_entities(db, rows)
+
+
+async def _field_attributes(db: AsyncSession, entity: dict[str, Any], fields: list[str]) -> list[dict[str, Any]]:
+    """Resolve selected attribute slugs of an entity's type, rejecting unknown ones."""
+    attributes = await schema_cache.attributes_for_type(db, entity["entity_type_id"])
+    for slug in fields:
+        if slug not in attributes:
+            raise HTTPException(status_code=400, detail=f"Unknown attribute: {slug}")
+    return [attributes[slug] for slug in fields]
 
 
-@router.get("/{entity_id}", response_model=EntityDetailResponse)
-def get_entity(
+async def _selected_relations(
+    db: AsyncSession,
     entity_id: int,
-    depth: int = Query(5, description="Max depth for recursive relation loading"),
-    db: Session = Depends(get_db)
-):
-    """Get an entity with all its attribute values, including nested relations."""
-    result = db.execute(
+    only: list[dict[str, Any]],
+    cache: EntityCache,
+) -> list[tuple[str, bool, dict[str, Any]]]:
+    """Relations of an entity through the selected attributes, loaded once per request."""
+    key = (entity_id, tuple(attr["id"] for attr in only))
+    if key not in cache.selected_relations:
+        cache.selected_relations[key] = (await fetch_relations(db, [entity_id], only))[entity_id]
+    return cache.selected_relations[key]
+
+
+async def fetch_entity_fields(
+    db: AsyncSession,
+    entity: dict[str, Any],
+    fields: list[str],
+    max_depth: int = 5,
+    cache: EntityCache | None = None,
+    expand: ExpandTree | None = None,
+) -> dict[str, Any]:
+    """Fetch only the listed attributes of an entity.
+
+    Related entities reached through the selected relations are loaded in
+    full up to max_depth or, when expand is given, along its paths only.
+    """
+    if cache is None:
+        cache = EntityCache()
+
+    only = await _field_attributes(db, entity, fields)
+    values = (await fetch_scalar_values(db, [entity["id"]], only))[entity["id"]]
+    if expand is not None or max_depth > 0:
+        relations = await _selected_relations(db, entity["id"], only, cache)
+        if expand is None:
+            related_values = await fetch_entities_values(
+                db, [related["id"] for _, _, related in relations], max_depth - 1, cache
+            )
+        else:
+            related_values = {}
+            for slug, subtree in expand.items():
+                related_values[slug] = await fetch_expanded_values(
+                    db, [related["id"] for rel_slug, _, related in relations if rel_slug == slug], subtree, cache
+                )
+        for slug, is_multi, related in relations:
+            if expand is None:
+                related_entity = {**related, "values": related_values[related["id"]]}
+            elif slug in expand:
+                related_entity = {**related, "values": related_values[slug][related["id"]]}
+            else:
+                related_entity = _stub(related)
+            if is_multi:
+                values.setdefault(slug, []).append(related_entity)
+            else:
+                values[slug] = related_entity
+
+    return values
+
+
+def _parse_fields(fields: str | None) -> list[str] | None:
+    """Split a comma separated fields parameter into attribute slugs."""
+    if fields is None:
+        return None
+    return [slug.strip() for slug in fields.split(",") if slug.strip()]
+
+
+async def _entity_header(db: AsyncSession, entity_id: int, cache: EntityCache) -> dict[str, Any]:
+    """Return an entity's own columns, from the identity map when already loaded."""
+    entity = cache.entities.get(entity_id)
+    if entity is None:
+        result = await db.execute(
+            text("""
+                SELECT e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name
+                FROM entities e
+                JOIN entity_types et ON e.entity_type_id = et.id
+                WHERE e.id = :id
+            """),
+            {"id": entity_id}
+        )
+        row = result.fetchone()
+
+        if not row:
+            raise HTTPException(status_code=404, detail="Entity not found")
+        entity = cache.entities[entity_id] = dict(row._mapping)
+    return entity
+
+
+async def _entity_etag(
+    db: AsyncSession,
+    entity: dict[str, Any],
+    depth: int,
+    cache: EntityCache,
+    fields: list[str] | None = None,
+    expand: ExpandTree | None = None,
+) -> tuple[str, set[int]]:
+    """Compute the ETag of an entity document without loading any values.
+
+    The relations the document would embed are walked with the same rules as
+    the loaders, and the tag covers the version of every embedded entity plus
+    the schema version. Walked relations stay in the identity map, so loading
+    the document afterwards only has to fetch scalar values. Returns the tag
+    and the ids of the embedded entities.
+    """
+    root = entity["id"]
+    if fields is None:
+        if expand is not None:
+            embedded = await _walk_expand(db, [root], expand, cache)
+        else:
+            embedded = await _walk_depth(db, [root], depth, cache)
+    else:
+        embedded = {root}
+        only = await _field_attributes(db, entity, fields)
+        if expand is not None or depth > 0:
+            relations = await _selected_relations(db, root, only, cache)
+            if expand is None:
+                embedded |= await _walk_depth(db, [related["id"] for _, _, related in relations], depth - 1, cache)
+            else:
+                for slug, subtree in expand.items():
+                    embedded |= await _walk_expand(
+                        db, [related["id"] for rel_slug, _, related in relations if rel_slug == slug], subtree, cache
+                    )
+
+    result = await db.execute(
         text("""
-            SELECT e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name
-            FROM entities e
-            JOIN entity_types et ON e.entity_type_id = et.id
-            WHERE e.id = :id
+            SELECT id, version, (SELECT version FROM schema_version) AS schema_version
+            FROM entities
+            WHERE id = ANY(:ids)
+            ORDER BY id
         """),
-        {"id": entity_id}
+        {"ids": sorted(embedded)}
     )
-    entity = result.fetchone()
+    rows = result.fetchall()
+    etag = make_etag(
+        "entity",
+        rows[0].schema_version if rows else None,
+        [(row.id, row.version) for row in rows],
+        None if expand is not None else depth,
+        fields,
+        expand,
+    )
+    return etag, embedded
 
-    if not entity:
-        raise HTTPException(status_code=404, detail="Entity not found")
 
-    values = fetch_entity_values(db, entity_id, depth=0, max_depth=depth)
+async def _conditional_entity(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    entity_id: int,
+    depth: int,
+    cache: EntityCache,
+    fields: list[str] | None,
+    expand: ExpandTree | None,
+) -> dict[str, Any] | Response:
+    """Serve an entity document, answering 304 when If-None-Match still matches.
+
+    Documents are served from the process-wide document cache when possible;
+    a cache hit needs no database round trip beyond the schema version check.
+    """
+    key = (
+        entity_id,
+        None if expand is not None else depth,
+        tuple(fields) if fields is not None else None,
+        json.dumps(expand, sort_keys=True) if expand is not None else None,
+    )
+    schema_version = await schema_cache.current_version(db)
+    cached = document_cache.get(key, schema_version)
+    if cached is not None:
+        if etag_matches(request, cached.etag):
+            return not_modified(cached.etag)
+        response.headers["ETag"] = cached.etag
+        return cached.document
+
+    generation = document_cache.generation
+    entity = await _entity_header(db, entity_id, cache)
+    await _check_expand(db, entity["entity_type_id"], expand)
+    etag, embedded = await _entity_etag(db, entity, depth, cache, fields, expand)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    document = await _load_entity(db, entity_id, depth, cache, fields, expand)
+    document_cache.put(key, schema_version, etag, document, embedded, generation)
+    return document
+
+
+async def _load_entity(
+    db: AsyncSession,
+    entity_id: int,
+    depth: int,
+    cache: EntityCache,
+    fields: list[str] | None = None,
+    expand: ExpandTree | None = None,
+) -> dict[str, Any]:
+    """Load an entity document, optionally restricted to some attributes.
+
+    When expand is given it replaces depth: only the listed relation paths
+    are embedded and other relations are returned as stubs.
+    """
+    entity = await _entity_header(db, entity_id, cache)
+    if fields is not None:
+        values = await fetch_entity_fields(db, entity, fields, max_depth=depth, cache=cache, expand=expand)
+    elif expand is not None:
+        values = (await fetch_expanded_values(db, [entity_id], expand, cache))[entity_id]
+    else:
+        values = await fetch_entity_values(db, entity_id, max_depth=depth, cache=cache)
 
     return {
-        **dict(entity._mapping),
+        **entity,
         "values": values
     }
 
 
+@router.get("/{entity_id}", response_model=EntityDetailResponse)
+async def get_entity(
+    entity_id: int,
+    request: Request,
+    response: Response,
+    depth: int = Query(5, description="Max depth for recursive relation loading"),
+    fields: str | None = Query(None, description="Comma separated attribute slugs to load, e.g. price,color"),
+    expand: str | None = Query(None, description="Relation paths to expand instead of depth, e.g. dimensions.width,tags"),
+    db: AsyncSession = Depends(get_db),
+    cache: EntityCache = Depends(get_entity_cache)
+):
+    """Get an entity with all its attribute values, including nested relations."""
+    return await _conditional_entity(
+        request, response, db, entity_id, depth, cache, _parse_fields(fields), _parse_expand(expand)
+    )
+
+
 @router.get("/by-slug/{entity_type_name}/{slug}", response_model=EntityDetailResponse)
-def get_entity_by_slug(
+async def get_entity_by_slug(
     entity_type_name: str,
     slug: str,
+    request: Request,
+    response: Response,
     depth: int = Query(5, description="Max depth for recursive relation loading"),
-    db: Session = Depends(get_db)
+    fields: str | None = Query(None, description="Comma separated attribute slugs to load, e.g. price,color"),
+    expand: str | None = Query(None, description="Relation paths to expand instead of depth, e.g. dimensions.width,tags"),
+    db: AsyncSession = Depends(get_db),
+    cache: EntityCache = Depends(get_entity_cache)
 ):
     """Get an entity by its type and slug."""
-    result = db.execute(
+    result = await db.execute(
         text("""
-            SELECT e.id
+            SELECT e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name
             FROM entities e
             JOIN entity_types et ON e.entity_type_id = et.id
             WHERE et.name = :entity_type_name AND e.slug = :slug
@@ -313,18 +1131,200 @@ def get_entity_by_slug(
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
 
-    return get_entity(entity.id, depth, db)
+    cache.entities[entity.id] = dict(entity._mapping)
+    return await _conditional_entity(
+        request, response, db, entity.id, depth, cache, _parse_fields(fields), _parse_expand(expand)
+    )
+
+
+@router.get("/{entity_id}/referenced-by")
+async def get_entity_referrers(
+    entity_id: int,
+    request: Request,
+    response: Response,
+    attribute_id: int | None = Query(None, description="Only referrers through this relation attribute"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of referrers to return"),
+    cursor: str | None = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """List the entities whose relations point at an entity, grouped by attribute.
+
+    Each group carries the total number of referrers through that attribute.
+    Referrers are paged in (attribute_id, entity_id) order, which the
+    (related_entity_id, attribute_id, entity_id) indexes on both relation
+    tables serve directly.
+    """
+    await _entity_header(db, entity_id, EntityCache())
+
+    params: dict[str, Any] = {"id": entity_id, "limit": limit + 1}
+    conditions = ["v.related_entity_id = :id"]
+    if attribute_id is not None:
+        conditions.append("v.attribute_id = :attribute_id")
+        params["attribute_id"] = attribute_id
+    counts_where = " AND ".join(conditions)
+    if cursor:
+        try:
+            key = decode_cursor(cursor, "referenced-by")
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        if len(key) != 2:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested ordering")
+        params["key_0"], params["key_1"] = key
+        conditions.append("(v.attribute_id, v.entity_id) > (:key_0, :key_1)")
+    where = " AND ".join(conditions)
+
+    result = await db.execute(
+        text(f"""
+            SELECT r.attribute_id, e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name
+            FROM (
+                (SELECT v.attribute_id, v.entity_id FROM values_relation v WHERE {where})
+                UNION ALL
+                (SELECT v.attribute_id, v.entity_id FROM values_relation_multi v WHERE {where})
+                ORDER BY attribute_id, entity_id
+                LIMIT :limit
+            ) r
+            JOIN entities e ON e.id = r.entity_id
+            JOIN entity_types et ON e.entity_type_id = et.id
+            ORDER BY r.attribute_id, r.entity_id
+        """),
+        params
+    )
+    rows = result.fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor("referenced-by", [rows[-1].attribute_id, rows[-1].id])
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    counts_result = await db.execute(
+        text(f"""
+            SELECT attribute_id, sum(count) AS count FROM (
+                SELECT v.attribute_id, count(*) AS count FROM values_relation v WHERE {counts_where} GROUP BY 1
+                UNION ALL
+                SELECT v.attribute_id, count(*) AS count FROM values_relation_multi v WHERE {counts_where} GROUP BY 1
+            ) counts
+            GROUP BY attribute_id
+        """),
+        params
+    )
+    counts = {row.attribute_id: int(row.count) for row in counts_result}
+
+    attributes = await schema_cache.attributes_by_id(db)
+    groups: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        group = groups.get(row.attribute_id)
+        if group is None:
+            attr = attributes.get(row.attribute_id) or await schema_cache.attribute(db, row.attribute_id)
+            group = groups[row.attribute_id] = {
+                "attribute_id": row.attribute_id,
+                "slug": attr["slug"],
+                "entity_type_id": attr["entity_type_id"],
+                "count": counts.get(row.attribute_id, 0),
+                "referrers": [],
+            }
+        group["referrers"].append({
+            "id": row.id,
+            "name": row.name,
+            "slug": row.slug,
+            "entity_type_id": row.entity_type_id,
+            "entity_type_name": row.entity_type_name,
+        })
+
+    return {"entity_id": entity_id, "total": sum(counts.values()), "attributes": list(groups.values())}
+
+
+@router.patch("/values")
+async def update_entities_values(
+    updates: list[EntityValuesUpdate],
+    chunk_size: int | None = Query(None, ge=1, description="Commit every chunk_size entities instead of all at once"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Update values of many entities at once and return a status per entity.
+
+    Attribute metadata is resolved once per entity type and every value table
+    is written with multi-row statements. Updates for unknown entities,
+    unknown attributes, mistyped values or missing related entities are
+    reported and skipped; the rest are written in a single transaction, or
+    one transaction per chunk_size entities when given.
+    """
+    entity_ids = sorted({update.entity_id for update in updates})
+    entity_types = {
+        row.id: row.entity_type_id for row in await db.execute(
+            text("SELECT id, entity_type_id FROM entities WHERE id = ANY(:ids)"), {"ids": entity_ids}
+        )
+    } if entity_ids else {}
+    schemas = {
+        type_id: await schema_cache.attributes_for_type(db, type_id) for type_id in set(entity_types.values())
+    }
+
+    results: list[dict[str, Any]] = []
+    writes: dict[int, list[tuple[int, dict[str, Any], Any]]] = {}
+    targets: dict[int, set[int]] = {}
+    for update in updates:
+        result: dict[str, Any] = {"entity_id": update.entity_id}
+        results.append(result)
+        if update.entity_id not in entity_types:
+            result.update(status="not_found")
+            continue
+        attributes = schemas[entity_types[update.entity_id]]
+        triples = []
+        for slug, value in update.values.items():
+            attr = attributes.get(slug)
+            problem = f"Unknown attribute: {slug}" if attr is None else check_value(attr["type"], value)
+            if problem is None and attr["type"] in ("relation", "relation_multi") and value is not None:
+                items = value if attr["type"] == "relation_multi" else [value]
+                related = [relation_target(item) for item in items]
+                if any(kind != "id" for kind, _ in related):
+                    problem = "expected an entity id or {\"id\": ...}"
+                targets.setdefault(len(results) - 1, set()).update(target for _, target in related)
+            if problem is not None:
+                result.update(status="invalid", error=f"{slug}: {problem}" if attr is not None else problem)
+                break
+            triples.append((update.entity_id, attr, value))
+        else:
+            writes[len(results) - 1] = triples
+
+    referenced = set().union(*targets.values())
+    existing = {
+        row.id for row in await db.execute(
+            text("SELECT id FROM entities WHERE id = ANY(:ids)"), {"ids": sorted(referenced)}
+        )
+    } if referenced else set()
+    for index, index_targets in targets.items():
+        missing = index_targets - existing
+        if missing and index in writes:
+            del writes[index]
+            results[index].update(status="invalid", error=f"related entity {min(missing)} does not exist")
+
+    pending = sorted(writes)
+    chunk = chunk_size or max(len(pending), 1)
+    for start in range(0, len(pending), chunk):
+        indexes = pending[start:start + chunk]
+        await _write_values(db, [triple for index in indexes for triple in writes[index]])
+        await db.commit()
+        document_cache.invalidate({results[index]["entity_id"] for index in indexes})
+        for index in indexes:
+            results[index].update(status="updated", values=len(writes[index]))
+
+    return {
+        "updated": sum(result["status"] == "updated" for result in results),
+        "failed": sum(result["status"] != "updated" for result in results),
+        "results": results,
+    }
 
 
 @router.patch("/{entity_id}/values", response_model=EntityDetailResponse)
-def update_entity_values(
+async def update_entity_values(
     entity_id: int,
     request: UpdateEntityValuesRequest,
-    db: Session = Depends(get_db)
+    depth: int | None = Query(None, description="Expand all relations of the response to this depth"),
+    expand: str | None = Query(None, description="Relation paths to expand in the response; relations are stubs by default"),
+    db: AsyncSession = Depends(get_db),
+    cache: EntityCache = Depends(get_entity_cache)
 ):
     """Update values for an entity. Only updates provided attributes."""
     # Verify entity exists
-    entity_result = db.execute(
+    entity_result = await db.execute(
         text("SELECT id, entity_type_id FROM entities WHERE id = :id"),
         {"id": entity_id}
     )
@@ -332,179 +1332,253 @@ def update_entity_values(
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
 
-    # Get attributes for this entity type
-    attributes_result = db.execute(
-        text("""
-            SELECT id, slug, type::text as type
-            FROM attributes
-            WHERE entity_type_id = :entity_type_id
-        """),
-        {"entity_type_id": entity.entity_type_id}
-    )
-    attributes = {row.slug: {"id": row.id, "type": row.type} for row in attributes_result}
+    attributes = await schema_cache.attributes_for_type(db, entity.entity_type_id)
 
-    # Update each provided value
-    for slug, value in request.values.items():
+    for slug in request.values:
         if slug not in attributes:
             raise HTTPException(
                 status_code=400,
                 detail=f"Unknown attribute: {slug}"
             )
+    response_expand = _write_response_expand(depth, expand)
+    await _check_expand(db, entity.entity_type_id, response_expand)
 
-        attr = attributes[slug]
-        attr_id = attr["id"]
-        attr_type = attr["type"]
-
-        # Determine table and update/insert value
-        if attr_type in ("text", "textarea", "hex"):
-            _upsert_value(db, "values_text", entity_id, attr_id, value)
-        elif attr_type == "number":
-            _upsert_value(db, "values_number", entity_id, attr_id, value)
-        elif attr_type == "boolean":
-            _upsert_value(db, "values_boolean", entity_id, attr_id, value)
-        elif attr_type == "datetime":
-            _upsert_value(db, "values_datetime", entity_id, attr_id, value)
-        elif attr_type == "json":
-            _upsert_json_value(db, entity_id, attr_id, value)
-        elif attr_type == "relation":
-            _upsert_relation(db, entity_id, attr_id, value)
-        elif attr_type == "relation_multi":
-            _upsert_relation_multi(db, entity_id, attr_id, value)
-
-    db.commit()
-    return get_entity(entity_id, depth=5, db=db)
+    await _write_values(db, [
+        (entity_id, attributes[slug], value)
+        for slug, value in request.values.items()
+    ])
+
+    await db.commit()
+    cache.invalidate(entity_id)
+    document_cache.invalidate([entity_id])
+    return await _load_entity(db, entity_id, depth or 0, cache, expand=response_expand)
 
 
 @router.delete("/{entity_id}", status_code=204)
-def delete_entity(entity_id: int, db: Session = Depends(get_db)):
+async def delete_entity(entity_id: int, db: AsyncSession = Depends(get_db)):
     """Delete an entity and all its values."""
-    # Check if entity exists
-    entity_result = db.execute(
-        text("SELECT id FROM entities WHERE id = :id"),
-        {"id": entity_id}
-    )
-    if not entity_result.fetchone():
+    summary = await _delete_entities(db, [entity_id])
+    if not summary["deleted"]:
         raise HTTPException(status_code=404, detail="Entity not found")
+    return None
 
-    # Delete all values (cascade through value tables)
-    db.execute(text("DELETE FROM values_text WHERE entity_id = :id"), {"id": entity_id})
-    db.execute(text("DELETE FROM values_number WHERE entity_id = :id"), {"id": entity_id})
-    db.execute(text("DELETE FROM values_boolean WHERE entity_id = :id"), {"id": entity_id})
-    db.execute(text("DELETE FROM values_datetime WHERE entity_id = :id"), {"id": entity_id})
-    db.execute(text("DELETE FROM values_json WHERE entity_id = :id"), {"id": entity_id})
-    db.execute(text("DELETE FROM values_relation WHERE entity_id = :id"), {"id": entity_id})
-    db.execute(text("DELETE FROM values_relation_multi WHERE entity_id = :id"), {"id": entity_id})
 
-    # Also delete relations pointing TO this entity
-    db.execute(text("DELETE FROM values_relation WHERE related_entity_id = :id"), {"id": entity_id})
-    db.execute(text("DELETE FROM values_relation_multi WHERE related_entity_id = :id"), {"id": entity_id})
+DELETE_BATCH_SIZE = int(os.getenv("ENTITY_DELETE_BATCH_SIZE", "1000"))
+
+# Counts what the ON DELETE CASCADE of one batch will remove, marks the
+# entities whose relations point into the batch as changed and deletes the
+# batch, all in one statement working on the same snapshot. The ids of those
+# referrers are returned too, as documents embedding them change with the
+# deletion.
+DELETE_BATCH_SQL = f"""
+    WITH removed_values AS (
+        SELECT {", ".join(
+            f"(SELECT count(*) FROM {table} WHERE entity_id = ANY(:ids)) AS {table}"
+            for table in (*SCALAR_VALUE_TABLES, "values_relation", "values_relation_multi")
+        )},
+        (SELECT count(*) FROM values_relation WHERE related_entity_id = ANY(:ids) AND entity_id <> ALL(:ids))
+        + (SELECT count(*) FROM values_relation_multi WHERE related_entity_id = ANY(:ids) AND entity_id <> ALL(:ids))
+            AS incoming_relations
+    ), referrers AS (
+        UPDATE entities SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (
+            SELECT entity_id FROM values_relation WHERE related_entity_id = ANY(:ids)
+            UNION
+            SELECT entity_id FROM values_relation_multi WHERE related_entity_id = ANY(:ids)
+        ) AND id <> ALL(:ids)
+        RETURNING id
+    ), deleted AS (
+        DELETE FROM entities WHERE id = ANY(:ids) RETURNING id
+    )
+    SELECT removed_values.*, (SELECT count(*) FROM deleted) AS entities,
+           ARRAY(SELECT id FROM referrers) AS referrers
+    FROM removed_values
+"""
+
+
+async def _delete_entities(
+    db: AsyncSession,
+    entity_ids: list[int],
+    batch_size: int | None = None,
+    atomic: bool = True,
+) -> dict[str, Any]:
+    """Delete entities by id in batches, letting ON DELETE CASCADE remove their values.
+
+    All batches run in one transaction unless atomic is false, in which case
+    each batch is committed on its own so row locks are released as the
+    delete progresses. Returns how many entities, values and relations went.
+    """
+    batch_size = batch_size or DELETE_BATCH_SIZE
+    ids = sorted(set(entity_ids))
+    summary = {"deleted": 0, "values": 0, "relations": 0, "incoming_relations": 0, "batches": 0}
+    changed = set(ids)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        row = (await db.execute(text(DELETE_BATCH_SQL), {"ids": batch})).one()
+        changed.update(row.referrers)
+        summary["deleted"] += row.entities
+        summary["values"] += sum(getattr(row, table) for table in SCALAR_VALUE_TABLES)
+        summary["relations"] += row.values_relation + row.values_relation_multi
+        summary["incoming_relations"] += row.incoming_relations
+        summary["batches"] += 1
+        if not atomic:
+            await db.commit()
+            document_cache.invalidate([*batch, *row.referrers])
+    await db.commit()
+    document_cache.invalidate(changed)
+    return summary
+
+
+class DeleteEntitiesRequest(BaseModel):
+    ids: list[int]
+
+
+@router.delete("")
+async def delete_entities(
+    request: Request,
+    body: DeleteEntitiesRequest | None = None,
+    entity_type_id: int | None = Query(None, description="Delete entities of this type, narrowed by filter[...] parameters"),
+    atomic: bool = Query(True, description="Run all batches in one transaction; false commits each batch"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete many entities at once, by id list, by type and attribute filters, or both.
+
+    Selected entities are deleted in batches of ENTITY_DELETE_BATCH_SIZE with
+    one set-based statement each. Returns the number of entities, values,
+    outgoing relations and incoming relations removed.
+    """
+    if body is None and entity_type_id is None:
+        raise HTTPException(status_code=400, detail="Pass a body with ids or an entity_type_id")
+
+    conditions = []
+    params: dict[str, Any] = {}
+    if body is not None:
+        conditions.append("e.id = ANY(:ids)")
+        params["ids"] = body.ids
+    if entity_type_id is not None:
+        conditions.append("e.entity_type_id = :entity_type_id")
+        params["entity_type_id"] = entity_type_id
+    conditions += await _filter_conditions(db, request, entity_type_id, params)
+
+    result = await db.execute(
+        text(f"SELECT e.id FROM entities e WHERE {' AND '.join(conditions)}"),
+        params
+    )
+    return await _delete_entities(db, [row.id for row in result], atomic=atomic)
 
-    # Delete the entity itself
-    db.execute(text("DELETE FROM entities WHERE id = :id"), {"id": entity_id})
 
-    db.commit()
-    return None
+# Rows per INSERT statement, keeping the bound parameter count well below
+# the PostgreSQL protocol limit of 65535.
+WRITE_BATCH_SIZE = 5000
 
 
-def _upsert_value(db: Session, table: str, entity_id: int, attr_id: int, value: Any):
-    """Insert or update a simple value."""
-    # Try update first
-    result = db.execute(
-        text(f"""
-            UPDATE {table}
-            SET value = :value
-            WHERE entity_id = :entity_id AND attribute_id = :attr_id
-        """),
-        {"value": value, "entity_id": entity_id, "attr_id": attr_id}
-    )
-    if result.rowcount == 0:  # type: ignore[union-attr]
-        # Insert if no row was updated
-        db.execute(
+def _related_id(value: Any) -> int | None:
+    """Extract a related entity ID from either an ID or an object with 'id'."""
+    return value if isinstance(value, int) else (value.get("id") if isinstance(value, dict) else None)
+
+
+async def _insert_rows(db: AsyncSession, table: str, columns: tuple[str, ...], rows: list[tuple], conflict: str):
+    """Insert rows with multi-row INSERT statements, batched by WRITE_BATCH_SIZE."""
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        batch = rows[start:start + WRITE_BATCH_SIZE]
+        params: dict[str, Any] = {}
+        placeholders = []
+        for i, row in enumerate(batch):
+            names = []
+            for column, value in zip(columns, row):
+                params[f"{column}_{i}"] = value
+                names.append(f"CAST(:{column}_{i} AS jsonb)" if table == "values_json" and column == "value" else f":{column}_{i}")
+            placeholders.append(f"({', '.join(names)})")
+        await db.execute(
             text(f"""
-                INSERT INTO {table} (entity_id, attribute_id, value)
-                VALUES (:entity_id, :attr_id, :value)
+                INSERT INTO {table} ({', '.join(columns)})
+                VALUES {', '.join(placeholders)}
+                {conflict}
             """),
-            {"value": value, "entity_id": entity_id, "attr_id": attr_id}
+            params
         )
 
 
-def _upsert_json_value(db: Session, entity_id: int, attr_id: int, value: Any):
-    """Insert or update a JSON value."""
-    import json
-    json_str = json.dumps(value) if value is not None else None
-
-    result = db.execute(
-        text("""
-            UPDATE values_json
-            SET value = :value::jsonb
-            WHERE entity_id = :entity_id AND attribute_id = :attr_id
+async def _delete_pairs(db: AsyncSession, table: str, pairs: list[tuple[int, int]]):
+    """Delete all rows of a value table matching (entity_id, attribute_id) pairs."""
+    if not pairs:
+        return
+    await db.execute(
+        text(f"""
+            DELETE FROM {table} v
+            USING unnest(CAST(:entity_ids AS integer[]), CAST(:attribute_ids AS integer[])) AS d(entity_id, attribute_id)
+            WHERE v.entity_id = d.entity_id AND v.attribute_id = d.attribute_id
         """),
-        {"value": json_str, "entity_id": entity_id, "attr_id": attr_id}
+        {"entity_ids": [pair[0] for pair in pairs], "attribute_ids": [pair[1] for pair in pairs]}
     )
-    if result.rowcount == 0:  # type: ignore[union-attr]
-        db.execute(
-            text("""
-                INSERT INTO values_json (entity_id, attribute_id, value)
-                VALUES (:entity_id, :attr_id, :value::jsonb)
-            """),
-            {"value": json_str, "entity_id": entity_id, "attr_id": attr_id}
-        )
 
 
-def _upsert_relation(db: Session, entity_id: int, attr_id: int, value: Any):
-    """Insert or update a single relation value. Value should be the related entity ID."""
-    related_id = value if isinstance(value, int) else (value.get("id") if isinstance(value, dict) else None)
-    if related_id is None:
-        # Delete the relation if value is None
-        db.execute(
-            text("""
-                DELETE FROM values_relation
-                WHERE entity_id = :entity_id AND attribute_id = :attr_id
-            """),
-            {"entity_id": entity_id, "attr_id": attr_id}
+async def _write_values(db: AsyncSession, values: list[tuple[int, dict[str, Any], Any]]):
+    """Write (entity_id, attribute, value) triples, grouped by value table.
+
+    Each simple value table and values_relation is written with a single
+    INSERT ... ON CONFLICT (entity_id, attribute_id) DO UPDATE. A null relation
+    removes the row, and multi-relations replace the whole list with one DELETE
+    and one INSERT. Every written entity gets its version bumped, and its
+    search vector rebuilt if a searchable text value was written.
+    """
+    upserts: dict[str, dict[tuple[int, int], Any]] = {}
+    relation_deletes: list[tuple[int, int]] = []
+    multi_values: dict[tuple[int, int], Any] = {}
+
+    for entity_id, attr, value in values:
+        table = ATTRIBUTE_TYPE_TABLES.get(attr["type"])
+        key = (entity_id, attr["id"])
+        if table is None:
+            continue
+        if table == "values_relation_multi":
+            multi_values[key] = value
+        elif table == "values_relation":
+            related_id = _related_id(value)
+            if related_id is None:
+                upserts.get(table, {}).pop(key, None)
+                relation_deletes.append(key)
+            else:
+                upserts.setdefault(table, {})[key] = related_id
+        elif table == "values_json":
+            upserts.setdefault(table, {})[key] = json.dumps(value) if value is not None else None
+        else:
+            upserts.setdefault(table, {})[key] = value
+
+    await _delete_pairs(db, "values_relation", relation_deletes)
+    for table, rows in upserts.items():
+        value_column = "related_entity_id" if table == "values_relation" else "value"
+        await _insert_rows(
+            db, table,
+            ("entity_id", "attribute_id", value_column),
+            [(entity_id, attr_id, value) for (entity_id, attr_id), value in rows.items()],
+            f"ON CONFLICT (entity_id, attribute_id) DO UPDATE SET {value_column} = EXCLUDED.{value_column}",
         )
-        return
 
-    result = db.execute(
-        text("""
-            UPDATE values_relation
-            SET related_entity_id = :related_id
-            WHERE entity_id = :entity_id AND attribute_id = :attr_id
-        """),
-        {"related_id": related_id, "entity_id": entity_id, "attr_id": attr_id}
-    )
-    if result.rowcount == 0:  # type: ignore[union-attr]
-        db.execute(
-            text("""
-                INSERT INTO values_relation (entity_id, attribute_id, related_entity_id)
-                VALUES (:entity_id, :attr_id, :related_id)
-            """),
-            {"related_id": related_id, "entity_id": entity_id, "attr_id": attr_id}
+    if multi_values:
+        await _delete_pairs(db, "values_relation_multi", list(multi_values))
+        multi_rows = []
+        for (entity_id, attr_id), items in multi_values.items():
+            for sort_order, item in enumerate(items or []):
+                related_id = _related_id(item)
+                if related_id is not None:
+                    multi_rows.append((entity_id, attr_id, related_id, sort_order))
+        await _insert_rows(
+            db, "values_relation_multi",
+            ("entity_id", "attribute_id", "related_entity_id", "sort_order"),
+            multi_rows,
+            "ON CONFLICT (entity_id, attribute_id, related_entity_id) DO NOTHING",
         )
 
+    await _bump_versions(db, {entity_id for entity_id, _, _ in values})
+    await refresh_search_vectors(db, {entity_id for entity_id, attr, _ in values if attr["type"] in SEARCH_WEIGHTS})
 
-def _upsert_relation_multi(db: Session, entity_id: int, attr_id: int, value: Any):
-    """Replace all multi-relation values. Value should be a list of entity IDs or objects with 'id'."""
-    # Delete existing relations
-    db.execute(
-        text("""
-            DELETE FROM values_relation_multi
-            WHERE entity_id = :entity_id AND attribute_id = :attr_id
-        """),
-        {"entity_id": entity_id, "attr_id": attr_id}
-    )
 
-    if not value:
+async def _bump_versions(db: AsyncSession, entity_ids: set[int]):
+    """Mark entities as changed so ETags covering them no longer match."""
+    if not entity_ids:
         return
-
-    # Insert new relations
-    for sort_order, item in enumerate(value):
-        related_id = item if isinstance(item, int) else (item.get("id") if isinstance(item, dict) else None)
-        if related_id is not None:
-            db.execute(
-                text("""
-                    INSERT INTO values_relation_multi (entity_id, attribute_id, related_entity_id, sort_order)
-                    VALUES (:entity_id, :attr_id, :related_id, :sort_order)
-                """),
-                {"entity_id": entity_id, "attr_id": attr_id, "related_id": related_id, "sort_order": sort_order}
-            )
+    await db.execute(
+        text("UPDATE entities SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = ANY(:ids)"),
+        {"ids": sorted(entity_ids)}
+    )
@@ -1,8 +1,10 @@
 from app.db import get_db
-from fastapi import APIRouter, Depends, HTTPException
+from app.etags import etag_matches, make_etag, not_modified
+from app.schema_cache import schema_cache
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/entity-types", tags=["entity-types"])
 
@@ -34,19 +36,45 @@ class EntityTypeDetailResponse(EntityTypeResponse):
     attributes: list[AttributeResponse]
 
 
+async def _schema_etag(db: AsyncSession, *parts) -> str:
+    """ETag for a view of the schema; the stored schema version moves on every change."""
+    version = (await db.execute(text("SELECT version FROM schema_version"))).scalar_one()
+    return make_etag("entity-types", version, *parts)
+
+
 @router.get("", response_model=list[EntityTypeResponse])
-def list_entity_types(db: Session = Depends(get_db)):
+async def list_entity_types(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """List all entity types."""
-    result = db.execute(
+    etag = await _schema_etag(db)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    result = await db.execute(
         text("SELECT id, name, description, category FROM entity_types ORDER BY category, name")
     )
     return [dict(row._mapping) for row in result]
 
 
+@router.post("/schema-cache/reload")
+async def reload_schema_cache(db: AsyncSession = Depends(get_db)):
+    """Force a reload of the cached attribute metadata and return cache statistics."""
+    await schema_cache.reload(db)
+    return schema_cache.stats()
+
+
 @router.get("/{entity_type_id}", response_model=EntityTypeDetailResponse)
-def get_entity_type(entity_type_id: int, db: Session = Depends(get_db)):
+async def get_entity_type(
+    entity_type_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
     """Get an entity type with its attributes."""
-    result = db.execute(
+    etag = await _schema_etag(db, entity_type_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    result = await db.execute(
         text("SELECT id, name, description, category FROM entity_types WHERE id = :id"),
         {"id": entity_type_id}
     )
@@ -55,7 +83,7 @@ def get_entity_type(entity_type_id: int, db: Session = Depends(get_db)):
     if not entity_type:
         raise HTTPException(status_code=404, detail="Entity type not found")
 
-    attributes_result = db.execute(
+    attributes_result = await db.execute(
         text("""
             SELECT a.id, a.name, a.slug, a.type::text, a.is_required,
                    a.default_value, a.sort_order, a.related_entity_type_id,
@@ -0,0 +1,433 @@
+import asyncio
+import os
+import re
+from typing import Any, Awaitable, Callable
+
+from app.db import get_db
+from app.routers.entities import fetch_relations, fetch_scalar_values
+from app.schema_cache import schema_cache
+from fastapi import APIRouter, Depends
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLArgument,
+    GraphQLBoolean,
+    GraphQLError,
+    GraphQLField,
+    GraphQLFloat,
+    GraphQLInt,
+    GraphQLInterfaceType,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    GraphQLScalarType,
+    GraphQLSchema,
+    GraphQLString,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    execute,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+    parse,
+    specified_rules,
+    validate,
+)
+from graphql.execution.values import get_argument_values
+from graphql.validation import ValidationContext, ValidationRule
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter(prefix="/graphql", tags=["graphql"])
+
+GRAPHQL_MAX_DEPTH = int(os.getenv("GRAPHQL_MAX_DEPTH", "10"))
+GRAPHQL_MAX_COMPLEXITY = int(os.getenv("GRAPHQL_MAX_COMPLEXITY", "50000"))
+# Assumed size of a list field without a limit argument when estimating query complexity
+GRAPHQL_LIST_FACTOR = int(os.getenv("GRAPHQL_LIST_FACTOR", "10"))
+GRAPHQL_MAX_LIMIT = 1000
+
+
+class GraphQLRequest(BaseModel):
+    query: str
+    variables: dict[str, Any] | None = None
+    operationName: str | None = None
+
+
+class DataLoader:
+    """Batches load(key) calls made while a query level resolves into one batch_load call.
+
+    The batch is dispatched once the event loop has gone a full iteration
+    without new keys being queued, so every resolver of the current level
+    gets to enqueue its key first.
+    """
+
+    def __init__(self, batch_load: Callable[[list[Any]], Awaitable[dict[Any, Any]]]) -> None:
+        self.batch_load = batch_load
+        self.batches = 0
+        self._cache: dict[Any, asyncio.Future] = {}
+        self._queue: list[Any] = []
+        self._dispatch: asyncio.Task | None = None
+
+    def load(self, key: Any) -> asyncio.Future:
+        future = self._cache.get(key)
+        if future is None:
+            future = self._cache[key] = asyncio.get_running_loop().create_future()
+            self._queue.append(key)
+            if self._dispatch is None:
+                self._dispatch = asyncio.create_task(self._dispatch_when_idle())
+        return future
+
+    async def _dispatch_when_idle(self) -> None:
+        queued = -1
+        while queued != len(self._queue):
+            queued = len(self._queue)
+            await asyncio.sleep(0)
+        keys, self._queue, self._dispatch = self._queue, [], None
+        self.batches += 1
+        try:
+            results = await self.batch_load(keys)
+        except Exception as exc:
+            for key in keys:
+                self._cache[key].set_exception(exc)
+            return
+        for key in keys:
+            self._cache[key].set_result(results.get(key))
+
+
+class Loaders:
+    """Request-scoped loaders; each batch costs one query per value table."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+        self.lock = asyncio.Lock()
+        self.scalars = DataLoader(self._load_scalars)
+        self.relations = DataLoader(self._load_relations)
+
+    async def _load_scalars(self, entity_ids: list[int]) -> dict[int, dict[str, Any]]:
+        # A session runs one statement at a time
+        async with self.lock:
+            return await fetch_scalar_values(self.db, sorted(entity_ids))
+
+    async def _load_relations(self, entity_ids: list[int]) -> dict[int, list[tuple[str, bool, dict[str, Any]]]]:
+        async with self.lock:
+            return await fetch_relations(self.db, sorted(entity_ids))
+
+
+JSONScalar = GraphQLScalarType("JSON", description="Arbitrary JSON value", serialize=lambda value: value)
+
+SCALAR_TYPES = {
+    "text": GraphQLString,
+    "textarea": GraphQLString,
+    "hex": GraphQLString,
+    "number": GraphQLFloat,
+    "boolean": GraphQLBoolean,
+    "datetime": GraphQLString,
+    "json": JSONScalar,
+}
+
+
+def _graphql_name(name: str, pascal: bool = False) -> str:
+    """Turn an entity type name or attribute slug into a valid GraphQL name."""
+    parts = [part for part in re.split(r"[^0-9A-Za-z]+", name) if part]
+    if pascal:
+        result = "".join(part[:1].upper() + part[1:] for part in parts)
+    else:
+        result = parts[0] + "".join(part[:1].upper() + part[1:] for part in parts[1:]) if parts else ""
+    return f"_{result}" if not result or result[0].isdigit() else result
+
+
+def _scalar_resolver(slug: str):
+    async def resolve(entity, info):
+        return (await info.context.scalars.load(entity["id"])).get(slug)
+    return resolve
+
+
+def _relation_resolver(slug: str, is_multi: bool):
+    async def resolve(entity, info):
+        related = [
+            summary for rel_slug, _, summary in await info.context.relations.load(entity["id"]) if rel_slug == slug
+        ]
+        return related if is_multi else (related[0] if related else None)
+    return resolve
+
+
+HEADER_FIELDS = {
+    "id": GraphQLField(GraphQLNonNull(GraphQLInt)),
+    "name": GraphQLField(GraphQLNonNull(GraphQLString)),
+    "slug": GraphQLField(GraphQLNonNull(GraphQLString)),
+    "entityTypeId": GraphQLField(GraphQLNonNull(GraphQLInt), resolve=lambda entity, info: entity["entity_type_id"]),
+    "entityTypeName": GraphQLField(GraphQLNonNull(GraphQLString), resolve=lambda entity, info: entity["entity_type_name"]),
+}
+
+
+def build_schema(entity_types: list[Any], attributes: dict[int, dict[str, Any]]) -> GraphQLSchema:
+    """Generate a GraphQL schema with one object type per entity type.
+
+    Each type exposes the entity's own columns and a values object holding
+    one field per attribute. Relation attributes are typed with their
+    related_entity_type_id, falling back to the Entity interface.
+    """
+    entity_interface = GraphQLInterfaceType(
+        "Entity",
+        HEADER_FIELDS,
+        resolve_type=lambda entity, info, _: type_names[entity["entity_type_id"]],
+    )
+
+    type_names: dict[int, str] = {}
+    for entity_type in entity_types:
+        name = _graphql_name(entity_type.name, pascal=True)
+        type_names[entity_type.id] = name if name not in type_names.values() and name != "Entity" else f"{name}{entity_type.id}"
+
+    by_type: dict[int, list[dict[str, Any]]] = {}
+    for attr in attributes.values():
+        by_type.setdefault(attr["entity_type_id"], []).append(attr)
+
+    object_types: dict[int, GraphQLObjectType] = {}
+
+    def values_fields(entity_type_id: int) -> dict[str, GraphQLField]:
+        fields = {}
+        for attr in sorted(by_type.get(entity_type_id, []), key=lambda attr: attr["id"]):
+            field_name = _graphql_name(attr["slug"])
+            if field_name in fields:
+                field_name = f"{field_name}{attr['id']}"
+            if attr["type"] in ("relation", "relation_multi"):
+                target = object_types.get(attr["related_entity_type_id"], entity_interface)
+                is_multi = attr["type"] == "relation_multi"
+                fields[field_name] = GraphQLField(
+                    GraphQLNonNull(GraphQLList(GraphQLNonNull(target))) if is_multi else target,
+                    resolve=_relation_resolver(attr["slug"], is_multi),
+                )
+            elif attr["type"] in SCALAR_TYPES:
+                fields[field_name] = GraphQLField(SCALAR_TYPES[attr["type"]], resolve=_scalar_resolver(attr["slug"]))
+        return fields
+
+    for entity_type in entity_types:
+        type_name = type_names[entity_type.id]
+        values_type = GraphQLObjectType(
+            f"{type_name}Values",
+            lambda entity_type_id=entity_type.id: values_fields(entity_type_id) or {
+                "_empty": GraphQLField(GraphQLBoolean, resolve=lambda entity, info: None)
+            },
+        )
+        object_types[entity_type.id] = GraphQLObjectType(
+            type_name,
+            lambda values_type=values_type: {
+                **HEADER_FIELDS,
+                "values": GraphQLField(GraphQLNonNull(values_type), resolve=lambda entity, info: entity),
+            },
+            interfaces=[entity_interface],
+        )
+
+    query_fields: dict[str, GraphQLField] = {
+        "entity": GraphQLField(
+            entity_interface,
+            args={"id": GraphQLArgument(GraphQLNonNull(GraphQLInt))},
+            resolve=_resolve_entity(None),
+        ),
+    }
+    for entity_type in entity_types:
+        field_name = _graphql_name(entity_type.name)
+        object_type = object_types[entity_type.id]
+        query_fields[field_name] = GraphQLField(
+            object_type,
+            args={"id": GraphQLArgument(GraphQLInt), "slug": GraphQLArgument(GraphQLString)},
+            resolve=_resolve_entity(entity_type.id),
+        )
+        query_fields[f"{field_name}List"] = GraphQLField(
+            GraphQLNonNull(GraphQLList(GraphQLNonNull(object_type))),
+            args={
+                "limit": GraphQLArgument(GraphQLInt, default_value=100),
+                "after": GraphQLArgument(GraphQLInt, description="Return entities with a larger id"),
+            },
+            resolve=_resolve_entity_list(entity_type.id),
+        )
+
+    return GraphQLSchema(GraphQLObjectType("Query", query_fields), types=list(object_types.values()))
+
+
+ENTITY_COLUMNS = """
+    SELECT e.id, e.name, e.slug, e.entity_type_id, et.name as entity_type_name
+    FROM entities e
+    JOIN entity_types et ON e.entity_type_id = et.id
+"""
+
+
+def _resolve_entity(entity_type_id: int | None):
+    async def resolve(root, info, id: int | None = None, slug: str | None = None):
+        if id is None and slug is None:
+            raise GraphQLError("Pass an id or a slug")
+        conditions = ["e.id = :id" if id is not None else "e.slug = :slug"]
+        if entity_type_id is not None:
+            conditions.append("e.entity_type_id = :entity_type_id")
+        async with info.context.lock:
+            result = await info.context.db.execute(
+                text(f"{ENTITY_COLUMNS} WHERE {' AND '.join(conditions)}"),
+                {"id": id, "slug": slug, "entity_type_id": entity_type_id},
+            )
+            row = result.fetchone()
+        return dict(row._mapping) if row else None
+    return resolve
+
+
+def _resolve_entity_list(entity_type_id: int):
+    async def resolve(root, info, limit: int = 100, after: int | None = None):
+        if not 1 <= limit <= GRAPHQL_MAX_LIMIT:
+            raise GraphQLError(f"limit must be between 1 and {GRAPHQL_MAX_LIMIT}")
+        async with info.context.lock:
+            result = await info.context.db.execute(
+                text(f"""
+                    {ENTITY_COLUMNS}
+                    WHERE e.entity_type_id = :entity_type_id AND e.id > :after
+                    ORDER BY e.id
+                    LIMIT :limit
+                """),
+                {"entity_type_id": entity_type_id, "after": after or 0, "limit": limit},
+            )
+            return [dict(row._mapping) for row in result]
+    return resolve
+
+
+def _list_size(field: GraphQLField, node: FieldNode, variables: dict[str, Any]) -> int:
+    """Return how many items a list field can return, from its limit argument where it has one."""
+    if "limit" not in field.args:
+        return GRAPHQL_LIST_FACTOR
+    try:
+        limit = get_argument_values(field, node, variables).get("limit")
+    except GraphQLError:
+        limit = None
+    if not isinstance(limit, int):
+        return GRAPHQL_MAX_LIMIT
+    return min(max(limit, 1), GRAPHQL_MAX_LIMIT)
+
+
+def _selection_cost(
+    selection_set: SelectionSetNode | None,
+    parent_type: Any,
+    fragments: dict[str, FragmentDefinitionNode],
+    schema: GraphQLSchema,
+    variables: dict[str, Any],
+    visited: frozenset[str] = frozenset(),
+) -> tuple[int, int]:
+    """Return the (depth, complexity) of a selection set.
+
+    Every field costs one, multiplied by the size of each list field it is
+    nested in: the list's limit argument (or its default), or
+    GRAPHQL_LIST_FACTOR for lists without one.
+    """
+    if selection_set is None:
+        return 0, 0
+    depth = complexity = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            if selection.name.value.startswith("__"):
+                continue
+            field = getattr(parent_type, "fields", {}).get(selection.name.value)
+            if field is None:
+                continue
+            child_depth, child_complexity = _selection_cost(
+                selection.selection_set, get_named_type(field.type), fragments, schema, variables, visited
+            )
+            factor = _list_size(field, selection, variables) if is_list_type(get_nullable_type(field.type)) else 1
+            depth = max(depth, child_depth + 1)
+            complexity += 1 + factor * child_complexity
+        else:
+            if isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = fragments.get(name)
+                if fragment is None or name in visited:
+                    continue
+                visited = visited | {name}
+            else:
+                fragment = selection
+            fragment_type = (
+                schema.get_type(fragment.type_condition.name.value) if fragment.type_condition else parent_type
+            )
+            child_depth, child_complexity = _selection_cost(
+                fragment.selection_set, fragment_type, fragments, schema, variables, visited
+            )
+            depth = max(depth, child_depth)
+            complexity += child_complexity
+    return depth, complexity
+
+
+class QueryLimitsRule(ValidationRule):
+    """Reject operations nested deeper than GRAPHQL_MAX_DEPTH or costlier than GRAPHQL_MAX_COMPLEXITY.
+
+    Use with_variables() so that limits passed as variables are counted.
+    """
+
+    variables: dict[str, Any] = {}
+
+    @classmethod
+    def with_variables(cls, variables: dict[str, Any] | None) -> type["QueryLimitsRule"]:
+        return type(cls.__name__, (cls,), {"variables": variables or {}})
+
+    def __init__(self, context: ValidationContext) -> None:
+        super().__init__(context)
+        document: DocumentNode = context.document
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+
+    def enter_operation_definition(self, node: OperationDefinitionNode, *_args) -> None:
+        schema = self.context.schema
+        depth, complexity = _selection_cost(
+            node.selection_set, schema.query_type, self.fragments, schema, self.variables
+        )
+        if depth > GRAPHQL_MAX_DEPTH:
+            self.report_error(GraphQLError(f"Query depth {depth} exceeds the maximum of {GRAPHQL_MAX_DEPTH}", node))
+        if complexity > GRAPHQL_MAX_COMPLEXITY:
+            self.report_error(
+                GraphQLError(f"Query complexity {complexity} exceeds the maximum of {GRAPHQL_MAX_COMPLEXITY}", node)
+            )
+
+
+_schema: tuple[int | None, GraphQLSchema] | None = None
+
+
+async def get_schema(db: AsyncSession) -> GraphQLSchema:
+    """Return the generated schema, rebuilding it when the stored schema version changes."""
+    global _schema
+    version = await schema_cache.current_version(db)
+    if _schema is None or _schema[0] != version:
+        entity_types = (await db.execute(text("SELECT id, name FROM entity_types ORDER BY id"))).fetchall()
+        _schema = (version, build_schema(entity_types, await schema_cache.attributes_by_id(db)))
+    return _schema[1]
+
+
+@router.post("")
+async def graphql_query(request: GraphQLRequest, db: AsyncSession = Depends(get_db)):
+    """Execute a GraphQL query against the schema generated from entity types and attributes.
+
+    Resolvers load values through per-request loaders, so each level of a
+    query costs one query per value table however many entities it holds.
+    """
+    schema = await get_schema(db)
+    try:
+        document = parse(request.query)
+    except GraphQLError as error:
+        return {"data": None, "errors": [error.formatted]}
+
+    errors = validate(schema, document, [*specified_rules, QueryLimitsRule.with_variables(request.variables)])
+    if errors:
+        return {"data": None, "errors": [error.formatted for error in errors]}
+
+    result = execute(
+        schema,
+        document,
+        context_value=Loaders(db),
+        variable_values=request.variables,
+        operation_name=request.operationName,
+    )
+    if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+        result = await result
+
+    response: dict[str, Any] = {"data": result.data}
+    if result.errors:
+        response["errors"] = [error.formatted for error in result.errors]
+    return response
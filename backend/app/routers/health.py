@@ -1,4 +1,12 @@
-from fastapi import APIRouter
+import time
+
+from app.db import async_engine, get_db
+from app.document_cache import document_cache
+from app.schema_cache import schema_cache
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -7,3 +15,30 @@ router = APIRouter(prefix="/health", tags=["health"])
 async def health_check():
     """Health check endpoint for monitoring and frontend connectivity tests."""
     return {"status": "healthy"}
+
+
+@router.get("/db")
+async def database_health(db: AsyncSession = Depends(get_db)):
+    """Report connection pool statistics and a database round-trip latency probe."""
+    # Snapshot before the probe so this request's own connection is not counted
+    pool = async_engine.pool.stats()
+    started = time.perf_counter()
+    try:
+        await db.execute(text("SELECT 1"))
+    except Exception as exc:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "error": str(exc), "pool": async_engine.pool.stats()},
+        )
+
+    return {
+        "status": "healthy",
+        "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+        "pool": pool,
+    }
+
+
+@router.get("/cache")
+async def cache_health():
+    """Report entity document cache and attribute schema cache statistics."""
+    return {"documents": document_cache.stats(), "schema": schema_cache.stats()}
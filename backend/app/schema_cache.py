@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SCHEMA_CACHE_CHECK_INTERVAL = float(os.getenv("SCHEMA_CACHE_CHECK_INTERVAL", "5"))
+
+# Value table holding each attribute type
+ATTRIBUTE_TYPE_TABLES = {
+    "text": "values_text",
+    "textarea": "values_text",
+    "hex": "values_text",
+    "number": "values_number",
+    "boolean": "values_boolean",
+    "datetime": "values_datetime",
+    "json": "values_json",
+    "relation": "values_relation",
+    "relation_multi": "values_relation_multi",
+}
+
+
+class AttributeSchemaCache:
+    """Process-wide cache of attribute metadata, keyed by entity type.
+
+    The whole attributes table is loaded at once together with the value of
+    schema_version.version, which is bumped by triggers whenever attributes or
+    entity types change. The stored version is re-checked at most once every
+    check_interval seconds; a changed version triggers a reload.
+    """
+
+    def __init__(self, check_interval: float = SCHEMA_CACHE_CHECK_INTERVAL) -> None:
+        self.check_interval = check_interval
+        self.version: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._by_id: dict[int, dict[str, Any]] = {}
+        self._by_type: dict[int, dict[str, dict[str, Any]]] = {}
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _load(self, db: AsyncSession) -> None:
+        version = (await db.execute(text("SELECT version FROM schema_version"))).scalar_one()
+        result = await db.execute(
+            text("""
+                SELECT id, entity_type_id, slug, type::text as type,
+                       related_entity_type_id, default_value
+                FROM attributes
+            """)
+        )
+        by_id: dict[int, dict[str, Any]] = {}
+        by_type: dict[int, dict[str, dict[str, Any]]] = {}
+        for row in result:
+            attr = dict(row._mapping)
+            by_id[row.id] = attr
+            by_type.setdefault(row.entity_type_id, {})[row.slug] = attr
+
+        self._by_id = by_id
+        self._by_type = by_type
+        self.version = version
+        self._checked_at = time.monotonic()
+        self.reloads += 1
+
+    async def _ensure_fresh(self, db: AsyncSession) -> None:
+        """Load the cache if it is cold or the stored schema version moved on.
+
+        Counts a hit when the cached metadata could be used as is and a miss
+        when it had to be (re)loaded.
+        """
+        if self.version is not None and time.monotonic() - self._checked_at < self.check_interval:
+            self.hits += 1
+            return
+        async with self._lock:
+            if self.version is not None:
+                if time.monotonic() - self._checked_at < self.check_interval:
+                    self.hits += 1
+                    return
+                version = (await db.execute(text("SELECT version FROM schema_version"))).scalar_one()
+                if version == self.version:
+                    self._checked_at = time.monotonic()
+                    self.hits += 1
+                    return
+            self.misses += 1
+            await self._load(db)
+
+    async def reload(self, db: AsyncSession) -> None:
+        """Force a reload of all attribute metadata."""
+        async with self._lock:
+            await self._load(db)
+
+    def invalidate(self) -> None:
+        """Drop cached metadata so the next lookup reloads it."""
+        self.version = None
+
+    async def current_version(self, db: AsyncSession) -> int | None:
+        """Return the schema version the cached metadata corresponds to."""
+        await self._ensure_fresh(db)
+        return self.version
+
+    async def attributes_for_type(self, db: AsyncSession, entity_type_id: int) -> dict[str, dict[str, Any]]:
+        """Return the attributes of an entity type, keyed by slug."""
+        await self._ensure_fresh(db)
+        return self._by_type.get(entity_type_id, {})
+
+    async def attributes_by_id(self, db: AsyncSession) -> dict[int, dict[str, Any]]:
+        """Return all known attributes keyed by id."""
+        await self._ensure_fresh(db)
+        return self._by_id
+
+    async def attribute(self, db: AsyncSession, attribute_id: int) -> dict[str, Any]:
+        """Return the metadata of a single attribute by id.
+
+        An id that is not cached means the attribute was created since the last
+        check, so the cache is reloaded before giving up.
+        """
+        await self._ensure_fresh(db)
+        if attribute_id not in self._by_id:
+            self.misses += 1
+            await self.reload(db)
+        return self._by_id[attribute_id]
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "attributes": len(self._by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "reloads": self.reloads,
+        }
+
+
+schema_cache = AttributeSchemaCache()
@@ -0,0 +1,48 @@
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "english")
+if not re.fullmatch(r"[a-z_]+", SEARCH_CONFIG):
+    raise ValueError(f"Invalid SEARCH_CONFIG: {SEARCH_CONFIG!r}")
+
+# Text search weight of each searchable attribute type; the entity name is
+# always weighted A. Hex codes are not searchable.
+SEARCH_WEIGHTS = {"text": "B", "textarea": "C"}
+
+
+def name_vector(column: str) -> str:
+    """SQL expression for the weighted search vector of an entity name column."""
+    return f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({column}, '')), 'A')"
+
+
+def search_query(param: str) -> str:
+    """SQL expression parsing a bound user search string into a tsquery."""
+    return f"websearch_to_tsquery('{SEARCH_CONFIG}', {param})"
+
+
+# Rebuilds search vectors from entity names and the text values of searchable
+# attributes, for all entities whose id is in :entity_ids
+REFRESH_SQL = f"""
+    UPDATE entities e
+    SET search_vector = {name_vector("e.name")} || (
+        SELECT {" || ".join(
+            f"coalesce(setweight(to_tsvector('{SEARCH_CONFIG}', "
+            f"string_agg(v.value, ' ') FILTER (WHERE a.type = '{attr_type}')), '{weight}'), '')"
+            for attr_type, weight in SEARCH_WEIGHTS.items()
+        )}
+        FROM values_text v
+        JOIN attributes a ON a.id = v.attribute_id
+        WHERE v.entity_id = e.id
+    )
+    WHERE e.id = ANY(:entity_ids)
+"""
+
+
+async def refresh_search_vectors(db: AsyncSession, entity_ids: set[int] | list[int]) -> None:
+    """Rebuild the search vectors of the given entities in one statement."""
+    if not entity_ids:
+        return
+    await db.execute(text(REFRESH_SQL), {"entity_ids": sorted(entity_ids)})
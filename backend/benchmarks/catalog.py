@@ -0,0 +1,151 @@
+"""Synthetic product catalog for benchmarks.
+
+Mirrors the shape of the seed data from migrations 0006-0015: each product
+has a specification with a color, a weight and dimensions made of
+measurements, and related_products links every product to the next few,
+forming cycles that keep deep relation expansion busy. Blog posts carry tags,
+and tags have colors.
+
+Every entity gets a "bench-" slug so the catalog can be dropped again. Values
+are derived from each entity's number, so the same size always builds the
+same catalog.
+"""
+
+from dataclasses import dataclass
+
+from app.search import REFRESH_SQL
+from sqlalchemy import Connection, text
+
+SLUG_PREFIX = "bench-"
+
+
+@dataclass
+class CatalogSize:
+    products: int = 1000
+    colors: int = 20
+    tags: int = 50
+    posts: int = 200
+    related_products: int = 3
+    tags_per_post: int = 3
+
+
+def _numbered(type_name: str, kind: str) -> str:
+    """Subquery of (id, n) for the synthetic entities of one kind."""
+    return f"""(
+        SELECT e.id, split_part(e.slug, '-', 3)::int AS n
+        FROM entities e
+        WHERE e.entity_type_id = (SELECT id FROM entity_types WHERE name = '{type_name}')
+          AND e.slug LIKE '{SLUG_PREFIX}{kind}-%'
+    )"""
+
+
+def _attribute(type_name: str, slug: str) -> str:
+    return f"""(
+        SELECT a.id FROM attributes a JOIN entity_types et ON et.id = a.entity_type_id
+        WHERE et.name = '{type_name}' AND a.slug = '{slug}'
+    )"""
+
+
+def _entities(type_name: str, kind: str, count: str, name: str) -> str:
+    return f"""
+        INSERT INTO entities (entity_type_id, name, slug)
+        SELECT (SELECT id FROM entity_types WHERE name = '{type_name}'), {name}, '{SLUG_PREFIX}{kind}-' || n
+        FROM generate_series(1, {count}) n
+    """
+
+
+def _values(table: str, type_name: str, kind: str, slug: str, value: str) -> str:
+    return f"""
+        INSERT INTO {table} (entity_id, attribute_id, value)
+        SELECT s.id, {_attribute(type_name, slug)}, {value}
+        FROM {_numbered(type_name, kind)} s
+    """
+
+
+def _relation(type_name: str, kind: str, slug: str, target_type: str, target_kind: str, target: str) -> str:
+    return f"""
+        INSERT INTO values_relation (entity_id, attribute_id, related_entity_id)
+        SELECT s.id, {_attribute(type_name, slug)}, t.id
+        FROM {_numbered(type_name, kind)} s
+        JOIN {_numbered(target_type, target_kind)} t ON t.n = {target}
+    """
+
+
+def _relation_multi(
+    type_name: str, kind: str, slug: str, target_type: str, target_kind: str, fan_out: str, target: str
+) -> str:
+    return f"""
+        INSERT INTO values_relation_multi (entity_id, attribute_id, related_entity_id, sort_order)
+        SELECT s.id, {_attribute(type_name, slug)}, t.id, k
+        FROM {_numbered(type_name, kind)} s
+        CROSS JOIN generate_series(1, {fan_out}) k
+        JOIN {_numbered(target_type, target_kind)} t ON t.n = {target}
+        ON CONFLICT DO NOTHING
+    """
+
+
+# Statements building the catalog, in dependency order. Products own four
+# measurements, numbered 4 * (n - 1) + 1..4 for weight, width, height, depth.
+BUILD_STATEMENTS = [
+    _entities("color", "color", ":colors", "'Color ' || n"),
+    _values("values_text", "color", "color", "name", "'Color ' || s.n"),
+    _values("values_text", "color", "color", "hex", "'#' || lpad(to_hex((s.n * 2654435) % 16777216), 6, '0')"),
+
+    _entities("tag", "tag", ":tags", "'Tag ' || n"),
+    _values("values_text", "tag", "tag", "name", "'Tag ' || s.n"),
+    _relation("tag", "tag", "color", "color", "color", "(s.n - 1) % :colors + 1"),
+
+    _entities("measurement", "measurement", ":products * 4", "'Measurement ' || n"),
+    _values("values_number", "measurement", "measurement", "value", "((s.n * 7919) % 1000) / 10.0 + 0.1"),
+    _values("values_text", "measurement", "measurement", "unit", "CASE WHEN s.n % 4 = 1 THEN 'kg' ELSE 'cm' END"),
+
+    _entities("dimensions", "dimensions", ":products", "'Dimensions ' || n"),
+    *(
+        _relation("dimensions", "dimensions", slug, "measurement", "measurement", f"4 * (s.n - 1) + {offset}")
+        for slug, offset in (("width", 2), ("height", 3), ("depth", 4))
+    ),
+
+    _entities("specification", "spec", ":products", "'Specification ' || n"),
+    _relation("specification", "spec", "weight", "measurement", "measurement", "4 * (s.n - 1) + 1"),
+    _relation("specification", "spec", "dimensions", "dimensions", "dimensions", "s.n"),
+    _relation("specification", "spec", "color", "color", "color", "(s.n * 7) % :colors + 1"),
+
+    _entities("product", "product", ":products", "'Product ' || n"),
+    _values("values_text", "product", "product", "name", "'Product ' || s.n"),
+    _values("values_text", "product", "product", "description",
+            "'Synthetic product ' || s.n || ' for benchmarking relation expansion and value lookups.'"),
+    _values("values_number", "product", "product", "price", "((s.n * 7919) % 100000) / 100.0"),
+    _values("values_text", "product", "product", "sku", "'SKU-' || lpad(s.n::text, 8, '0')"),
+    _values("values_boolean", "product", "product", "in_stock", "s.n % 5 <> 0"),
+    _relation("product", "product", "specifications", "specification", "spec", "s.n"),
+    _relation_multi("product", "product", "related_products", "product", "product",
+                    ":related_products", "(s.n + k - 1) % :products + 1"),
+
+    _entities("blog_post", "post", ":posts", "'Post ' || n"),
+    _values("values_text", "blog_post", "post", "title", "'Post ' || s.n"),
+    _values("values_text", "blog_post", "post", "content", "repeat('Synthetic blog content. ', 20)"),
+    _values("values_text", "blog_post", "post", "author", "'Author ' || (s.n % 10 + 1)"),
+    _values("values_datetime", "blog_post", "post", "published_date",
+            "TIMESTAMP '2024-01-01' + s.n * INTERVAL '1 hour'"),
+    _values("values_boolean", "blog_post", "post", "featured", "s.n % 10 = 0"),
+    _relation_multi("blog_post", "post", "tags", "tag", "tag",
+                    ":tags_per_post", "(s.n * 13 + k * 7) % :tags + 1"),
+]
+
+
+def build_catalog(conn: Connection, size: CatalogSize) -> None:
+    """Insert the synthetic catalog with one set-based statement per attribute."""
+    params = vars(size)
+    for statement in BUILD_STATEMENTS:
+        conn.execute(text(statement), params)
+    entity_ids = conn.execute(
+        text("SELECT id FROM entities WHERE slug LIKE :prefix"), {"prefix": f"{SLUG_PREFIX}%"}
+    ).scalars().all()
+    conn.execute(text(REFRESH_SQL), {"entity_ids": entity_ids})
+    conn.execute(text("ANALYZE"))
+
+
+def drop_catalog(conn: Connection) -> int:
+    """Delete every synthetic entity; their values go with them through ON DELETE CASCADE."""
+    result = conn.execute(text("DELETE FROM entities WHERE slug LIKE :prefix"), {"prefix": f"{SLUG_PREFIX}%"})
+    return result.rowcount
@@ -0,0 +1,408 @@
+"""Generate large synthetic catalogs with COPY from parallel worker processes.
+
+Usage:
+    python -m benchmarks.generate --products 500000 --seed 42 --workers 8
+
+The catalog has the same shape and slugs as benchmarks.catalog, so a
+generated catalog can be benchmarked with benchmarks.run --skip-build. Values
+follow skewed, realistic distributions: log-normal prices and weights, sparse
+descriptions, power-law popularity of colors, tags and related products.
+
+Entity ids are reserved as one block up front, so every worker can compute
+the id of any entity it relates to. Each entity's values are drawn from a
+generator seeded with the seed, its kind and its number, so the same seed and
+sizes produce the same catalog whatever the worker count or chunk size.
+Entities are copied first and values second, so relations never point at a
+row that does not exist yet.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+
+from app.db import SQLALCHEMY_DATABASE_URL
+from app.search import REFRESH_SQL
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.pool import NullPool
+
+from benchmarks.catalog import SLUG_PREFIX, CatalogSize
+
+# Kinds in id order: (slug kind, entity type name)
+KINDS = [
+    ("color", "color"),
+    ("tag", "tag"),
+    ("measurement", "measurement"),
+    ("dimensions", "dimensions"),
+    ("spec", "specification"),
+    ("product", "product"),
+    ("post", "blog_post"),
+]
+
+VALUE_COLUMNS = {
+    "values_text": ("entity_id", "attribute_id", "value"),
+    "values_number": ("entity_id", "attribute_id", "value"),
+    "values_boolean": ("entity_id", "attribute_id", "value"),
+    "values_datetime": ("entity_id", "attribute_id", "value"),
+    "values_relation": ("entity_id", "attribute_id", "related_entity_id"),
+    "values_relation_multi": ("entity_id", "attribute_id", "related_entity_id", "sort_order"),
+}
+
+ADJECTIVES = [
+    "compact", "wireless", "classic", "ergonomic", "premium", "portable", "silent", "rugged", "modular",
+    "smart", "vintage", "slim", "heavy-duty", "adjustable", "foldable", "waterproof", "lightweight", "digital",
+]
+NOUNS = [
+    "keyboard", "headphones", "lamp", "backpack", "speaker", "charger", "monitor", "chair", "desk", "mouse",
+    "cable", "bottle", "jacket", "watch", "camera", "tripod", "router", "kettle", "blender", "notebook",
+]
+WORDS = [
+    "quality", "design", "everyday", "material", "battery", "comfort", "performance", "durable", "travel",
+    "office", "home", "outdoor", "sound", "light", "fast", "simple", "warranty", "premium", "colour", "size",
+]
+COLOR_NAMES = [
+    "Black", "White", "Gray", "Red", "Navy", "Olive", "Teal", "Sand", "Coral", "Slate", "Plum", "Mustard",
+]
+PUBLISHED_FROM = datetime(2022, 1, 1)
+
+
+@dataclass
+class Layout:
+    """Where each kind of entity lives in the reserved id block."""
+
+    first_id: int
+    counts: dict[str, int]
+    offsets: dict[str, int]
+    entity_type_ids: dict[str, int]
+    attributes: dict[tuple[str, str], int]
+    prefix: str
+
+    @classmethod
+    def plan(cls, first_id: int, size: CatalogSize, entity_type_ids, attributes, prefix: str) -> "Layout":
+        counts = {
+            "color": size.colors,
+            "tag": size.tags,
+            "measurement": size.products * 4,
+            "dimensions": size.products,
+            "spec": size.products,
+            "product": size.products,
+            "post": size.posts,
+        }
+        offsets, offset = {}, 0
+        for kind, _ in KINDS:
+            offsets[kind] = offset
+            offset += counts[kind]
+        return cls(first_id, counts, offsets, entity_type_ids, attributes, prefix)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def id(self, kind: str, n: int) -> int:
+        """Id of the nth (1-based) entity of a kind."""
+        return self.first_id + self.offsets[kind] + n - 1
+
+
+def _skewed(rng: random.Random, count: int, exponent: float = 2.5) -> int:
+    """Pick 1..count with a power-law bias towards low numbers, i.e. popular items."""
+    return min(int(count * rng.random() ** exponent) + 1, count)
+
+
+def _fan_out(rng: random.Random, mean: float, limit: int) -> int:
+    """Number of related items, geometrically distributed around mean."""
+    if mean <= 0 or limit <= 0:
+        return 0
+    return min(int(rng.expovariate(1 / mean) + 0.5), limit)
+
+
+def _distinct(rng: random.Random, count: int, population: int, exclude: int | None = None) -> list[int]:
+    picked: list[int] = []
+    attempts = 0
+    while len(picked) < count and attempts < count * 10:
+        attempts += 1
+        n = _skewed(rng, population)
+        if n != exclude and n not in picked:
+            picked.append(n)
+    return picked
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _entity_name(kind: str, n: int, rng: random.Random) -> str:
+    if kind == "product":
+        return f"{rng.choice(ADJECTIVES).capitalize()} {rng.choice(NOUNS)} {n}"
+    if kind == "post":
+        return f"{_sentence(rng, rng.randint(3, 8))[:-1]} {n}"
+    if kind == "color":
+        return f"{COLOR_NAMES[(n - 1) % len(COLOR_NAMES)]} {(n - 1) // len(COLOR_NAMES) + 1}"
+    if kind == "tag":
+        return f"{rng.choice(WORDS)}-{n}"
+    return f"{kind.capitalize()} {n}"
+
+
+def _values(
+    layout: Layout, size: CatalogSize, kind: str, n: int, name: str, rng: random.Random
+) -> Iterator[tuple[str, tuple]]:
+    """Yield (table, row) for every value of the nth entity of a kind named name."""
+    entity_id = layout.id(kind, n)
+
+    def attr(type_name: str, slug: str) -> int:
+        return layout.attributes[(type_name, slug)]
+
+    if kind == "color":
+        yield "values_text", (entity_id, attr("color", "name"), name)
+        yield "values_text", (entity_id, attr("color", "hex"), f"#{rng.getrandbits(24):06x}")
+    elif kind == "tag":
+        yield "values_text", (entity_id, attr("tag", "name"), name)
+        if size.colors:
+            yield "values_relation", (entity_id, attr("tag", "color"), layout.id("color", rng.randint(1, size.colors)))
+    elif kind == "measurement":
+        if (n - 1) % 4 == 0:
+            value, unit = round(rng.lognormvariate(0, 1), 3), "kg"
+        else:
+            value, unit = round(max(rng.gauss(30, 15), 0.5), 1), "cm"
+        yield "values_number", (entity_id, attr("measurement", "value"), value)
+        yield "values_text", (entity_id, attr("measurement", "unit"), unit)
+    elif kind == "dimensions":
+        for offset, slug in enumerate(("width", "height", "depth"), start=2):
+            measurement = layout.id("measurement", 4 * (n - 1) + offset)
+            yield "values_relation", (entity_id, attr("dimensions", slug), measurement)
+    elif kind == "spec":
+        yield "values_relation", (entity_id, attr("specification", "weight"), layout.id("measurement", 4 * (n - 1) + 1))
+        if rng.random() < 0.8:
+            yield "values_relation", (entity_id, attr("specification", "dimensions"), layout.id("dimensions", n))
+        if size.colors:
+            yield "values_relation", (
+                entity_id, attr("specification", "color"), layout.id("color", _skewed(rng, size.colors))
+            )
+    elif kind == "product":
+        yield "values_text", (entity_id, attr("product", "name"), name)
+        if rng.random() < 0.7:
+            yield "values_text", (entity_id, attr("product", "description"), _sentence(rng, rng.randint(8, 60)))
+        yield "values_number", (entity_id, attr("product", "price"), round(rng.lognormvariate(3.4, 1.0), 2))
+        yield "values_text", (entity_id, attr("product", "sku"), f"SKU-{n:08d}")
+        yield "values_boolean", (entity_id, attr("product", "in_stock"), rng.random() < 0.85)
+        if rng.random() < 0.9:
+            yield "values_relation", (entity_id, attr("product", "specifications"), layout.id("spec", n))
+        related = _distinct(rng, _fan_out(rng, size.related_products, 20), size.products, exclude=n)
+        for sort_order, target in enumerate(related):
+            yield "values_relation_multi", (
+                entity_id, attr("product", "related_products"), layout.id("product", target), sort_order
+            )
+    elif kind == "post":
+        yield "values_text", (entity_id, attr("blog_post", "title"), name)
+        if rng.random() < 0.5:
+            yield "values_text", (entity_id, attr("blog_post", "excerpt"), _sentence(rng, rng.randint(10, 30)))
+        paragraphs = rng.randint(1, 8)
+        yield "values_text", (
+            entity_id, attr("blog_post", "content"),
+            "\n\n".join(_sentence(rng, rng.randint(20, 80)) for _ in range(paragraphs)),
+        )
+        yield "values_text", (entity_id, attr("blog_post", "author"), f"Author {_skewed(rng, 50, 1.5)}")
+        published = PUBLISHED_FROM + timedelta(seconds=rng.randint(0, 3 * 365 * 86400))
+        yield "values_datetime", (entity_id, attr("blog_post", "published_date"), published)
+        yield "values_boolean", (entity_id, attr("blog_post", "featured"), rng.random() < 0.05)
+        tags = _distinct(rng, _fan_out(rng, size.tags_per_post, 12), size.tags)
+        for sort_order, target in enumerate(tags):
+            yield "values_relation_multi", (entity_id, attr("blog_post", "tags"), layout.id("tag", target), sort_order)
+
+
+def _rng(seed: int, kind: str, n: int, stream: int) -> random.Random:
+    """Generator for one entity; stream 0 draws its name and stream 1 its values."""
+    kind_index = next(i for i, (name, _) in enumerate(KINDS) if name == kind)
+    return random.Random((seed << 48) + (stream << 47) + (kind_index << 40) + n)
+
+
+@dataclass
+class Chunk:
+    phase: str
+    kind: str
+    first: int
+    last: int
+
+
+_engine: Engine | None = None
+_layout: Layout | None = None
+_size: CatalogSize | None = None
+_seed = 0
+
+
+def _init_worker(layout: Layout, size: CatalogSize, seed: int) -> None:
+    global _engine, _layout, _size, _seed
+    _engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    _layout, _size, _seed = layout, size, seed
+
+
+def _copy(cursor: Any, table: str, columns: tuple[str, ...], rows: list[tuple]) -> None:
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def _run_chunk(chunk: Chunk) -> dict[str, int]:
+    """Copy one chunk of entities or of their values in its own transaction."""
+    rows: dict[str, list[tuple]] = defaultdict(list)
+    type_name = dict(KINDS)[chunk.kind]
+    for n in range(chunk.first, chunk.last + 1) if chunk.phase != "search" else ():
+        name = _entity_name(chunk.kind, n, _rng(_seed, chunk.kind, n, 0))
+        if chunk.phase == "entities":
+            rows["entities"].append((
+                _layout.id(chunk.kind, n), _layout.entity_type_ids[type_name], name,
+                f"{_layout.prefix}{chunk.kind}-{n}",
+            ))
+        else:
+            for table, row in _values(_layout, _size, chunk.kind, n, name, _rng(_seed, chunk.kind, n, 1)):
+                rows[table].append(row)
+
+    with _engine.connect() as conn:
+        conn.execute(text("SET LOCAL synchronous_commit = off"))
+        if chunk.phase == "search":
+            conn.execute(
+                text(REFRESH_SQL),
+                {"entity_ids": [_layout.id(chunk.kind, n) for n in range(chunk.first, chunk.last + 1)]},
+            )
+            rows["search_vectors"] = [()] * (chunk.last - chunk.first + 1)
+        else:
+            with conn.connection.driver_connection.cursor() as cursor:
+                for table, table_rows in rows.items():
+                    columns = ("id", "entity_type_id", "name", "slug") if table == "entities" else VALUE_COLUMNS[table]
+                    _copy(cursor, table, columns, table_rows)
+        conn.commit()
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
+
+def reserve_ids(engine: Engine, count: int) -> int:
+    """Reserve a block of count entity ids and return the first one.
+
+    Inserts into entities are blocked while the sequence is moved past the
+    block, so no concurrent insert can take an id from it.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE entities IN SHARE ROW EXCLUSIVE MODE"))
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence('entities', 'id')")).scalar_one()
+        first_id = conn.execute(text("SELECT nextval(:sequence)"), {"sequence": sequence}).scalar_one()
+        conn.execute(
+            text("SELECT setval(:sequence, :last_id)"), {"sequence": sequence, "last_id": first_id + count - 1}
+        )
+    return first_id
+
+
+def _load_schema(engine: Engine) -> tuple[dict[str, int], dict[tuple[str, str], int]]:
+    with engine.connect() as conn:
+        entity_type_ids = dict(conn.execute(text("SELECT name, id FROM entity_types")).fetchall())
+        attributes = {
+            (row.type_name, row.slug): row.id
+            for row in conn.execute(text("""
+                SELECT a.id, a.slug, et.name AS type_name
+                FROM attributes a JOIN entity_types et ON et.id = a.entity_type_id
+            """))
+        }
+    return entity_type_ids, attributes
+
+
+def _chunks(layout: Layout, phase: str, chunk_size: int) -> list[Chunk]:
+    chunks = []
+    for kind, _ in KINDS:
+        for first in range(1, layout.counts[kind] + 1, chunk_size):
+            chunks.append(Chunk(phase, kind, first, min(first + chunk_size - 1, layout.counts[kind])))
+    return chunks
+
+
+def generate(
+    size: CatalogSize,
+    seed: int,
+    workers: int,
+    chunk_size: int,
+    prefix: str = SLUG_PREFIX,
+    search_vectors: bool = True,
+) -> dict[str, Any]:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    entity_type_ids, attributes = _load_schema(engine)
+    layout = Layout.plan(0, size, entity_type_ids, attributes, prefix)
+    layout.first_id = reserve_ids(engine, layout.total)
+
+    # Every entity's name is searchable, so the search phase covers every kind
+    phases = ["entities", "values", *(["search"] if search_vectors else [])]
+
+    rows: dict[str, int] = defaultdict(int)
+    timings = {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(layout, size, seed)) as pool:
+        for phase in phases:
+            started = time.perf_counter()
+            for counts in pool.map(_run_chunk, _chunks(layout, phase, chunk_size)):
+                for table, count in counts.items():
+                    rows[table] += count
+            timings[phase] = round(time.perf_counter() - started, 2)
+            print(f"{phase}: {timings[phase]}s", file=sys.stderr)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    timings["analyze"] = round(time.perf_counter() - started, 2)
+
+    values = sum(count for table, count in rows.items() if table.startswith("values_"))
+    return {
+        "seed": seed,
+        "catalog": asdict(size),
+        "first_id": layout.first_id,
+        "entities": rows["entities"],
+        "values": values,
+        "rows": dict(rows),
+        "seconds": timings,
+        "values_per_second": round(values / timings["values"]) if timings["values"] else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = CatalogSize()
+    parser = argparse.ArgumentParser(description="Generate a large synthetic catalog with parallel COPY")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--colors", type=int, default=200)
+    parser.add_argument("--tags", type=int, default=2_000)
+    parser.add_argument("--posts", type=int, default=20_000)
+    parser.add_argument("--related-products", type=int, default=defaults.related_products,
+                        help="Mean number of related products per product")
+    parser.add_argument("--tags-per-post", type=int, default=defaults.tags_per_post,
+                        help="Mean number of tags per blog post")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Entities per COPY transaction")
+    parser.add_argument("--prefix", default=SLUG_PREFIX, help="Slug prefix of the generated entities")
+    parser.add_argument("--drop", action="store_true", help="Delete entities with the slug prefix first")
+    parser.add_argument("--no-search-vectors", action="store_true", help="Skip building search vectors")
+    args = parser.parse_args(argv)
+    if args.seed < 0:
+        parser.error("--seed must not be negative")
+
+    size = CatalogSize(
+        products=args.products,
+        colors=args.colors,
+        tags=args.tags,
+        posts=args.posts,
+        related_products=args.related_products,
+        tags_per_post=args.tags_per_post,
+    )
+    if args.drop:
+        engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+        with engine.begin() as conn:
+            deleted = conn.execute(
+                text("DELETE FROM entities WHERE slug LIKE :prefix"), {"prefix": f"{args.prefix}%"}
+            ).rowcount
+        print(f"dropped {deleted} entities", file=sys.stderr)
+
+    summary = generate(size, args.seed, max(args.workers, 1), max(args.chunk_size, 1), args.prefix,
+                       not args.no_search_vectors)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Summaries of benchmark samples and comparison of two result files.
+
+Usage:
+    python -m benchmarks.results baseline.json current.json [--threshold 0.1]
+
+Exits with status 1 when a scenario's p95 latency grew by more than the
+threshold or it issues more queries per request than the baseline.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from typing import Any
+
+
+def summarize(latencies_ms: list[float]) -> dict[str, float]:
+    """Return p50/p95/p99, mean, min and max of latency samples in milliseconds."""
+    if len(latencies_ms) < 2:
+        value = latencies_ms[0] if latencies_ms else 0.0
+        return {key: round(value, 3) for key in ("p50", "p95", "p99", "mean", "min", "max")}
+    cuts = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49], 3),
+        "p95": round(cuts[94], 3),
+        "p99": round(cuts[98], 3),
+        "mean": round(statistics.fmean(latencies_ms), 3),
+        "min": round(min(latencies_ms), 3),
+        "max": round(max(latencies_ms), 3),
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float = 0.1) -> list[dict[str, Any]]:
+    """Compare the scenarios two result documents have in common.
+
+    Returns one row per scenario with the relative change of each latency
+    percentile and the change in queries per request; regressed is set when
+    p95 grew by more than threshold or more queries are issued.
+    """
+    rows = []
+    for name, scenario in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        row: dict[str, Any] = {"scenario": name}
+        for key in ("p50", "p95", "p99"):
+            before, after = base["latency_ms"][key], scenario["latency_ms"][key]
+            row[key] = (after - before) / before if before else 0.0
+        row["queries"] = scenario["queries_per_request"] - base["queries_per_request"]
+        row["regressed"] = row["p95"] > threshold or row["queries"] > 0
+        rows.append(row)
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed relative p95 increase")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'scenario':<28} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+    for row in rows:
+        print(
+            f"{row['scenario']:<28} {row['p50']:>+8.1%} {row['p95']:>+8.1%} {row['p99']:>+8.1%} "
+            f"{row['queries']:>+8.1f}{'  REGRESSED' if row['regressed'] else ''}"
+        )
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
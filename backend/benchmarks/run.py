@@ -0,0 +1,273 @@
+"""Latency benchmarks for the entity endpoints.
+
+Builds a synthetic catalog in the database from DATABASE_URL, then drives the
+app in-process through httpx and records, per scenario, latency percentiles,
+SQL statements per request and table rows scanned per request.
+
+Usage:
+    python -m benchmarks.run --products 5000 --requests 200 --output results.json
+
+Rows scanned are read from pg_stat_user_tables before and after each
+scenario. Postgres only publishes a backend's counters once it goes idle or
+exits, so the connection pool is disposed around every scenario; the numbers
+are reliable only when nothing else uses the database meanwhile.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+import httpx
+from app.db import async_engine, engine
+from app.document_cache import document_cache
+from app.instrumentation import access_logger
+from app.main import app
+from sqlalchemy import event, text
+
+from benchmarks.catalog import SLUG_PREFIX, CatalogSize, build_catalog, drop_catalog
+from benchmarks.results import summarize
+
+ROWS_SCANNED_SQL = """
+    SELECT coalesce(sum(seq_tup_read + coalesce(idx_tup_fetch, 0)), 0)
+    FROM pg_stat_user_tables
+    WHERE relname IN ('entities', 'entity_types', 'attributes', 'schema_version', 'values_text', 'values_number',
+                      'values_boolean', 'values_datetime', 'values_json', 'values_relation', 'values_relation_multi')
+"""
+
+Scenario = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class QueryCounter:
+    """Counts statements sent by the async engine."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+
+
+def rows_scanned() -> int:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_stat_clear_snapshot()"))
+        return int(conn.execute(text(ROWS_SCANNED_SQL)).scalar_one())
+
+
+async def _flush_statistics() -> None:
+    """Close pooled connections so their backends publish table statistics."""
+    await async_engine.dispose()
+    await asyncio.sleep(0.5)
+
+
+def catalog_targets() -> dict[str, Any]:
+    """Ids and slugs the scenarios pick their targets from."""
+    with engine.connect() as conn:
+        products = conn.execute(
+            text("SELECT id, slug FROM entities WHERE slug LIKE :prefix ORDER BY id"),
+            {"prefix": f"{SLUG_PREFIX}product-%"},
+        ).fetchall()
+        spec_ids = conn.execute(
+            text("SELECT id FROM entities WHERE slug LIKE :prefix ORDER BY id"), {"prefix": f"{SLUG_PREFIX}spec-%"}
+        ).scalars().all()
+        product_type_id = conn.execute(text("SELECT id FROM entity_types WHERE name = 'product'")).scalar_one()
+    if not products:
+        raise SystemExit("No synthetic catalog found; run without --skip-build first")
+    return {
+        "product_ids": [row.id for row in products],
+        "product_slugs": [row.slug for row in products],
+        "spec_ids": spec_ids,
+        "product_type_id": product_type_id,
+    }
+
+
+def build_scenarios(targets: dict[str, Any], run_id: str) -> dict[str, Scenario]:
+    product_ids = targets["product_ids"]
+    product_slugs = targets["product_slugs"]
+    spec_ids = targets["spec_ids"]
+    product_type_id = targets["product_type_id"]
+
+    def pick(items: list[Any], i: int) -> Any:
+        # Spread requests over the catalog with a stride coprime to most sizes
+        return items[(i * 7919) % len(items)]
+
+    def get_entity(depth: int) -> Scenario:
+        async def request(client: httpx.AsyncClient, i: int) -> httpx.Response:
+            return await client.get(f"/entities/{pick(product_ids, i)}", params={"depth": depth})
+        return request
+
+    async def get_entity_by_slug(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.get(f"/entities/by-slug/product/{pick(product_slugs, i)}")
+
+    cursors: list[str | None] = [None]
+
+    async def list_entities(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        params = {"entity_type_id": product_type_id, "limit": 50}
+        if cursors[-1]:
+            params["cursor"] = cursors[-1]
+        response = await client.get("/entities", params=params)
+        cursors.append(response.headers.get("X-Next-Cursor"))
+        return response
+
+    async def create_entity(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.post("/entities", json={
+            "entity_type_id": product_type_id,
+            "name": f"Created product {i}",
+            "slug": f"{SLUG_PREFIX}created-{run_id}-{i}",
+            "values": {
+                "name": f"Created product {i}",
+                "price": i % 1000 + 0.99,
+                "sku": f"NEW-{run_id}-{i}",
+                "in_stock": i % 2 == 0,
+                "specifications": pick(spec_ids, i),
+                "related_products": [pick(product_ids, i + k) for k in range(3)],
+            },
+        })
+
+    async def update_entity_values(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.patch(
+            f"/entities/{pick(product_ids, i)}/values",
+            json={"values": {"price": i % 1000 + 0.49, "in_stock": i % 3 != 0}},
+        )
+
+    return {
+        **{f"get_entity_depth_{depth}": get_entity(depth) for depth in range(6)},
+        "get_entity_by_slug": get_entity_by_slug,
+        "list_entities": list_entities,
+        "create_entity": create_entity,
+        "update_entity_values": update_entity_values,
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, requests: int, warmup: int, counter: QueryCounter
+) -> dict[str, Any]:
+    for i in range(warmup):
+        await scenario(client, requests + i)
+    await _flush_statistics()
+    scanned_before = rows_scanned()
+    # Open a pooled connection so the first measured request does not pay for it
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+    latencies = []
+    errors = 0
+    queries_before = counter.count
+    for i in range(requests):
+        started = time.perf_counter()
+        response = await scenario(client, i)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+    queries = counter.count - queries_before
+
+    await _flush_statistics()
+    scanned = rows_scanned() - scanned_before
+    return {
+        "requests": requests,
+        "errors": errors,
+        "latency_ms": summarize(latencies),
+        "queries_per_request": round(queries / requests, 2),
+        "rows_scanned_per_request": round(scanned / requests, 1),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace, size: CatalogSize) -> dict[str, Any]:
+    targets = catalog_targets()
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    scenarios = build_scenarios(targets, run_id)
+    selected = args.scenario or list(scenarios)
+    counter = QueryCounter()
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name in selected:
+            print(f"running {name}", file=sys.stderr)
+            results[name] = await run_scenario(client, scenarios[name], args.requests, args.warmup, counter)
+    await async_engine.dispose()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": run_id,
+            "python": platform.python_version(),
+            "catalog": asdict(size),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "document_cache": args.document_cache,
+        },
+        "scenarios": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = CatalogSize()
+    parser = argparse.ArgumentParser(description="Benchmark the entity endpoints against a synthetic catalog")
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--colors", type=int, default=defaults.colors)
+    parser.add_argument("--tags", type=int, default=defaults.tags)
+    parser.add_argument("--posts", type=int, default=defaults.posts)
+    parser.add_argument("--related-products", type=int, default=defaults.related_products)
+    parser.add_argument("--tags-per-post", type=int, default=defaults.tags_per_post)
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before each scenario")
+    parser.add_argument("--scenario", action="append", help="Run only this scenario; may be repeated")
+    parser.add_argument("--document-cache", action="store_true", help="Leave the entity document cache enabled")
+    parser.add_argument("--skip-build", action="store_true", help="Reuse the catalog left by a --keep run")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic catalog afterwards")
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    size = CatalogSize(
+        products=args.products,
+        colors=args.colors,
+        tags=args.tags,
+        posts=args.posts,
+        related_products=args.related_products,
+        tags_per_post=args.tags_per_post,
+    )
+    if not args.document_cache:
+        document_cache.max_entries = 0
+    access_logger.disabled = True
+
+    if not args.skip_build:
+        print("building catalog", file=sys.stderr)
+        with engine.begin() as conn:
+            drop_catalog(conn)
+            build_catalog(conn, size)
+        # Publish the build's table statistics before the first baseline
+        engine.dispose()
+    try:
+        results = asyncio.run(run(args, size))
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                drop_catalog(conn)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
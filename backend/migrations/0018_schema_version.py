@@ -0,0 +1,50 @@
+"""
+Track a schema version that is bumped whenever attributes or entity types change
+"""
+
+from yoyo import step
+
+__depends__ = {"0017_update_hex_attribute"}
+
+steps = [
+    step(
+        """
+        CREATE TABLE schema_version (
+            id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            version BIGINT NOT NULL DEFAULT 1
+        )
+        """,
+        "DROP TABLE schema_version"
+    ),
+    step(
+        "INSERT INTO schema_version (id, version) VALUES (TRUE, 1)",
+        "DELETE FROM schema_version"
+    ),
+    step(
+        """
+        CREATE FUNCTION bump_schema_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE schema_version SET version = version + 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP FUNCTION bump_schema_version()"
+    ),
+    step(
+        """
+        CREATE TRIGGER attributes_schema_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON attributes
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_schema_version()
+        """,
+        "DROP TRIGGER attributes_schema_version ON attributes"
+    ),
+    step(
+        """
+        CREATE TRIGGER entity_types_schema_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON entity_types
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_schema_version()
+        """,
+        "DROP TRIGGER entity_types_schema_version ON entity_types"
+    ),
+]
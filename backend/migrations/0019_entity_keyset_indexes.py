@@ -0,0 +1,19 @@
+"""
+Add composite index supporting keyset pagination of entity lists
+"""
+
+from yoyo import step
+
+__depends__ = {"0018_schema_version"}
+
+steps = [
+    step(
+        "CREATE INDEX idx_entities_type_name_id ON entities(entity_type_id, name, id)",
+        "DROP INDEX idx_entities_type_name_id"
+    ),
+    # The composite index covers every lookup the single-column one served
+    step(
+        "DROP INDEX idx_entities_type",
+        "CREATE INDEX idx_entities_type ON entities(entity_type_id)"
+    ),
+]
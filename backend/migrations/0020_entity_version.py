@@ -0,0 +1,14 @@
+"""
+Add a version to entities, bumped on every value write, for ETags
+"""
+
+from yoyo import step
+
+__depends__ = {"0019_entity_keyset_indexes"}
+
+steps = [
+    step(
+        "ALTER TABLE entities ADD COLUMN version BIGINT NOT NULL DEFAULT 1",
+        "ALTER TABLE entities DROP COLUMN version"
+    ),
+]
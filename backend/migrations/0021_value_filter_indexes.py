@@ -0,0 +1,31 @@
+"""
+Add (attribute_id, value, entity_id) indexes so attribute filters are index-only scans
+"""
+
+from yoyo import step
+
+__depends__ = {"0020_entity_version"}
+
+steps = [
+    step(
+        "CREATE INDEX idx_values_number_attr_value ON values_number(attribute_id, value, entity_id)",
+        "DROP INDEX idx_values_number_attr_value"
+    ),
+    step(
+        "CREATE INDEX idx_values_boolean_attr_value ON values_boolean(attribute_id, value, entity_id)",
+        "DROP INDEX idx_values_boolean_attr_value"
+    ),
+    step(
+        "CREATE INDEX idx_values_datetime_attr_value ON values_datetime(attribute_id, value, entity_id)",
+        "DROP INDEX idx_values_datetime_attr_value"
+    ),
+    # Long textarea values do not fit in a btree entry, so only values up to
+    # app.filters.TEXT_INDEX_MAX_BYTES are indexed
+    step(
+        """
+        CREATE INDEX idx_values_text_attr_value ON values_text(attribute_id, value, entity_id)
+        WHERE octet_length(value) <= 2000
+        """,
+        "DROP INDEX idx_values_text_attr_value"
+    ),
+]
@@ -0,0 +1,31 @@
+"""
+Add a maintained full-text search vector to entities with a GIN index
+"""
+
+from yoyo import step
+
+__depends__ = {"0021_value_filter_indexes"}
+
+steps = [
+    step(
+        "ALTER TABLE entities ADD COLUMN search_vector tsvector NOT NULL DEFAULT ''",
+        "ALTER TABLE entities DROP COLUMN search_vector"
+    ),
+    # Same weighting as app.search: entity name A, text B, textarea C
+    step(
+        """
+        UPDATE entities e
+        SET search_vector = setweight(to_tsvector('english', coalesce(e.name, '')), 'A') || (
+            SELECT coalesce(setweight(to_tsvector('english', string_agg(v.value, ' ') FILTER (WHERE a.type = 'text')), 'B'), '')
+                || coalesce(setweight(to_tsvector('english', string_agg(v.value, ' ') FILTER (WHERE a.type = 'textarea')), 'C'), '')
+            FROM values_text v
+            JOIN attributes a ON a.id = v.attribute_id
+            WHERE v.entity_id = e.id
+        )
+        """
+    ),
+    step(
+        "CREATE INDEX idx_entities_search_vector ON entities USING GIN (search_vector)",
+        "DROP INDEX idx_entities_search_vector"
+    ),
+]
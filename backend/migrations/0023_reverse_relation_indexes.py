@@ -0,0 +1,27 @@
+"""
+Index relation tables by target so reverse lookups and deletes avoid sequential scans
+"""
+
+from yoyo import step
+
+__depends__ = {"0022_entity_search_vector"}
+
+steps = [
+    # entity_id is included so "referenced by" pages are index-only scans in
+    # (attribute_id, entity_id) order
+    step(
+        "CREATE INDEX idx_values_relation_related_attr ON values_relation(related_entity_id, attribute_id, entity_id)",
+        "DROP INDEX idx_values_relation_related_attr"
+    ),
+    step(
+        "DROP INDEX idx_values_relation_related",
+        "CREATE INDEX idx_values_relation_related ON values_relation(related_entity_id)"
+    ),
+    step(
+        """
+        CREATE INDEX idx_values_relation_multi_related_attr
+        ON values_relation_multi(related_entity_id, attribute_id, entity_id)
+        """,
+        "DROP INDEX idx_values_relation_multi_related_attr"
+    ),
+]
@@ -0,0 +1,18 @@
+"""
+Index a prefix of text values so lists sorted by a text attribute read them in index order
+"""
+
+from yoyo import step
+
+__depends__ = {"0023_reverse_relation_indexes"}
+
+steps = [
+    # idx_values_text_attr_value only covers values up to 2000 bytes, so it
+    # cannot serve an ORDER BY over all of them. 500 characters are at most
+    # 2000 bytes in UTF-8 and always fit in a btree entry; the sort compares
+    # full values within equal prefixes (app.routers.entities.TEXT_SORT_PREFIX)
+    step(
+        "CREATE INDEX idx_values_text_attr_sort ON values_text(attribute_id, left(value, 500), entity_id)",
+        "DROP INDEX idx_values_text_attr_sort"
+    ),
+]
@@ -0,0 +1,22 @@
+"""
+Rebuild the text sort index with the C collation
+"""
+
+from yoyo import step
+
+__depends__ = {"0024_text_sort_index"}
+
+steps = [
+    # Ordering by a prefix and then by the full value only equals ordering by
+    # the full value when strings compare character by character. Linguistic
+    # collations (glibc or ICU locales) compare whole strings in several
+    # passes, so text sorts and their cursors use COLLATE "C" throughout.
+    step(
+        "DROP INDEX idx_values_text_attr_sort",
+        "CREATE INDEX idx_values_text_attr_sort ON values_text(attribute_id, left(value, 500), entity_id)"
+    ),
+    step(
+        'CREATE INDEX idx_values_text_attr_sort ON values_text(attribute_id, (left(value, 500) COLLATE "C"), entity_id)',
+        "DROP INDEX idx_values_text_attr_sort"
+    ),
+]
@@ -1,9 +1,212 @@
+import asyncio
+import json
+import os
+from typing import Any
+
 import pytest
+from app.db import DATABASE_URL, get_db
+from app.document_cache import document_cache
+from app.instrumentation import instrument_engine, statement_table
 from app.main import app
+from app.routers import entities, graphql
+from app.schema_cache import ATTRIBUTE_TYPE_TABLES, schema_cache
+from app.search import REFRESH_SQL
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+# A migrated database the tests may empty; tests that need a database are skipped without it
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+CATALOG_TABLES = ("entity_types", "attributes", "entities", *sorted(set(ATTRIBUTE_TYPE_TABLES.values())))
 
 
 @pytest.fixture
 def client():
     """Create a test client for the FastAPI app."""
     return TestClient(app)
+
+
+class Database:
+    """The test database, seeded through builder methods and observed through the app's statements.
+
+    Builders commit straight away, so every request, streamed export and
+    concurrent connection sees the same data. Statements the app executes
+    are kept in statements as (sql, parameters) and its commits counted in
+    commits; the builders' own statements are not recorded.
+    """
+
+    def __init__(self, sync_engine, async_engine):
+        self.sync_engine = sync_engine
+        self.async_engine = async_engine
+        self.sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        self.entity_types: dict[int, str] = {}
+        self.attributes: dict[int, dict[str, Any]] = {}
+        self.entities: dict[int, dict[str, Any]] = {}
+        self.statements: list[tuple[str, Any]] = []
+        self.commits = 0
+
+    def reset(self) -> None:
+        with self.sync_engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE {', '.join(CATALOG_TABLES)} RESTART IDENTITY CASCADE"))
+
+    def execute(self, sql: str, params: dict[str, Any] | None = None) -> list[Any]:
+        """Run a statement in its own transaction and return its rows, if any."""
+        with self.sync_engine.begin() as conn:
+            result = conn.execute(text(sql), params or {})
+            return result.fetchall() if result.returns_rows else []
+
+    def run(self, function, *args, **kwargs) -> Any:
+        """Call an async app function with a new session as its first argument."""
+        async def call():
+            async with self.sessions() as session:
+                return await function(session, *args, **kwargs)
+        return asyncio.run(call())
+
+    def add_type(self, type_id: int, name: str) -> None:
+        self.execute("INSERT INTO entity_types (id, name) VALUES (:id, :name)", {"id": type_id, "name": name})
+        self._advance_sequence("entity_types")
+        self.entity_types[type_id] = name
+
+    def add_attribute(self, attribute_id: int, entity_type_id: int, slug: str, type: str, related_type_id=None):
+        self.execute("""
+            INSERT INTO attributes (id, entity_type_id, name, slug, type, related_entity_type_id, sort_order)
+            VALUES (:id, :entity_type_id, :name, :slug, CAST(:type AS attribute_type), :related, :id)
+        """, {"id": attribute_id, "entity_type_id": entity_type_id, "name": slug.replace("-", " ").title(),
+              "slug": slug, "type": type, "related": related_type_id})
+        self._advance_sequence("attributes")
+        self.attributes[attribute_id] = {
+            "id": attribute_id, "entity_type_id": entity_type_id, "slug": slug, "type": type,
+            "related_entity_type_id": related_type_id,
+        }
+
+    def add_entity(self, entity_id: int, entity_type_id: int, name: str | None = None, **values) -> None:
+        """Add an entity named after its type unless named; underscores in value names stand for dashes."""
+        name = name or f"{self.entity_types[entity_type_id].title()} {entity_id}"
+        slug = name.lower().replace(" ", "-")
+        self.execute(
+            "INSERT INTO entities (id, entity_type_id, name, slug) VALUES (:id, :entity_type_id, :name, :slug)",
+            {"id": entity_id, "entity_type_id": entity_type_id, "name": name, "slug": slug},
+        )
+        self._advance_sequence("entities")
+        self.entities[entity_id] = {"id": entity_id, "name": name, "slug": slug, "entity_type_id": entity_type_id}
+        for slug, value in values.items():
+            self.set_value(entity_id, slug.replace("_", "-"), value)
+        self.execute(REFRESH_SQL, {"entity_ids": [entity_id]})
+
+    def set_value(self, entity_id: int, slug: str, value: Any) -> None:
+        attr = self._attribute(entity_id, slug)
+        table = ATTRIBUTE_TYPE_TABLES[attr["type"]]
+        if table == "values_relation_multi":
+            for sort_order, related_id in enumerate(value):
+                self.execute(
+                    "INSERT INTO values_relation_multi (entity_id, attribute_id, related_entity_id, sort_order) "
+                    "VALUES (:entity_id, :attribute_id, :related, :sort_order)",
+                    {"entity_id": entity_id, "attribute_id": attr["id"], "related": related_id,
+                     "sort_order": sort_order},
+                )
+            return
+        column = "related_entity_id" if table == "values_relation" else "value"
+        placeholder = "CAST(:value AS jsonb)" if table == "values_json" else ":value"
+        self.execute(
+            f"INSERT INTO {table} (entity_id, attribute_id, {column}) VALUES (:entity_id, :attribute_id, {placeholder})",
+            {"entity_id": entity_id, "attribute_id": attr["id"],
+             "value": json.dumps(value) if table == "values_json" else value},
+        )
+
+    def value(self, entity_id: int, slug: str) -> Any:
+        """Stored value of an attribute, as a list of ids for multi relations."""
+        attr = self._attribute(entity_id, slug)
+        table = ATTRIBUTE_TYPE_TABLES[attr["type"]]
+        column = "related_entity_id" if table.startswith("values_relation") else "value"
+        order = "sort_order" if table == "values_relation_multi" else "id"
+        rows = self.execute(
+            f"SELECT {column} FROM {table} WHERE entity_id = :entity_id AND attribute_id = :attribute_id ORDER BY {order}",
+            {"entity_id": entity_id, "attribute_id": attr["id"]},
+        )
+        values = [row[0] for row in rows]
+        if table == "values_relation_multi":
+            return values
+        return values[0] if values else None
+
+    def version(self, entity_id: int) -> int | None:
+        rows = self.execute("SELECT version FROM entities WHERE id = :id", {"id": entity_id})
+        return rows[0][0] if rows else None
+
+    def entity_ids(self) -> list[int]:
+        return [row[0] for row in self.execute("SELECT id FROM entities ORDER BY id")]
+
+    @property
+    def reads(self) -> list[tuple[str, list[int]]]:
+        """Value table reads of the app as (table, requested entity ids), in order."""
+        return [
+            (f"values_{table}", list(params["entity_ids"]))
+            for sql, params in self.statements
+            if sql.lstrip().upper().startswith("SELECT") and isinstance(params, dict) and "entity_ids" in params
+            and (table := statement_table(sql))
+        ]
+
+    def read_count(self, table: str) -> int:
+        """Number of queries that read a value table."""
+        return sum(name == table for name, _ in self.reads)
+
+    def _attribute(self, entity_id: int, slug: str) -> dict[str, Any]:
+        [row] = self.execute("""
+            SELECT a.id, a.type FROM attributes a JOIN entities e ON e.entity_type_id = a.entity_type_id
+            WHERE e.id = :entity_id AND a.slug = :slug
+        """, {"entity_id": entity_id, "slug": slug})
+        return {"id": row.id, "type": row.type}
+
+    def _advance_sequence(self, table: str) -> None:
+        """Keep ids the database assigns clear of the ids the tests chose."""
+        self.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+
+
+@pytest.fixture(scope="session")
+def engines():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    if TEST_DATABASE_URL == DATABASE_URL:
+        pytest.fail("TEST_DATABASE_URL must not be DATABASE_URL; every test empties it")
+    url = TEST_DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
+    # NullPool: each TestClient request runs in its own event loop
+    sync_engine = create_engine(url, poolclass=NullPool)
+    async_engine = create_async_engine(url, poolclass=NullPool)
+    instrument_engine(async_engine.sync_engine)
+    yield sync_engine, async_engine
+    sync_engine.dispose()
+
+
+@pytest.fixture
+def db(client, engines, monkeypatch):
+    """The emptied test database, serving the app in place of DATABASE_URL with empty process caches."""
+    database = Database(*engines)
+    database.reset()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        database.statements.append((statement, parameters))
+
+    def count_commit(conn):
+        database.commits += 1
+
+    async def override():
+        async with database.sessions() as session:
+            yield session
+
+    listened = [(database.async_engine.sync_engine, "before_cursor_execute", record),
+                (database.async_engine.sync_engine, "commit", count_commit)]
+    for target, name, listener in listened:
+        event.listen(target, name, listener)
+    schema_cache.invalidate()
+    document_cache.clear()
+    graphql._schema = None
+    monkeypatch.setattr(entities, "AsyncSessionLocal", database.sessions)
+    client.app.dependency_overrides[get_db] = override
+    yield database
+    client.app.dependency_overrides.clear()
+    for target, name, listener in listened:
+        event.remove(target, name, listener)
+    schema_cache.invalidate()
+    document_cache.clear()
+    graphql._schema = None
@@ -0,0 +1,26 @@
+def test_batch_update_reports_per_entity_status(client, db):
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    db.add_attribute(2, 1, "price", "number")
+    db.add_attribute(5, 1, "tags", "relation_multi", related_type_id=2)
+    for entity_id in (1, 2, 3):
+        db.add_entity(entity_id, 1)
+    db.add_entity(7, 2)
+
+    response = client.patch("/entities/values", params={"chunk_size": 1}, json=[
+        {"entity_id": 1, "values": {"price": 10}},
+        {"entity_id": 2, "values": {"price": "cheap"}},
+        {"entity_id": 3, "values": {"tags": [7, 8]}},
+        {"entity_id": 4, "values": {"price": 1}},
+        {"entity_id": 3, "values": {"price": 12, "tags": [7]}},
+    ])
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["updated"], data["failed"]) == (2, 3)
+    assert [result["status"] for result in data["results"]] == ["updated", "invalid", "invalid", "not_found", "updated"]
+    assert data["results"][2]["error"] == "related entity 8 does not exist"
+    assert [db.value(1, "price"), db.value(2, "price"), db.value(3, "price")] == [10, None, 12]
+    assert db.value(3, "tags") == [7]
+    assert [db.version(entity_id) for entity_id in (1, 2, 3)] == [2, 1, 2]
+    assert db.commits == 2
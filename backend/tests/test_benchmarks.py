@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+from benchmarks.catalog import CatalogSize
+from benchmarks.generate import KINDS, Layout, _entity_name, _rng, _values
+from benchmarks.results import compare, summarize
+
+
+def test_summarize_reports_percentiles():
+    summary = summarize([float(ms) for ms in range(1, 101)])
+
+    assert summary["p50"] == 50.5
+    assert summary["p95"] == 95.05
+    assert summary["p99"] == 99.01
+    assert (summary["min"], summary["max"]) == (1.0, 100.0)
+
+
+def test_compare_flags_latency_and_query_regressions():
+    def result(p95, queries):
+        return {"latency_ms": {"p50": 10.0, "p95": p95, "p99": 30.0}, "queries_per_request": queries}
+
+    baseline = {"scenarios": {"get": result(20.0, 7), "list": result(20.0, 1), "gone": result(1.0, 1)}}
+    current = {"scenarios": {"get": result(21.0, 7), "list": result(20.0, 2), "new": result(5.0, 1)}}
+
+    rows = {row["scenario"]: row for row in compare(baseline, current, threshold=0.1)}
+
+    assert set(rows) == {"get", "list"}
+    assert rows["get"]["p95"] == 0.05 and not rows["get"]["regressed"]
+    assert rows["list"]["queries"] == 1 and rows["list"]["regressed"]
+
+
+def test_generated_values_are_deterministic_and_stay_in_the_id_block():
+    size = CatalogSize(products=50, colors=5, tags=10, posts=20)
+    attributes = defaultdict(lambda: 1)
+    layout = Layout.plan(1000, size, {}, attributes, "bench-")
+
+    def rows(kind, n):
+        name = _entity_name(kind, n, _rng(3, kind, n, 0))
+        return list(_values(layout, size, kind, n, name, _rng(3, kind, n, 1)))
+
+    assert rows("product", 7) == rows("product", 7)
+    assert rows("product", 7) != rows("product", 8)
+
+    last_id = layout.first_id + layout.total - 1
+    for kind, _ in KINDS:
+        for n in range(1, layout.counts[kind] + 1):
+            entity_rows = rows(kind, n)
+            related = [row[2] for table, row in entity_rows if table.startswith("values_relation")]
+            assert all(layout.first_id <= entity_id <= last_id for entity_id in related)
+            multi = [row[2] for table, row in entity_rows if table == "values_relation_multi"]
+            assert len(multi) == len(set(multi)) and layout.id(kind, n) not in multi
@@ -0,0 +1,163 @@
+import pytest
+from app import bulk
+from app.bulk import BulkImportError, check_value, parse_bulk_body
+
+
+def test_parse_json_array():
+    assert parse_bulk_body(b'[{"a": 1}, {"a": 2}]', "application/json") == [{"a": 1}, {"a": 2}]
+
+
+def test_parse_ndjson_skips_blank_lines():
+    body = b'{"a": 1}\n\n{"a": 2}\n'
+    assert parse_bulk_body(body, "application/x-ndjson") == [{"a": 1}, {"a": 2}]
+
+
+def test_parse_rejects_non_array():
+    with pytest.raises(BulkImportError):
+        parse_bulk_body(b'{"a": 1}', "application/json")
+
+
+def test_check_value_by_attribute_type():
+    assert check_value("number", 12.5) is None
+    assert check_value("number", True) == "expected a number"
+    assert check_value("datetime", "2024-01-31T10:00:00") is None
+    assert check_value("datetime", "yesterday") is not None
+    assert check_value("relation", {"ref": "tag-1"}) is None
+    assert check_value("relation_multi", [1, {"id": 2}, {"ref": "x"}]) is None
+    assert check_value("relation_multi", [1, "two"]) is not None
+
+
+def test_import_copies_every_value_type(client, db):
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    for attribute_id, slug, type in ((1, "title", "text"), (2, "price", "number"), (3, "in-stock", "boolean"),
+                                     (4, "released", "datetime"), (5, "specs", "json")):
+        db.add_attribute(attribute_id, 1, slug, type)
+    db.add_attribute(6, 1, "tags", "relation_multi", related_type_id=2)
+    db.add_entity(7, 2)
+
+    response = client.post("/entities/bulk", json=[{
+        "entity_type_id": 1, "name": "Oak Table", "slug": "oak-table",
+        "values": {"title": "Table", "price": 12.5, "in-stock": True, "released": "2024-01-31T10:00:00",
+                   "specs": {"legs": 4}, "tags": [7]},
+    }])
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"], data["values"]) == (1, 0, 6)
+    document = client.get(f"/entities/{data['ids'][0]}", params={"expand": ""}).json()
+    assert document["values"] == {
+        "title": "Table", "price": 12.5, "in-stock": True, "released": "2024-01-31T10:00:00",
+        "specs": {"legs": 4}, "tags": [{"id": 7, "name": "Tag 7", "slug": "tag-7"}],
+    }
+    assert [entity["id"] for entity in client.get("/entities/search", params={"q": "oak"}).json()] == data["ids"]
+
+
+def _catalog(db):
+    """Products with a main tag and tags; tag 7 and product "taken" already exist."""
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    db.add_attribute(1, 1, "price", "number")
+    db.add_attribute(2, 1, "main-tag", "relation", related_type_id=2)
+    db.add_attribute(3, 1, "tags", "relation_multi", related_type_id=2)
+    db.add_attribute(4, 2, "label", "text")
+    db.add_entity(7, 2, "Sale")
+    db.add_entity(8, 1, "Taken")
+
+
+def _import(client, rows):
+    response = client.post("/entities/bulk", json=rows)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_import_resolves_refs_to_rows_in_the_batch(client, db):
+    _catalog(db)
+
+    data = _import(client, [
+        {"entity_type_id": 1, "name": "Table", "slug": "table",
+         "values": {"main-tag": {"ref": "new"}, "tags": [{"ref": "new"}, 7, {"id": 7}, {"ref": "old"}]}},
+        {"entity_type_id": 2, "name": "New", "slug": "new", "ref": "new", "values": {"label": "Fresh"}},
+        {"entity_type_id": 2, "name": "Old", "slug": "old", "ref": "old"},
+    ])
+
+    assert (data["created"], data["failed"], data["errors"]) == (3, 0, [])
+    table, new, old = data["ids"]
+    assert db.value(table, "main-tag") == new
+    # Duplicates are dropped; the remaining relations keep the order they were given in
+    assert db.value(table, "tags") == [new, 7, old]
+    assert db.value(new, "label") == "Fresh"
+
+
+def test_import_reports_invalid_rows_and_creates_the_rest(client, db):
+    _catalog(db)
+
+    data = _import(client, [
+        {"entity_type_id": 1, "name": "A", "slug": "a", "values": {"price": "cheap"}},
+        {"entity_type_id": 1, "name": "B", "slug": "b", "values": {"weight": 1}},
+        {"entity_type_id": 9, "name": "C", "slug": "c"},
+        {"entity_type_id": 1, "name": "D", "slug": "d", "values": {"tags": [99]}},
+        {"entity_type_id": 1, "name": "E", "slug": "e", "values": {"main-tag": {"ref": "nowhere"}}},
+        {"entity_type_id": 1, "name": "F", "slug": "f", "values": {"price": 5}},
+        {"entity_type_id": 1, "name": "F again", "slug": "f"},
+        {"name": "G", "slug": "g"},
+    ])
+
+    assert (data["created"], data["failed"]) == (1, 7)
+    assert data["errors"] == [
+        {"row": 0, "error": "price: expected a number"},
+        {"row": 1, "error": "Unknown attribute: weight"},
+        {"row": 2, "error": "Invalid entity type"},
+        {"row": 3, "error": "related entity 99 does not exist"},
+        {"row": 4, "error": "main-tag: unknown ref 'nowhere'"},
+        {"row": 6, "error": "duplicate slug in batch (row 5)"},
+        {"row": 7, "error": "entity_type_id: Field required"},
+    ]
+    assert data["ids"][:5] == [None] * 5 and data["ids"][6:] == [None, None]
+    assert db.value(data["ids"][5], "price") == 5
+    assert len(db.entity_ids()) == 3
+
+
+def test_import_fails_rows_that_reference_an_existing_slug(client, db):
+    _catalog(db)
+
+    data = _import(client, [
+        {"entity_type_id": 1, "name": "Taken", "slug": "taken", "ref": "taken"},
+        {"entity_type_id": 1, "name": "Chair", "slug": "chair", "ref": "chair", "values": {"tags": [7]}},
+        {"entity_type_id": 1, "name": "Stool", "slug": "stool", "values": {"price": 3, "main-tag": {"ref": "taken"}}},
+    ])
+
+    assert data["errors"] == [
+        {"row": 0, "error": "slug already exists"},
+        {"row": 2, "error": "references failed row 0"},
+    ]
+    assert data["ids"][0] is None and data["ids"][2] is None
+    assert db.value(data["ids"][1], "tags") == [7]
+    assert len(db.entity_ids()) == 3
+
+
+def test_rows_depending_on_a_row_that_lost_a_slug_race_are_not_written(client, db, monkeypatch):
+    _catalog(db)
+    fail_dependents = bulk._fail_dependents
+
+    def insert_concurrently(dependencies, errors):
+        """Commit an entity with the batch's slug after the import checked for existing slugs."""
+        if not db.execute("SELECT 1 FROM entities WHERE slug = 'racy'"):
+            db.add_entity(50, 2, "Racy")
+        fail_dependents(dependencies, errors)
+
+    monkeypatch.setattr(bulk, "_fail_dependents", insert_concurrently)
+    data = _import(client, [
+        {"entity_type_id": 2, "name": "Racy", "slug": "racy", "ref": "racy"},
+        {"entity_type_id": 1, "name": "Table", "slug": "table", "values": {"price": 9, "tags": [{"ref": "racy"}]}},
+        {"entity_type_id": 1, "name": "Chair", "slug": "chair", "values": {"price": 4}},
+    ])
+
+    assert data["errors"] == [
+        {"row": 0, "error": "slug already exists"},
+        {"row": 1, "error": "references failed row 0"},
+    ]
+    assert data["ids"][:2] == [None, None]
+    assert db.execute("SELECT slug FROM entities WHERE entity_type_id = 1 ORDER BY slug") == [("chair",), ("taken",)]
+    assert db.value(data["ids"][2], "price") == 4
+    assert data["values"] == 1
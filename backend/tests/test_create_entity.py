@@ -0,0 +1,22 @@
+def test_create_entity_writes_values(client, db):
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    db.add_attribute(1, 1, "title", "text")
+    db.add_attribute(2, 1, "tags", "relation_multi", related_type_id=2)
+    db.add_entity(10, 2)
+
+    response = client.post("/entities", json={
+        "entity_type_id": 1, "name": "Oak Table", "slug": "oak-table",
+        "values": {"title": "Table", "tags": [10], "weight": 3},
+    })
+
+    assert response.status_code == 201
+    data = response.json()
+    assert (data["name"], data["entity_type_name"]) == ("Oak Table", "product")
+    assert data["values"] == {"title": "Table", "tags": [{"id": 10, "name": "Tag 10", "slug": "tag-10"}]}
+    assert (db.value(data["id"], "title"), db.value(data["id"], "tags")) == ("Table", [10])
+
+
+def test_create_entity_rejects_unknown_type(client, db):
+    response = client.post("/entities", json={"entity_type_id": 9, "name": "X", "slug": "x"})
+    assert response.status_code == 400
@@ -0,0 +1,62 @@
+import pytest
+from app.routers import entities
+
+
+def _catalog(db):
+    db.add_type(1, "product")
+    db.add_attribute(1, 1, "title", "text")
+    db.add_attribute(2, 1, "price", "number")
+    db.add_attribute(3, 1, "related", "relation_multi", related_type_id=1)
+    for entity_id in range(1, 6):
+        db.add_entity(entity_id, 1, title=f"P{entity_id}", price=entity_id)
+    db.add_entity(6, 1, related=[1, 2])
+
+
+def test_bulk_delete_runs_in_batches(client, db, monkeypatch):
+    monkeypatch.setattr(entities, "DELETE_BATCH_SIZE", 2)
+    _catalog(db)
+
+    response = client.request("DELETE", "/entities", json={"ids": [5, 1, 2, 3, 99]})
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 4, "values": 8, "relations": 0, "incoming_relations": 2, "batches": 2}
+    assert db.entity_ids() == [4, 6]
+    assert db.value(6, "related") == []
+    # The referrer changed with the deletion
+    assert db.version(6) == 2
+    assert db.commits == 1
+
+
+def test_bulk_delete_needs_a_selection(client):
+    response = client.request("DELETE", "/entities")
+    assert response.status_code == 400
+
+
+def test_delete_missing_entity(client, db):
+    _catalog(db)
+
+    response = client.delete("/entities/7")
+
+    assert response.status_code == 404
+    assert len(db.entity_ids()) == 6
+
+
+
+# Tags are stubs in both documents, so neither lists them as embedded
+@pytest.mark.parametrize("params", [{"expand": ""}, {"fields": "tags", "expand": ""}])
+def test_deleting_a_stubbed_entity_refreshes_cached_referrer_documents(client, db, params):
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    db.add_attribute(1, 1, "price", "number")
+    db.add_attribute(2, 1, "tags", "relation_multi", related_type_id=2)
+    db.add_entity(10, 2)
+    db.add_entity(11, 2)
+    db.add_entity(1, 1, price=5, tags=[10, 11])
+    cached = client.get("/entities/1", params=params)
+    assert [tag["id"] for tag in cached.json()["values"]["tags"]] == [10, 11]
+
+    assert client.delete("/entities/10").status_code == 204
+    response = client.get("/entities/1", params=params, headers={"If-None-Match": cached.headers["ETag"]})
+
+    assert response.status_code == 200
+    assert [tag["id"] for tag in response.json()["values"]["tags"]] == [11]
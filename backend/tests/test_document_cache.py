@@ -0,0 +1,50 @@
+from app.document_cache import DocumentCache
+
+
+def _put(cache, key, embedded, document=None):
+    cache.put(key, 1, f'"{key}"', document or {"id": key}, embedded, cache.generation)
+
+
+def test_write_evicts_documents_embedding_the_entity():
+    cache = DocumentCache(max_entries=10, max_bytes=10_000, ttl=60)
+    _put(cache, "product", {1, 5})
+    _put(cache, "spec", {5})
+    _put(cache, "other", {2})
+
+    cache.invalidate([5])
+
+    assert cache.get("product", 1) is None
+    assert cache.get("spec", 1) is None
+    assert cache.get("other", 1).etag == '"other"'
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = DocumentCache(max_entries=2, max_bytes=10_000, ttl=60)
+    _put(cache, "a", {1})
+    _put(cache, "b", {2})
+    cache.get("a", 1)
+    _put(cache, "c", {3})
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_bound_and_stale_entries():
+    cache = DocumentCache(max_entries=10, max_bytes=100, ttl=60)
+    _put(cache, "big", {1}, {"text": "x" * 200})
+    assert cache.get("big", 1) is None
+
+    _put(cache, "doc", {1})
+    assert cache.get("doc", 2) is None  # schema changed since it was cached
+    assert cache.stats()["bytes"] == 0
+
+
+def test_document_loaded_during_a_write_is_not_stored():
+    cache = DocumentCache(max_entries=10, max_bytes=10_000, ttl=60)
+    generation = cache.generation
+    cache.invalidate([7])
+    cache.put("doc", 1, '"doc"', {"id": 1}, {1}, generation)
+
+    assert cache.get("doc", 1) is None
@@ -0,0 +1,39 @@
+from app.etags import make_etag
+
+
+def test_etag_depends_on_every_part():
+    assert make_etag("entity", 1, [(1, 2)]) == make_etag("entity", 1, [(1, 2)])
+    assert make_etag("entity", 1, [(1, 2)]) != make_etag("entity", 1, [(1, 3)])
+
+
+def test_entity_types_conditional_get(client, db):
+    """Test the entity type list answers If-None-Match without querying the types."""
+    db.add_type(1, "product")
+
+    response = client.get("/entity-types")
+    etag = response.headers["ETag"]
+    db.statements.clear()
+    cached = client.get("/entity-types", headers={"If-None-Match": f'W/"other", {etag}'})
+
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == "product"
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert len(db.statements) == 1
+
+    db.execute("UPDATE schema_version SET version = version + 1")
+    assert client.get("/entity-types", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_entity_conditional_get_follows_versions(client, db):
+    db.add_type(1, "product")
+    db.add_attribute(1, 1, "price", "number")
+    db.add_entity(1, 1, price=10)
+
+    etag = client.get("/entities/1").headers["ETag"]
+    assert client.get("/entities/1", headers={"If-None-Match": etag}).status_code == 304
+
+    client.patch("/entities/1/values", json={"values": {"price": 12}})
+    response = client.get("/entities/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["values"] == {"price": 12.0}
@@ -0,0 +1,67 @@
+import pytest
+from app.routers.entities import _parse_expand, _write_response_expand
+
+
+def test_parse_expand_builds_nested_paths():
+    assert _parse_expand("dimensions.width, tags,dimensions.height") == {
+        "dimensions": {"width": {}, "height": {}},
+        "tags": {},
+    }
+
+
+def test_parse_expand_ignores_empty_segments():
+    assert _parse_expand("") == {}
+    assert _parse_expand("color.,") == {"color": {}}
+    assert _parse_expand(None) is None
+
+
+def test_write_responses_are_shallow_by_default():
+    assert _write_response_expand(None, None) == {}
+    assert _write_response_expand(2, None) is None
+    assert _write_response_expand(None, "tags") == {"tags": {}}
+
+
+def _catalog(db):
+    db.add_type(1, "product")
+    db.add_type(2, "dimensions")
+    db.add_type(3, "measurement")
+    db.add_attribute(1, 1, "price", "number")
+    db.add_attribute(2, 1, "dimensions", "relation", related_type_id=2)
+    db.add_attribute(3, 2, "width", "relation", related_type_id=3)
+    db.add_attribute(4, 3, "value", "number")
+    db.add_entity(30, 3, value=40)
+    db.add_entity(20, 2, width=30)
+    db.add_entity(1, 1, price=10, dimensions=20)
+
+
+def test_expand_embeds_listed_paths(client, db):
+    _catalog(db)
+
+    response = client.get("/entities/1", params={"expand": "dimensions.width"})
+
+    assert response.status_code == 200
+    width = response.json()["values"]["dimensions"]["values"]["width"]
+    assert width["values"] == {"value": 40.0}
+
+
+@pytest.mark.parametrize("expand, detail", [
+    ("colour", "Unknown attribute: colour"),
+    ("dimensions.depth", "Unknown attribute: dimensions.depth"),
+    ("price", "Cannot expand number attribute price"),
+])
+def test_expand_rejects_unknown_paths(client, db, expand, detail):
+    _catalog(db)
+
+    response = client.get("/entities/1", params={"expand": expand})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+
+def test_write_with_unknown_expand_writes_nothing(client, db):
+    _catalog(db)
+
+    response = client.patch("/entities/1/values", params={"expand": "colour"}, json={"values": {"price": 12}})
+
+    assert response.status_code == 400
+    assert db.value(1, "price") == 10
@@ -0,0 +1,70 @@
+import json
+
+from app.routers import entities
+
+
+def _catalog(db):
+    """Products 1-5 with a price, a main tag and tags; tags 10 and 11 have a label."""
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    db.add_attribute(1, 1, "price", "number")
+    db.add_attribute(2, 1, "main-tag", "relation", related_type_id=2)
+    db.add_attribute(3, 1, "tags", "relation_multi", related_type_id=2)
+    db.add_attribute(4, 2, "label", "text")
+    db.add_entity(10, 2, label="Sale")
+    db.add_entity(11, 2, label="New")
+    for entity_id in range(1, 6):
+        db.add_entity(entity_id, 1, price=entity_id * 10, main_tag=10, tags=[11, 10])
+
+
+def _export(client, **params):
+    response = client.get("/entities/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.endswith("\n")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_writes_relations_as_ids(client, db):
+    _catalog(db)
+
+    lines = _export(client)
+
+    assert [line["id"] for line in lines] == [1, 2, 3, 4, 5, 10, 11]
+    assert lines[0] == {
+        "id": 1, "name": "Product 1", "slug": "product-1", "entity_type_id": 1, "entity_type_name": "product",
+        "values": {"price": 10.0, "main-tag": 10, "tags": [11, 10]},
+    }
+    assert lines[5]["values"] == {"label": "Sale"}
+
+
+def test_export_expands_relations_one_level(client, db):
+    _catalog(db)
+
+    lines = _export(client, expand="true", entity_type_id=1)
+
+    values = lines[0]["values"]
+    assert values["main-tag"]["values"] == {"label": "Sale"}
+    assert [(tag["id"], tag["values"]) for tag in values["tags"]] == [(11, {"label": "New"}), (10, {"label": "Sale"})]
+
+
+def test_export_filters_by_entity_type(client, db):
+    _catalog(db)
+
+    lines = _export(client, entity_type_id=2)
+
+    assert [(line["id"], line["entity_type_name"]) for line in lines] == [(10, "tag"), (11, "tag")]
+
+
+def test_export_batches_do_not_skip_or_repeat_entities(client, db, monkeypatch):
+    monkeypatch.setattr(entities, "EXPORT_BATCH_SIZE", 2)
+    _catalog(db)
+
+    for expand in ("false", "true"):
+        db.statements.clear()
+        lines = _export(client, expand=expand)
+
+        assert [line["id"] for line in lines] == [1, 2, 3, 4, 5, 10, 11]
+        assert [line["values"].get("price") for line in lines] == [10.0, 20.0, 30.0, 40.0, 50.0, None, None]
+        # Seven entities in batches of two
+        assert [ids for table, ids in db.reads if table == "values_relation_multi"] == [[1, 2], [3, 4], [5, 10], [11]]
@@ -0,0 +1,100 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from app.facets import InvalidFacet, collect_facets, compile_facets, parse_facets
+
+ATTRIBUTES = {
+    "tags": {"id": 5, "type": "relation_multi"},
+    "color": {"id": 4, "type": "relation"},
+    "price": {"id": 2, "type": "number"},
+    "in_stock": {"id": 3, "type": "boolean"},
+    "description": {"id": 6, "type": "textarea"},
+}
+
+
+def test_parse_facets_with_buckets():
+    assert parse_facets("tags, color,price:buckets(0,25,50,100)") == [
+        ("tags", None),
+        ("color", None),
+        ("price", [Decimal(0), Decimal(25), Decimal(50), Decimal(100)]),
+    ]
+
+
+@pytest.mark.parametrize("spec", ["price:buckets(50,25)", "price:buckets(a)", "tags,,color", "price:buckets(1"])
+def test_parse_facets_rejects_invalid_specs(spec):
+    with pytest.raises(InvalidFacet):
+        parse_facets(spec)
+
+
+def test_compile_facets_groups_each_value_table():
+    selects, params = compile_facets(parse_facets("tags,price:buckets(0,25),in_stock"), ATTRIBUTES)
+    assert "FROM values_relation_multi v" in selects[0] and "GROUP BY r.id" in selects[0]
+    assert "width_bucket(v.value, CAST(:facet_bounds_1 AS numeric[]))" in selects[1]
+    assert "FROM values_boolean v" in selects[2]
+    assert params == {"facet_attr_0": 5, "facet_attr_1": 2, "facet_bounds_1": [Decimal(0), Decimal(25)],
+                      "facet_attr_2": 3}
+
+
+@pytest.mark.parametrize("spec", ["price", "tags:buckets(1,2)", "description", "weight"])
+def test_compile_facets_rejects_unsupported_facets(spec):
+    with pytest.raises(InvalidFacet):
+        compile_facets(parse_facets(spec), ATTRIBUTES)
+
+
+def test_collect_facets_shapes_counts():
+    requested = parse_facets("tags,price:buckets(0,25),in_stock")
+    rows = [
+        SimpleNamespace(facet=0, key=7, name="Sale", slug="sale", count=2),
+        SimpleNamespace(facet=0, key=8, name="New", slug="new", count=5),
+        SimpleNamespace(facet=1, key=1, name=None, slug=None, count=4),
+        SimpleNamespace(facet=1, key=2, name=None, slug=None, count=1),
+        SimpleNamespace(facet=2, key=1, name=None, slug=None, count=3),
+    ]
+    assert collect_facets(requested, ATTRIBUTES, rows) == {
+        "tags": [
+            {"id": 8, "name": "New", "slug": "new", "count": 5},
+            {"id": 7, "name": "Sale", "slug": "sale", "count": 2},
+        ],
+        "price": [
+            {"from": None, "to": 0.0, "count": 0},
+            {"from": 0.0, "to": 25.0, "count": 4},
+            {"from": 25.0, "to": None, "count": 1},
+        ],
+        "in_stock": [{"value": True, "count": 3}, {"value": False, "count": 0}],
+    }
+
+
+def test_facets_endpoint_counts_filtered_entities(client, db):
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    db.add_attribute(1, 1, "price", "number")
+    db.add_attribute(2, 1, "in-stock", "boolean")
+    db.add_attribute(3, 1, "tags", "relation_multi", related_type_id=2)
+    db.add_entity(7, 2, "Sale")
+    db.add_entity(8, 2, "New")
+    db.add_entity(1, 1, price=10, in_stock=True, tags=[7, 8])
+    db.add_entity(2, 1, price=30, in_stock=True, tags=[8])
+    db.add_entity(3, 1, price=60, in_stock=False, tags=[8])
+    db.add_entity(4, 1, price=90)
+
+    response = client.get("/entities/facets", params={
+        "entity_type_id": 1, "facets": "tags,price:buckets(25,50),in-stock", "filter[price][lt]": "80",
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 3,
+        "facets": {
+            "tags": [
+                {"id": 8, "name": "New", "slug": "new", "count": 3},
+                {"id": 7, "name": "Sale", "slug": "sale", "count": 1},
+            ],
+            "price": [
+                {"from": None, "to": 25.0, "count": 1},
+                {"from": 25.0, "to": 50.0, "count": 1},
+                {"from": 50.0, "to": None, "count": 1},
+            ],
+            "in-stock": [{"value": True, "count": 2}, {"value": False, "count": 1}],
+        },
+    }
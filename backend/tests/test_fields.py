@@ -0,0 +1,44 @@
+def _catalog(db):
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    db.add_attribute(1, 1, "title", "text")
+    db.add_attribute(2, 1, "price", "number")
+    db.add_attribute(3, 1, "in-stock", "boolean")
+    db.add_attribute(4, 1, "tags", "relation_multi", related_type_id=2)
+    db.add_attribute(5, 2, "label", "text")
+    db.add_entity(10, 2, label="Sale")
+    db.add_entity(1, 1, title="Table", price=300, in_stock=True, tags=[10])
+
+
+def test_fields_only_read_the_tables_they_live_in(client, db):
+    _catalog(db)
+
+    response = client.get("/entities/1", params={"fields": "price"})
+
+    assert response.status_code == 200
+    assert response.json()["values"] == {"price": 300.0}
+    assert [table for table, _ in db.reads] == ["values_number"]
+
+
+def test_selected_relations_are_read_once(client, db):
+    _catalog(db)
+
+    response = client.get("/entities/1", params={"fields": "title,tags", "depth": 1})
+
+    assert response.json()["values"] == {
+        "title": "Table",
+        "tags": [{"id": 10, "name": "Tag 10", "slug": "tag-10", "entity_type_id": 2, "entity_type_name": "tag",
+                  "values": {"label": "Sale"}}],
+    }
+    # The ETag walk and the document share the root's relation rows
+    assert db.reads.count(("values_relation_multi", [1])) == 1
+    assert db.read_count("values_text") == 2
+
+
+def test_unknown_field_is_rejected(client, db):
+    _catalog(db)
+
+    response = client.get("/entities/1", params={"fields": "price,weight"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown attribute: weight"
@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+import pytest
+from app.filters import InvalidFilter, compile_filters, parse_filters
+
+ATTRIBUTES = {
+    "price": {"id": 2, "type": "number"},
+    "in_stock": {"id": 3, "type": "boolean"},
+    "color": {"id": 4, "type": "hex"},
+    "tags": {"id": 5, "type": "relation_multi"},
+    "specs": {"id": 6, "type": "json"},
+}
+
+
+def test_parse_filters_defaults_to_eq():
+    params = [("filter[price][lt]", "50"), ("filter[in_stock]", "true"), ("limit", "10")]
+    assert parse_filters(params) == [("price", "lt", "50"), ("in_stock", "eq", "true")]
+
+
+def test_parse_filters_rejects_unknown_operator():
+    with pytest.raises(InvalidFilter):
+        parse_filters([("filter[price][between]", "1")])
+
+
+def test_compile_filters_semi_joins_the_value_table():
+    conditions, params = compile_filters(
+        [("price", "lt", "50"), ("in_stock", "eq", "true"), ("tags", "in", "7, 8")], ATTRIBUTES
+    )
+    assert conditions[0] == (
+        "e.id IN (SELECT f.entity_id FROM values_number f "
+        "WHERE f.attribute_id = :filter_attr_0 AND f.value < :filter_value_0)"
+    )
+    assert "FROM values_boolean f" in conditions[1]
+    assert "f.related_entity_id = ANY(:filter_value_2)" in conditions[2]
+    assert params == {
+        "filter_attr_0": 2, "filter_value_0": Decimal("50"),
+        "filter_attr_1": 3, "filter_value_1": True,
+        "filter_attr_2": 5, "filter_value_2": [7, 8],
+    }
+
+
+def test_compile_filters_text_equality_uses_the_partial_index():
+    conditions, _ = compile_filters([("color", "eq", "#ff0000")], ATTRIBUTES)
+    assert "octet_length(f.value) <= 2000" in conditions[0]
+
+
+@pytest.mark.parametrize("filters", [
+    [("weight", "eq", "1")],
+    [("price", "lt", "cheap")],
+    [("in_stock", "lt", "true")],
+    [("specs", "eq", "{}")],
+])
+def test_compile_filters_rejects_invalid_filters(filters):
+    with pytest.raises(InvalidFilter):
+        compile_filters(filters, ATTRIBUTES)
@@ -0,0 +1,78 @@
+from app.routers import graphql
+
+
+def _catalog(db):
+    """Products 1-3 tagged with tags 10 and 11; each tag has a color code."""
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    db.add_attribute(1, 1, "price", "number")
+    db.add_attribute(2, 1, "tags", "relation_multi", related_type_id=2)
+    db.add_attribute(3, 2, "color-code", "hex")
+    for tag_id in (10, 11):
+        db.add_entity(tag_id, 2, color_code=f"#{tag_id}{tag_id}")
+    for entity_id in (1, 2, 3):
+        db.add_entity(entity_id, 1, f"P{entity_id}", price=entity_id * 10, tags=[10, 11])
+
+
+def post_query(client, query):
+    return client.post("/graphql", json={"query": query})
+
+
+def test_nested_lists_are_loaded_in_batches(client, db):
+    _catalog(db)
+    response = post_query(client, """
+        { productList(limit: 3) { id values { price tags { name values { colorCode } } } } }
+    """)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert "errors" not in body
+    products = body["data"]["productList"]
+    assert [(p["id"], p["values"]["price"]) for p in products] == [(1, 10), (2, 20), (3, 30)]
+    assert products[0]["values"]["tags"] == [
+        {"name": "Tag 10", "values": {"colorCode": "#1010"}},
+        {"name": "Tag 11", "values": {"colorCode": "#1111"}},
+    ]
+    # One query per value table and level, not one per entity
+    assert db.read_count("values_relation_multi") == 1
+    assert db.read_count("values_text") == 2
+
+
+def test_depth_limit_rejects_deep_queries(client, db, monkeypatch):
+    monkeypatch.setattr(graphql, "GRAPHQL_MAX_DEPTH", 3)
+    _catalog(db)
+    response = post_query(client, "{ productList { values { tags { id } } } }")
+
+    assert response.json()["data"] is None
+    assert "depth 4 exceeds" in response.json()["errors"][0]["message"]
+    assert db.reads == []
+
+
+def test_complexity_counts_list_fields(client, db, monkeypatch):
+    monkeypatch.setattr(graphql, "GRAPHQL_MAX_COMPLEXITY", 99)
+    _catalog(db)
+    response = post_query(client, "{ productList(limit: 3) { id values { tags { id name slug } } } }")
+
+    # 1 + 3 * (1 + 1 + (1 + 10 * 3)); tags has no limit, so it counts GRAPHQL_LIST_FACTOR
+    assert "complexity 100 exceeds" in response.json()["errors"][0]["message"]
+
+
+def test_complexity_uses_the_default_limit(client, db, monkeypatch):
+    monkeypatch.setattr(graphql, "GRAPHQL_MAX_COMPLEXITY", 100)
+    _catalog(db)
+    response = post_query(client, "{ productList { id } }")
+
+    # 1 + 100 * 1
+    assert "complexity 101 exceeds" in response.json()["errors"][0]["message"]
+
+
+def test_complexity_uses_limits_passed_as_variables(client, db, monkeypatch):
+    monkeypatch.setattr(graphql, "GRAPHQL_MAX_COMPLEXITY", 2000)
+    _catalog(db)
+    query = "query Products($limit: Int) { productList(limit: $limit) { id name } }"
+
+    rejected = client.post("/graphql", json={"query": query, "variables": {"limit": 1000}})
+    accepted = client.post("/graphql", json={"query": query, "variables": {"limit": 2}})
+
+    assert "complexity 2001 exceeds" in rejected.json()["errors"][0]["message"]
+    assert [product["id"] for product in accepted.json()["data"]["productList"]] == [1, 2]
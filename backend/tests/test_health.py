@@ -3,3 +3,14 @@ def test_health_check(client):
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+
+def test_database_health(client, db):
+    """Test the database health endpoint reports pool stats and latency."""
+    response = client.get("/health/db")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert data["latency_ms"] >= 0
+    assert {"size", "checked_out", "overflow", "waits", "wait_time_ms"} <= data["pool"].keys()
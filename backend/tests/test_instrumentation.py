@@ -0,0 +1,40 @@
+from app.instrumentation import RequestStats, statement_table
+
+
+def test_statements_are_attributed_to_their_call_site(client, db):
+    db.add_type(1, "page")
+    db.add_entity(1, 1)
+    db.add_entity(2, 1)
+
+    response = client.get("/entities", params={"order": "id"})
+
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith('db;dur=')
+    assert 'desc="1 queries, 2 rows"' in timing
+    assert "db.list_entities;dur=" in timing
+
+
+def test_requests_without_queries_get_server_timing(client):
+    response = client.get("/")
+    assert response.headers["Server-Timing"].startswith('db;dur=0.00;desc="0 queries, 0 rows", app;dur=')
+
+
+def test_request_stats_group_by_site():
+    stats = RequestStats()
+    stats.record("fetch_scalar_values.text", 3, 0.002)
+    stats.record("fetch_scalar_values.text", 1, 0.001)
+    stats.record("_bump_versions", -1, 0.004)
+
+    log = stats.as_log()
+    assert (log["db_queries"], log["db_rows"], log["db_ms"]) == (3, 4, 7.0)
+    assert log["db_sites"]["fetch_scalar_values.text"] == {"queries": 2, "rows": 4, "ms": 3.0}
+    # Slowest call sites first
+    timing = stats.server_timing(0.01)
+    assert timing.index("db._bump_versions;dur=4.00") < timing.index("db.fetch_scalar_values.text;dur=3.00")
+
+
+def test_statement_table():
+    assert statement_table("SELECT * FROM values_relation_multi v WHERE v.entity_id = 1") == "relation_multi"
+    assert statement_table("INSERT INTO values_number (entity_id) VALUES (1)") == "number"
+    assert statement_table("SELECT id FROM entities") is None
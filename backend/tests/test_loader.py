@@ -0,0 +1,139 @@
+import pytest
+from app.routers.entities import EntityCache, fetch_entities_values
+
+SCALAR_TABLES = ("values_text", "values_number", "values_boolean", "values_datetime", "values_json")
+
+
+def _catalog(db):
+    """Products with dimensions, tags and related products; measurement 31 is three relations from product 1."""
+    db.add_type(1, "product")
+    db.add_type(2, "dimensions")
+    db.add_type(3, "measurement")
+    db.add_type(4, "tag")
+    db.add_attribute(1, 1, "title", "text")
+    db.add_attribute(2, 1, "price", "number")
+    db.add_attribute(3, 1, "dimensions", "relation", related_type_id=2)
+    db.add_attribute(4, 1, "related-products", "relation_multi", related_type_id=1)
+    db.add_attribute(5, 1, "tags", "relation_multi", related_type_id=4)
+    db.add_attribute(6, 2, "width", "relation", related_type_id=3)
+    db.add_attribute(7, 3, "value", "number")
+    db.add_attribute(8, 3, "unit", "text")
+    db.add_attribute(9, 4, "in-stock", "boolean")
+    db.add_attribute(10, 4, "meta", "json")
+
+    db.add_entity(30, 3, value=12.5, unit="cm")
+    db.add_entity(31, 3, value=40, unit="cm")
+    db.add_entity(20, 2, width=30)
+    db.add_entity(21, 2, width=31)
+    db.add_entity(40, 4, in_stock=True, meta={"color": "red"})
+    db.add_entity(41, 4, in_stock=False)
+    db.add_entity(3, 1, title="Stool", price=25)
+    db.add_entity(2, 1, title="Chair", price=80, dimensions=21, related_products=[3], tags=[41])
+    db.add_entity(1, 1, title="Table", price=300, dimensions=20, related_products=[3, 2], tags=[40, 41])
+
+
+def _reference(db, entity_id, depth=0, max_depth=5):
+    """The values document of the original loader, which recursed into every relation per entity."""
+    entity_type_id = db.entities[entity_id]["entity_type_id"]
+    values = {}
+    for attr in db.attributes.values():
+        if attr["entity_type_id"] != entity_type_id:
+            continue
+        value = db.value(entity_id, attr["slug"])
+        if attr["type"] in ("relation", "relation_multi"):
+            if depth >= max_depth or value in (None, []):
+                continue
+            related = [
+                {**{key: db.entities[related_id][key] for key in ("id", "name", "slug", "entity_type_id")},
+                 "entity_type_name": db.entity_types[db.entities[related_id]["entity_type_id"]],
+                 "values": _reference(db, related_id, depth + 1, max_depth)}
+                for related_id in (value if attr["type"] == "relation_multi" else [value])
+            ]
+            values[attr["slug"]] = related if attr["type"] == "relation_multi" else related[0]
+        elif value is not None:
+            values[attr["slug"]] = float(value) if attr["type"] == "number" else value
+    return values
+
+
+def test_document_at_depth_one(client, db):
+    _catalog(db)
+
+    values = client.get("/entities/2", params={"depth": 1}).json()["values"]
+
+    assert values == {
+        "title": "Chair",
+        "price": 80.0,
+        "dimensions": {"id": 21, "name": "Dimensions 21", "slug": "dimensions-21", "entity_type_id": 2,
+                       "entity_type_name": "dimensions", "values": {}},
+        "related-products": [
+            {"id": 3, "name": "Product 3", "slug": "product-3", "entity_type_id": 1, "entity_type_name": "product",
+             "values": {"title": "Stool", "price": 25.0}},
+        ],
+        "tags": [
+            {"id": 41, "name": "Tag 41", "slug": "tag-41", "entity_type_id": 4, "entity_type_name": "tag",
+             "values": {"in-stock": False}},
+        ],
+    }
+
+
+@pytest.mark.parametrize("depth", [0, 1, 2, 3, 5])
+def test_documents_match_the_recursive_loader(client, db, depth):
+    _catalog(db)
+
+    response = client.get("/entities/1", params={"depth": depth})
+
+    assert response.status_code == 200
+    assert response.json()["values"] == _reference(db, 1, max_depth=depth)
+
+
+@pytest.mark.parametrize("depth, relation_levels", [(0, 0), (1, 1), (2, 2), (3, 3), (5, 4)])
+def test_queries_are_bounded_by_depth(client, db, depth, relation_levels):
+    """Each level costs one query per relation table and scalars one query per table, whatever the fan-out."""
+    _catalog(db)
+
+    client.get("/entities/1", params={"depth": depth})
+
+    # Entity 31 is the deepest; the walk stops after finding it relates to nothing new
+    assert db.read_count("values_relation") == relation_levels
+    assert db.read_count("values_relation_multi") == relation_levels
+    assert all(db.read_count(table) == 1 for table in SCALAR_TABLES)
+
+
+def _cycle(db):
+    """Products 1 -> 2 -> 3 -> 1 through related-products, and 2 also back to 1."""
+    db.add_type(1, "product")
+    db.add_attribute(1, 1, "title", "text")
+    db.add_attribute(4, 1, "related-products", "relation_multi", related_type_id=1)
+    for entity_id, title in ((1, "Table"), (2, "Chair"), (3, "Stool")):
+        db.add_entity(entity_id, 1, title=title)
+    db.set_value(1, "related-products", [2])
+    db.set_value(2, "related-products", [3, 1])
+    db.set_value(3, "related-products", [1])
+
+
+def test_cyclic_relations_load_each_entity_once(client, db):
+    _cycle(db)
+
+    response = client.get("/entities/1", params={"depth": 5})
+
+    assert response.status_code == 200
+    assert response.json()["values"] == _reference(db, 1, max_depth=5)
+    for table in ("values_relation_multi", *SCALAR_TABLES):
+        requested = [entity_id for name, ids in db.reads if name == table for entity_id in ids]
+        assert sorted(requested) == [1, 2, 3], table
+    # Each level reads only the product it newly reached; the walk stops when the cycle closes
+    assert db.read_count("values_relation_multi") == 3
+
+
+def test_identity_map_is_reused_across_loads(db):
+    _cycle(db)
+    cache = EntityCache()
+
+    first = db.run(fetch_entities_values, [1], max_depth=3, cache=cache)
+    reads = len(db.reads)
+    second = db.run(fetch_entities_values, [2, 3], max_depth=3, cache=cache)
+
+    assert len(db.reads) == reads
+    assert second[2]["title"] == "Chair"
+    assert [related["id"] for related in second[2]["related-products"]] == [3, 1]
+    assert second[3]["related-products"][0]["values"]["title"] == first[1]["title"]
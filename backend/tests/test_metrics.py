@@ -0,0 +1,47 @@
+from app.metrics import Counter, Histogram
+
+
+def test_counter_renders_labels_and_escapes_values():
+    counter = Counter("things_total", "Things seen", ("kind",))
+    counter.inc(("a",))
+    counter.inc(("a",), 2)
+    counter.inc(('say "hi"',))
+
+    assert counter.render().splitlines() == [
+        "# HELP things_total Things seen",
+        "# TYPE things_total counter",
+        'things_total{kind="a"} 3',
+        'things_total{kind="say \\"hi\\""} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, ("/x",))
+
+    lines = histogram.render().splitlines()[2:]
+    assert lines == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 1',
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 4.05',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_metrics_endpoint_labels_requests_by_route_template(client):
+    client.get("/health")
+    client.get("/no-such-page")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in body
+    assert "# TYPE db_pool_connections gauge" in body
+    assert 'db_pool_connections{state="checked_out"}' in body
+    assert "db_pool_size " in body
@@ -0,0 +1,18 @@
+import pytest
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("name", [3, "Wireless Headphones", 42])
+    assert decode_cursor(cursor, "name") == [3, "Wireless Headphones", 42]
+
+
+def test_cursor_rejects_other_ordering():
+    cursor = encode_cursor("name", ["Keyboard", 7])
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "-name")
+
+
+def test_cursor_rejects_garbage():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", "name")
@@ -0,0 +1,60 @@
+import sqlite3
+import threading
+
+import pytest
+from app.db import TrackedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+def _pool(**options) -> TrackedQueuePool:
+    return TrackedQueuePool(lambda: sqlite3.connect(":memory:", check_same_thread=False), **options)
+
+
+def test_unbounded_overflow_never_waits():
+    pool = _pool(pool_size=1, max_overflow=-1)
+
+    connections = [pool.connect() for _ in range(3)]
+
+    assert pool.stats()["checkouts"] == 3
+    assert pool.stats()["waits"] == 0
+    for connection in connections:
+        connection.close()
+
+
+def test_checkout_from_an_exhausted_pool_waits_for_a_return():
+    pool = _pool(pool_size=1, max_overflow=0, timeout=5)
+    held = pool.connect()
+    threading.Timer(0.05, held.close).start()
+
+    pool.connect().close()
+
+    stats = pool.stats()
+    assert (stats["checkouts"], stats["waits"], stats["timeouts"]) == (2, 1, 0)
+    assert stats["wait_time_ms"] >= 40
+
+
+def test_timeouts_count_as_waits():
+    pool = _pool(pool_size=1, max_overflow=1, timeout=0.01)
+    held = [pool.connect(), pool.connect()]
+
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+
+    assert (pool.stats()["waits"], pool.stats()["timeouts"]) == (1, 1)
+    for connection in held:
+        connection.close()
+
+
+def test_totals_survive_pool_recreation():
+    pool = _pool(pool_size=1, max_overflow=0, timeout=0.01)
+    held = pool.connect()
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    held.close()
+    pool.dispose()
+
+    recreated = pool.recreate()
+    recreated.connect().close()
+
+    stats = recreated.stats()
+    assert (stats["checkouts"], stats["waits"], stats["timeouts"]) == (3, 1, 1)
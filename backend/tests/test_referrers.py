@@ -0,0 +1,40 @@
+from app.pagination import decode_cursor
+
+
+def _tagged(db):
+    """Tag 9 is used by products 1-3 through attribute 5 and by article 4 through attribute 8."""
+    db.add_type(1, "product")
+    db.add_type(2, "article")
+    db.add_type(3, "tag")
+    db.add_attribute(5, 1, "tags", "relation_multi", related_type_id=3)
+    db.add_attribute(8, 2, "topics", "relation_multi", related_type_id=3)
+    db.add_entity(9, 3, "Sale")
+    db.add_entity(10, 3, "New")
+    for entity_id in (1, 2, 3):
+        db.add_entity(entity_id, 1, tags=[9, 10])
+    db.add_entity(4, 2, topics=[9])
+
+
+def test_referrers_are_grouped_by_attribute(client, db):
+    _tagged(db)
+
+    response = client.get("/entities/9/referenced-by", params={"limit": 3})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 4
+    assert [(group["slug"], group["count"], [r["id"] for r in group["referrers"]]) for group in data["attributes"]] == [
+        ("tags", 3, [1, 2, 3]),
+    ]
+    assert decode_cursor(response.headers["X-Next-Cursor"], "referenced-by") == [5, 3]
+
+    rest = client.get("/entities/9/referenced-by", params={"limit": 3, "cursor": response.headers["X-Next-Cursor"]})
+    assert [(group["slug"], [r["id"] for r in group["referrers"]]) for group in rest.json()["attributes"]] == [
+        ("topics", [4]),
+    ]
+    assert "X-Next-Cursor" not in rest.headers
+
+
+def test_referrers_of_missing_entity(client, db):
+    _tagged(db)
+    assert client.get("/entities/99/referenced-by").status_code == 404
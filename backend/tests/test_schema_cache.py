@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.schema_cache import AttributeSchemaCache
+
+
+class FakeRow(SimpleNamespace):
+    @property
+    def _mapping(self):
+        return vars(self)
+
+
+class FakeSession:
+    """Answers the two queries issued by the schema cache."""
+
+    def __init__(self):
+        self.version = 1
+        self.attribute_loads = 0
+        self.attributes = [
+            FakeRow(id=1, entity_type_id=10, slug="name", type="text",
+                    related_entity_type_id=None, default_value=None),
+            FakeRow(id=2, entity_type_id=10, slug="price", type="number",
+                    related_entity_type_id=None, default_value="0"),
+        ]
+
+    async def execute(self, statement, params=None):
+        if "schema_version" in str(statement):
+            return SimpleNamespace(scalar_one=lambda: self.version)
+        self.attribute_loads += 1
+        return list(self.attributes)
+
+
+def test_attributes_are_loaded_once():
+    db = FakeSession()
+    cache = AttributeSchemaCache(check_interval=60)
+
+    assert asyncio.run(cache.attributes_for_type(db, 10))["price"]["id"] == 2
+    assert asyncio.run(cache.attribute(db, 1))["slug"] == "name"
+    assert asyncio.run(cache.attributes_for_type(db, 99)) == {}
+
+    assert db.attribute_loads == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_version_change_triggers_reload():
+    db = FakeSession()
+    cache = AttributeSchemaCache(check_interval=0)
+    asyncio.run(cache.attributes_for_type(db, 10))
+
+    db.version = 2
+    db.attributes.append(
+        FakeRow(id=3, entity_type_id=10, slug="sku", type="text",
+                related_entity_type_id=None, default_value=None)
+    )
+
+    assert "sku" in asyncio.run(cache.attributes_for_type(db, 10))
+    assert cache.version == 2
+    assert db.attribute_loads == 2
+
+
+def test_unknown_attribute_id_forces_reload():
+    db = FakeSession()
+    cache = AttributeSchemaCache(check_interval=60)
+    asyncio.run(cache.attributes_for_type(db, 10))
+
+    db.attributes.append(
+        FakeRow(id=3, entity_type_id=10, slug="sku", type="text",
+                related_entity_type_id=None, default_value=None)
+    )
+
+    assert asyncio.run(cache.attribute(db, 3))["slug"] == "sku"
+    assert cache.stats()["reloads"] == 2
@@ -0,0 +1,36 @@
+from app.pagination import decode_cursor
+from app.search import REFRESH_SQL
+
+
+def test_refresh_weights_searchable_text_types():
+    assert "WHERE a.type = 'text')), 'B')" in REFRESH_SQL
+    assert "WHERE a.type = 'textarea')), 'C')" in REFRESH_SQL
+    assert "'hex'" not in REFRESH_SQL
+
+
+def test_search_pages_by_rank(client, db):
+    """Test search returns ranked matches and a cursor keyed on (rank, id)."""
+    db.add_type(1, "product")
+    db.add_type(2, "post")
+    db.add_attribute(1, 1, "material", "text")
+    db.add_entity(2, 1, "Chair 2", material="Oak")
+    db.add_entity(4, 1, "Oak chair")
+    db.add_entity(7, 1, "Oak stool")
+    db.add_entity(9, 1, "Chair 9", material="Oak")
+    db.add_entity(5, 2, "Oak chairs we like")
+
+    response = client.get("/entities/search", params={"q": "oak chair", "entity_type_id": 1, "limit": 2})
+
+    assert response.status_code == 200
+    page = response.json()
+    # Both terms in the name rank above a name match plus a text attribute match
+    assert [entity["id"] for entity in page] == [4, 2]
+    assert page[0]["rank"] > page[1]["rank"]
+    assert decode_cursor(response.headers["X-Next-Cursor"], "search") == [page[1]["rank"], 2]
+
+    rest = client.get("/entities/search", params={
+        "q": "oak chair", "entity_type_id": 1, "limit": 2, "cursor": response.headers["X-Next-Cursor"],
+    })
+    # Entity 9 ranks the same as entity 2 and follows it by id
+    assert [(entity["id"], entity["rank"]) for entity in rest.json()] == [(9, page[1]["rank"])]
+    assert "X-Next-Cursor" not in rest.headers
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+import pytest
+from app.pagination import decode_cursor, encode_cursor
+from app.routers.entities import TEXT_SORT_PREFIX
+
+
+def _products(db):
+    """Price is set on products 1-3 but not 4-5."""
+    db.add_type(1, "product")
+    db.add_attribute(2, 1, "price", "number")
+    db.add_attribute(3, 1, "meta", "json")
+    for entity_id, price in ((1, Decimal("20")), (2, Decimal("10")), (3, Decimal("30")), (4, None), (5, None)):
+        db.add_entity(entity_id, 1, **({"price": price} if price is not None else {}))
+
+
+def test_sort_by_attribute_tops_up_with_missing_values(client, db):
+    _products(db)
+
+    response = client.get("/entities", params={"entity_type_id": 1, "sort": "-price", "limit": 4})
+
+    assert [entity["id"] for entity in response.json()] == [3, 1, 2, 5]
+    assert decode_cursor(response.headers["X-Next-Cursor"], "-price") == [None, 5]
+
+
+def test_sort_pages_through_valued_and_missing_entities(client, db):
+    _products(db)
+
+    seen, params = [], {"entity_type_id": 1, "sort": "price", "limit": 2}
+    while True:
+        response = client.get("/entities", params=params)
+        assert response.status_code == 200
+        seen += [entity["id"] for entity in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert seen == [2, 1, 3, 4, 5]
+
+
+def test_sort_cursor_in_missing_values_continues_by_id(client, db):
+    _products(db)
+    cursor = encode_cursor("price", [None, 4])
+
+    response = client.get("/entities", params={"entity_type_id": 1, "sort": "price", "cursor": cursor})
+
+    assert response.status_code == 200
+    assert [entity["id"] for entity in response.json()] == [5]
+
+
+def test_sort_rejects_unsortable_attributes(client, db):
+    _products(db)
+
+    assert client.get("/entities", params={"sort": "price"}).status_code == 400
+    assert client.get("/entities", params={"entity_type_id": 1, "sort": "meta"}).status_code == 400
+    assert client.get("/entities", params={"entity_type_id": 1, "sort": "weight"}).status_code == 400
+
+
+def test_sort_by_text_pages_in_value_order(client, db):
+    db.add_type(1, "product")
+    db.add_attribute(1, 1, "sku", "text")
+    for entity_id, sku in ((1, "B-2"), (2, "A-9"), (3, "B-10"), (4, "A-1")):
+        db.add_entity(entity_id, 1, sku=sku)
+
+    seen, params = [], {"entity_type_id": 1, "sort": "-sku", "limit": 3}
+    while True:
+        response = client.get("/entities", params=params)
+        seen += [entity["id"] for entity in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert seen == [1, 3, 2, 4]
+
+
+@pytest.mark.parametrize("sort", ["note", "-note"])
+def test_text_sort_pages_in_code_point_order_around_the_prefix_cutoff(client, db, sort):
+    """Values sharing a long prefix, differing in case and punctuation around the indexed prefix's end."""
+    db.add_type(1, "product")
+    db.add_attribute(1, 1, "note", "text")
+    stem = "x" * (TEXT_SORT_PREFIX - 2)
+    notes = [stem + "ab", stem + "a-c", stem + "aB", stem + "a" + "b" * 5, stem + "Az", stem + "a", stem + "a c",
+             stem + "ab-", stem + "abA"]
+    for entity_id, note in enumerate(notes, start=1):
+        db.add_entity(entity_id, 1, note=note)
+
+    seen, params = [], {"entity_type_id": 1, "sort": sort, "limit": 2}
+    while True:
+        response = client.get("/entities", params=params)
+        seen += [entity["id"] for entity in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    expected = sorted(range(1, len(notes) + 1), key=lambda entity_id: notes[entity_id - 1].encode(),
+                      reverse=sort.startswith("-"))
+    assert seen == expected
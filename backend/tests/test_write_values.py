@@ -0,0 +1,93 @@
+from app.routers.entities import _write_values
+
+
+def _catalog(db):
+    """Products 1 and 2 with an attribute of every type; tags 7-9."""
+    db.add_type(1, "product")
+    db.add_type(2, "tag")
+    for attribute_id, slug, type in ((1, "title", "text"), (2, "price", "number"), (3, "in-stock", "boolean"),
+                                     (4, "released", "datetime"), (5, "specs", "json")):
+        db.add_attribute(attribute_id, 1, slug, type)
+    db.add_attribute(6, 1, "main-tag", "relation", related_type_id=2)
+    db.add_attribute(7, 1, "tags", "relation_multi", related_type_id=2)
+    for tag_id in (7, 8, 9):
+        db.add_entity(tag_id, 2)
+    db.add_entity(1, 1, title="Table", price=300, specs={"legs": 4}, main_tag=7, tags=[8, 9])
+    db.add_entity(2, 1)
+
+
+def _write(db, *triples):
+    """Write (entity_id, slug, value) triples in one _write_values call and commit."""
+    attributes = {attr["slug"]: attr for attr in db.attributes.values()}
+
+    async def write(session):
+        await _write_values(session, [(entity_id, attributes[slug], value) for entity_id, slug, value in triples])
+        await session.commit()
+
+    db.statements.clear()
+    db.run(write)
+
+
+def _writes(db, table):
+    return sum(sql.lstrip().startswith(f"INSERT INTO {table} ") for sql, _ in db.statements)
+
+
+def test_mixed_value_types_are_written_with_one_insert_per_table(client, db):
+    _catalog(db)
+
+    _write(db, (2, "title", "Chair"), (2, "price", 80), (2, "in-stock", True), (2, "released", "2024-01-31T10:00:00"),
+           (2, "specs", {"legs": 3}), (2, "main-tag", {"id": 8}), (2, "tags", [7, 9]),
+           (1, "title", "Oak table"), (1, "in-stock", False))
+
+    assert client.get("/entities/2", params={"expand": ""}).json()["values"] == {
+        "title": "Chair", "price": 80.0, "in-stock": True, "released": "2024-01-31T10:00:00", "specs": {"legs": 3},
+        "main-tag": {"id": 8, "name": "Tag 8", "slug": "tag-8"},
+        "tags": [{"id": 7, "name": "Tag 7", "slug": "tag-7"}, {"id": 9, "name": "Tag 9", "slug": "tag-9"}],
+    }
+    assert (db.value(1, "title"), db.value(1, "in-stock"), db.value(1, "price")) == ("Oak table", False, 300)
+    for table in ("values_text", "values_number", "values_boolean", "values_datetime", "values_json",
+                  "values_relation", "values_relation_multi"):
+        assert _writes(db, table) == 1, table
+    assert (db.version(1), db.version(2)) == (2, 2)
+    # Search vectors follow the written text
+    assert [entity["id"] for entity in client.get("/entities/search", params={"q": "oak"}).json()] == [1]
+
+
+def test_existing_values_are_updated_in_place(db):
+    _catalog(db)
+
+    _write(db, (1, "title", "Desk"), (1, "price", 120), (1, "specs", ["drawer"]), (1, "main-tag", 9))
+
+    assert [db.value(1, slug) for slug in ("title", "price", "specs", "main-tag")] == ["Desk", 120, ["drawer"], 9]
+    assert db.execute("SELECT count(*) FROM values_text WHERE entity_id = 1") == [(1,)]
+
+
+def test_null_removes_relations_and_stores_null_scalars(client, db):
+    _catalog(db)
+
+    _write(db, (1, "price", None), (1, "specs", None), (1, "main-tag", None), (1, "tags", None))
+
+    assert db.execute("SELECT value FROM values_number WHERE entity_id = 1") == [(None,)]
+    assert db.execute("SELECT value FROM values_json WHERE entity_id = 1") == [(None,)]
+    assert db.execute("SELECT count(*) FROM values_relation WHERE entity_id = 1") == [(0,)]
+    assert db.value(1, "tags") == []
+    assert client.get("/entities/1").json()["values"] == {"title": "Table", "price": None, "specs": None}
+
+
+def test_last_write_of_a_relation_wins(db):
+    _catalog(db)
+
+    _write(db, (1, "main-tag", 8), (1, "main-tag", None), (2, "main-tag", None), (2, "main-tag", 9))
+
+    assert (db.value(1, "main-tag"), db.value(2, "main-tag")) == (None, 9)
+
+
+def test_multi_relations_are_replaced_in_the_given_order(client, db):
+    _catalog(db)
+
+    _write(db, (1, "tags", [9, {"id": 7}, 9, 8]), (2, "tags", [8]), (2, "tags", [9, 7]))
+
+    # Repeated ids keep their first position
+    assert db.value(1, "tags") == [9, 7, 8]
+    assert db.value(2, "tags") == [9, 7]
+    assert [tag["id"] for tag in client.get("/entities/1", params={"expand": ""}).json()["values"]["tags"]] == [9, 7, 8]
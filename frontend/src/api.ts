@@ -58,13 +58,23 @@ export async function fetchEntityType(id: number): Promise<EntityTypeDetail> {
   return response.json();
 }
 
+// The API returns entity lists in keyset pages; this is its maximum page size
+const ENTITY_PAGE_SIZE = 1000;
+
 export async function fetchEntities(entityTypeId?: number): Promise<Entity[]> {
-  const url = entityTypeId 
-    ? `${API_BASE}/entities?entity_type_id=${entityTypeId}`
-    : `${API_BASE}/entities`;
-  const response = await fetch(url);
-  if (!response.ok) throw new Error('Failed to fetch entities');
-  return response.json();
+  const params = new URLSearchParams({ limit: String(ENTITY_PAGE_SIZE) });
+  if (entityTypeId) params.set('entity_type_id', String(entityTypeId));
+
+  // Follow X-Next-Cursor until the last page so callers get the whole list
+  const entities: Entity[] = [];
+  for (;;) {
+    const response = await fetch(`${API_BASE}/entities?${params}`);
+    if (!response.ok) throw new Error('Failed to fetch entities');
+    entities.push(...await response.json());
+    const cursor = response.headers.get('X-Next-Cursor');
+    if (!cursor) return entities;
+    params.set('cursor', cursor);
+  }
 }
 
 export async function fetchEntity(id: number): Promise<EntityDetail> {
@@ -77,7 +87,7 @@ export async function updateEntityValues(
   id: number,
   values: Record<string, unknown>
 ): Promise<EntityDetail> {
-  const response = await fetch(`${API_BASE}/entities/${id}/values`, {
+  const response = await fetch(`${API_BASE}/entities/${id}/values?depth=5`, {
     method: 'PATCH',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({ values }),